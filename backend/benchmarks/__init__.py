@@ -0,0 +1 @@
+"""Standalone micro-benchmarks for hot backend paths (``python -m backend.benchmarks.<name>``)."""
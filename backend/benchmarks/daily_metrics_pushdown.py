@@ -0,0 +1,139 @@
+"""Compare recomputing daily metrics from entry rows with the SQL push-down.
+
+Offline, reports the JSON bytes PostgREST would send for each path and the
+client-side time to decode (and, for entry rows, aggregate) them. With
+``--database-url`` it also loads the rows into a temp ``entries`` table and
+times both paths end to end against Postgres (needs psycopg).
+
+    python -m backend.benchmarks.daily_metrics_pushdown --entries 20000 --users 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..db.queries import entry_columns
+from ..services.analytics import compute_daily_metrics
+from .synthetic import LABELS, best_of
+
+MIGRATION = Path(__file__).resolve().parents[1] / "db" / "migrations" / "009_daily_metrics_rpc.sql"
+START = datetime(2025, 1, 1, tzinfo=UTC)
+
+
+def _synthetic_rows(count: int, users: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        created_at = START + timedelta(minutes=7 * index)
+        rows.append(
+            {
+                "id": f"00000000-0000-0000-0000-{index:012d}",
+                "user_id": f"00000000-0000-0000-0000-{rng.randrange(users):012d}",
+                "created_at": created_at.isoformat(),
+                "emotion_json": [{"label": label, "score": round(rng.random(), 4)} for label in LABELS],
+                "sentiment_score": round(rng.uniform(-1, 1), 4),
+                "entry_length": rng.randint(40, 600),
+                "time_of_day": None,
+                "weekday": created_at.weekday(),
+                "tags": ["work"],
+            }
+        )
+    return rows
+
+
+def _report(label: str, body: bytes, seconds: float) -> None:
+    print(f"{label:28} {len(body):14,} {seconds * 1000:10.1f}")
+
+
+def _offline(rows: List[Dict[str, Any]], repeat: int) -> None:
+    columns = entry_columns("analytics").split(",")
+    entries_body = json.dumps([{column: row.get(column) for column in columns} for row in rows]).encode()
+    aggregate_body = json.dumps(compute_daily_metrics(rows)).encode()
+
+    print(f"{'path':28} {'bytes':>14} {'client ms':>10}")
+    _report(
+        "entries + python aggregate",
+        entries_body,
+        best_of(repeat, lambda: compute_daily_metrics(json.loads(entries_body))),
+    )
+    _report("compute_daily_metrics rpc", aggregate_body, best_of(repeat, lambda: json.loads(aggregate_body)))
+    print(f"bytes saved: {1 - len(aggregate_body) / len(entries_body):.1%}")
+
+
+def _against_postgres(rows: List[Dict[str, Any]], database_url: str, repeat: int) -> None:
+    import psycopg
+
+    end = START + timedelta(minutes=7 * len(rows))
+    with psycopg.connect(database_url) as conn:
+        conn.execute(
+            "create temp table entries (id uuid primary key, user_id uuid, text text, tags text[], "
+            "emotion_json jsonb, created_at timestamptz not null, entry_length int, time_of_day text, "
+            "weekday int, sentiment_score numeric)"
+        )
+        conn.execute(MIGRATION.read_text())
+        with conn.cursor() as cursor:
+            with cursor.copy(
+                "copy entries (id, user_id, created_at, emotion_json, sentiment_score, entry_length, weekday) "
+                "from stdin"
+            ) as copy:
+                for row in rows:
+                    copy.write_row(
+                        [
+                            row["id"],
+                            row["user_id"],
+                            row["created_at"],
+                            json.dumps(row["emotion_json"]),
+                            row["sentiment_score"],
+                            row["entry_length"],
+                            row["weekday"],
+                        ]
+                    )
+        conn.execute("analyze entries")
+
+        def json_body(query: str) -> str:
+            row = conn.execute(query, (START, end)).fetchone()
+            assert row is not None  # json_agg always returns one row
+            return str(row[0])
+
+        def fetch_and_aggregate() -> None:
+            # json_agg approximates the bytes and decode work of a PostgREST response.
+            body = json_body(
+                "select coalesce(json_agg(t), '[]')::text from (select "
+                + entry_columns("analytics")
+                + " from entries where created_at >= %s and created_at <= %s order by created_at) t"
+            )
+            compute_daily_metrics(json.loads(body))
+
+        def push_down() -> None:
+            body = json_body("select coalesce(json_agg(t), '[]')::text from compute_daily_metrics(%s, %s) t")
+            json.loads(body)
+
+        print(f"{'postgres path':28} {'wall ms':>10}")
+        print(f"{'entries + python aggregate':28} {best_of(repeat, fetch_and_aggregate) * 1000:10.1f}")
+        print(f"{'compute_daily_metrics rpc':28} {best_of(repeat, push_down) * 1000:10.1f}")
+        conn.rollback()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    rows = _synthetic_rows(args.entries, args.users, args.seed)
+    print(f"entries={args.entries} users={args.users}")
+    _offline(rows, args.repeat)
+    if args.database_url:
+        _against_postgres(rows, args.database_url, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
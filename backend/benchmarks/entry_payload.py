@@ -0,0 +1,97 @@
+"""Measure what each entry projection saves over ``select *``.
+
+Builds synthetic rows with every ``entries`` column, including the 1536-float
+embedding, and reports, per endpoint, the JSON bytes PostgREST would send and
+the time to decode them.
+
+    python -m backend.benchmarks.entry_payload --entries 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List
+
+from ..db.queries import entry_columns
+from ..services.tokens import TOKENIZER_VERSION, tokenize
+from .synthetic import LABELS, best_of, synthetic_word
+
+# Which projection each entry-reading caller uses.
+ENDPOINT_PROJECTIONS = {
+    "GET /entries": "list",
+    "GET /entries/{id}": "detail",
+    "GET /insights/summary": "tokens",
+    "GET /triggers, /triggers/discover": "tokens",
+    "GET /summary": "analytics",
+    "POST /analytics/recompute": "analytics",
+    "weekly DAG": "tokens",
+}
+
+
+def synthetic_rows(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    vocabulary = [synthetic_word(index) for index in range(2_000)]
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    rows = []
+    for index in range(count):
+        created_at = start + timedelta(minutes=37 * index)
+        text = " ".join(rng.choices(vocabulary, k=rng.randint(20, 80)))
+        rows.append(
+            {
+                "id": f"00000000-0000-0000-0000-{index:012d}",
+                "user_id": "00000000-0000-0000-0000-00000000beef",
+                "text": text,
+                "source": "web",
+                "tags": ["work"],
+                "emotion_json": [{"label": label, "score": round(rng.random(), 4)} for label in LABELS],
+                "ai_response": "Take a breath and acknowledge how showing up to reflect is caring for yourself.",
+                "created_at": created_at.isoformat(),
+                "entry_length": len(text.split()),
+                "time_of_day": "evening",
+                "weekday": created_at.weekday(),
+                "sentiment_score": round(rng.uniform(-1, 1), 4),
+                "response_delay_ms": None,
+                "embedding": [round(rng.uniform(-1, 1), 6) for _ in range(1536)],
+                "tokens": tokenize(text),
+                "tokens_version": TOKENIZER_VERSION,
+            }
+        )
+    return rows
+
+
+def _payload(rows: List[Dict[str, Any]], columns: List[str] | None) -> bytes:
+    if columns is not None:
+        rows = [{column: row[column] for column in columns} for row in rows]
+    return json.dumps(rows).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.entries, args.seed)
+    full = _payload(rows, None)
+    full_decode = best_of(args.repeat, lambda: json.loads(full))
+
+    print(f"entries={args.entries}")
+    print(f"{'endpoint':36} {'projection':10} {'bytes':>12} {'saved':>7} {'decode ms':>10}")
+    print(f"{'select *':36} {'-':10} {len(full):12,} {'':>7} {full_decode * 1000:10.1f}")
+    for endpoint, projection in ENDPOINT_PROJECTIONS.items():
+        body = _payload(rows, entry_columns(projection).split(","))
+
+        def decode_body(body: bytes = body) -> Any:
+            return json.loads(body)
+
+        decode = best_of(args.repeat, decode_body)
+        saved = 1 - len(body) / len(full)
+        print(f"{endpoint:36} {projection:10} {len(body):12,} {saved:7.1%} {decode * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,603 @@
+"""In-process stand-in for Supabase's PostgREST API.
+
+Rows live in memory, one list per table. The same store answers two clients:
+
+* :class:`FakeSupabaseClient` implements the ``table(...)`` builder chain
+  (``select/eq/neq/gt/gte/lt/lte/in_/is_/or_/order/limit/range`` plus
+  ``insert/upsert/update/delete``) and ``rpc(...)`` that
+  :mod:`backend.db.queries` uses.
+* :meth:`FakePostgREST.async_client` returns an ``httpx.AsyncClient`` whose
+  transport parses PostgREST query strings, for :mod:`backend.db.async_queries`.
+
+Every request sleeps for ``latency`` seconds plus up to ``jitter``, so
+benchmarks can model a network round trip without touching a real project.
+Rows go through a JSON round trip on the way in and out, as they would on the
+wire. :func:`installed` points the query modules at a fake for a block.
+
+    fake = FakePostgREST(latency=0.005)
+    with installed(fake):
+        queries.insert_entry(...)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import UTC, date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, cast
+
+import httpx
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+RpcHandler = Callable[["FakePostgREST", Dict[str, Any]], Any]
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_NUMBER = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def _sort_key(value: Any) -> Any:
+    """Comparable form of a stored or filter value (timestamps become datetimes)."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=UTC)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=UTC)
+    text = str(value)
+    if _ISO_DATE.match(text):
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return text
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+    if _NUMBER.match(text):
+        return float(text)
+    return text
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    if op == "is":
+        return left is right if right is None or isinstance(right, bool) else str(left) == str(right)
+    if op == "in":
+        return any(_compare("eq", left, item) for item in right)
+    if left is None:
+        return False
+    a, b = _sort_key(left), _sort_key(right)
+    if type(a) is not type(b):
+        a, b = str(left), str(right)
+    if op == "eq":
+        return bool(a == b)
+    if op == "neq":
+        return bool(a != b)
+    if op == "gt":
+        return bool(a > b)
+    if op == "gte":
+        return bool(a >= b)
+    if op == "lt":
+        return bool(a < b)
+    if op == "lte":
+        return bool(a <= b)
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _condition(column: str, op: str, value: Any) -> Predicate:
+    return lambda row: _compare(op, row.get(column), value)
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts: List[str] = []
+    current: List[str] = []
+    depth, quoted = 0, False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote_value(value: str) -> Any:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def parse_filter(column: str, expression: str) -> Predicate:
+    """Predicate for a PostgREST ``column=op.value`` query parameter."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+    value: Any
+    if op == "in":
+        value = [_unquote_value(item) for item in _split_top_level(raw.strip("()"))]
+    elif op == "is":
+        value = {"null": None, "true": True, "false": False}.get(raw, raw)
+    else:
+        value = _unquote_value(raw)
+    predicate = _condition(column, op, value)
+    return (lambda row: not predicate(row)) if negate else predicate
+
+
+def parse_logic(text: str, combine: Callable[[Any], bool] = any) -> Predicate:
+    """Predicate for an ``or=(...)`` / ``and(...)`` PostgREST expression."""
+    predicates = []
+    for item in _split_top_level(text.strip()[1:-1] if text.strip().startswith("(") else text):
+        item = item.strip()
+        if item.startswith(("and(", "or(")):
+            name, _, rest = item.partition("(")
+            predicates.append(parse_logic("(" + rest, all if name == "and" else any))
+        else:
+            column, _, expression = item.partition(".")
+            predicates.append(parse_filter(column, expression))
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def _wire(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+class _Response:
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any) -> None:
+        self.data = data
+        self.count = None
+
+
+class FakeQuery:
+    """One PostgREST request, built by chaining like postgrest-py."""
+
+    def __init__(self, backend: "FakePostgREST", table: str) -> None:
+        self._backend = backend
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.filters: List[Predicate] = []
+        self.ordering: List[Tuple[str, bool]] = []
+        self.limit_rows: Optional[int] = None
+        self.offset_rows = 0
+        self.payload: Any = None
+        self.on_conflict = ""
+        self.ignore_duplicates = False
+        self.returning = "representation"
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "FakeQuery":
+        self.columns = ",".join(columns) or "*"
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "lte", value)
+
+    def in_(self, column: str, values: Sequence[Any]) -> "FakeQuery":
+        return self._where(column, "in", list(values))
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._where(column, "is", {"null": None, "true": True, "false": False}.get(value, value))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "FakeQuery":
+        self.filters.append(parse_logic(f"({filters})"))
+        return self
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, **_: Any) -> "FakeQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, size: int, **_: Any) -> "FakeQuery":
+        self.limit_rows = size
+        return self
+
+    def offset(self, size: int) -> "FakeQuery":
+        self.offset_rows = size
+        return self
+
+    def range(self, start: int, end: int, **_: Any) -> "FakeQuery":
+        self.offset_rows, self.limit_rows = start, end - start + 1
+        return self
+
+    def insert(self, json: Any, *, returning: str = "representation", **_: Any) -> "FakeQuery":
+        self.action, self.payload, self.returning = "insert", json, returning
+        return self
+
+    def upsert(
+        self,
+        json: Any,
+        *,
+        returning: str = "representation",
+        on_conflict: str = "",
+        ignore_duplicates: bool = False,
+        **_: Any,
+    ) -> "FakeQuery":
+        self.action, self.payload, self.returning = "upsert", json, returning
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, json: Dict[str, Any], *, returning: str = "representation", **_: Any) -> "FakeQuery":
+        self.action, self.payload, self.returning = "update", json, returning
+        return self
+
+    def delete(self, *, returning: str = "representation", **_: Any) -> "FakeQuery":
+        self.action, self.returning = "delete", returning
+        return self
+
+    def _where(self, column: str, op: str, value: Any) -> "FakeQuery":
+        self.filters.append(_condition(column, op, value))
+        return self
+
+    def execute(self) -> _Response:
+        self._backend.pause()
+        return _Response(self._backend.run(self))
+
+
+class _RpcCall:
+    def __init__(self, backend: "FakePostgREST", name: str, params: Dict[str, Any]) -> None:
+        self._backend, self._name, self._params = backend, name, params
+
+    def execute(self) -> _Response:
+        self._backend.pause()
+        return _Response(self._backend.call(self._name, self._params))
+
+
+class FakeSupabaseClient:
+    """The slice of ``supabase.Client`` that the query layer touches."""
+
+    def __init__(self, backend: "FakePostgREST") -> None:
+        self._backend = backend
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self._backend, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> _RpcCall:
+        return _RpcCall(self._backend, name, dict(params or {}))
+
+
+class FakePostgREST:
+    """In-memory tables plus the RPC functions the migrations define."""
+
+    def __init__(self, *, latency: float = 0.0, jitter: float = 0.0, seed: int = 0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.tables: Dict[str, List[Row]] = {}
+        self.requests = 0
+        self.rpcs: Dict[str, RpcHandler] = {
+            "record_trigger_observation": _record_trigger_observation,
+            "begin_trigger_stats_rebuild": _begin_trigger_stats_rebuild,
+            "replace_trigger_stats": _replace_trigger_stats,
+            "compute_daily_metrics": _compute_daily_metrics,
+        }
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+
+    # -- clients -----------------------------------------------------------
+
+    def client(self) -> FakeSupabaseClient:
+        return FakeSupabaseClient(self)
+
+    def async_client(self) -> httpx.AsyncClient:
+        from ..db.instrument import on_response_async
+
+        return httpx.AsyncClient(
+            base_url="https://fake-postgrest.test/rest/v1",
+            transport=httpx.MockTransport(self.handle_async),
+            event_hooks={"response": [on_response_async]},
+        )
+
+    # -- latency -----------------------------------------------------------
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def pause(self) -> None:
+        delay = self._delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    # -- storage -----------------------------------------------------------
+
+    def rows(self, table: str) -> List[Row]:
+        with self._lock:
+            return self.tables.setdefault(table, [])
+
+    def seed(self, table: str, records: Sequence[Row]) -> None:
+        with self._lock:
+            self.rows(table).extend(self._new_row(record) for record in records)
+
+    def _new_row(self, record: Row) -> Row:
+        row: Row = _wire(record)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.now(UTC).isoformat())
+        return row
+
+    def run(self, query: FakeQuery) -> List[Row]:
+        with self._lock:
+            rows = self.rows(query.table)
+            if query.action == "select":
+                return self._select(query, rows)
+            if query.action == "insert":
+                written = [self._new_row(record) for record in _as_list(query.payload)]
+                rows.extend(written)
+            elif query.action == "upsert":
+                upserted = [self._upsert_one(query, rows, record) for record in _as_list(query.payload)]
+                written = [row for row in upserted if row is not None]
+            elif query.action == "update":
+                changes = _wire(query.payload)
+                written = [row for row in rows if all(predicate(row) for predicate in query.filters)]
+                for row in written:
+                    row.update(changes)
+            elif query.action == "delete":
+                written = [row for row in rows if all(predicate(row) for predicate in query.filters)]
+                gone = {id(row) for row in written}
+                rows[:] = [row for row in rows if id(row) not in gone]
+            else:  # pragma: no cover - guarded by the builder
+                raise ValueError(query.action)
+            return _wire(written) if query.returning == "representation" else []
+
+    def _upsert_one(self, query: FakeQuery, rows: List[Row], record: Row) -> Optional[Row]:
+        record = _wire(record)
+        keys = [column.strip() for column in query.on_conflict.split(",") if column.strip()] or ["id"]
+        if all(key in record for key in keys):
+            for row in rows:
+                if all(_compare("eq", row.get(key), record[key]) for key in keys):
+                    if query.ignore_duplicates:
+                        return None
+                    row.update(record)
+                    return row
+        row = self._new_row(record)
+        rows.append(row)
+        return row
+
+    def _select(self, query: FakeQuery, rows: List[Row]) -> List[Row]:
+        matched = [row for row in rows if all(predicate(row) for predicate in query.filters)]
+        for column, descending in reversed(query.ordering):
+            # Postgres puts nulls last ascending and, reversed, first descending.
+            matched.sort(
+                key=lambda row: (row.get(column) is None, _sort_key(row.get(column))),
+                reverse=descending,
+            )
+        matched = matched[query.offset_rows :]
+        if query.limit_rows is not None:
+            matched = matched[: query.limit_rows]
+        if query.columns.strip() != "*":
+            columns = [column.strip() for column in query.columns.split(",")]
+            matched = [{column: row.get(column) for column in columns} for row in matched]
+        return cast(List[Row], _wire(matched))
+
+    def call(self, name: str, params: Dict[str, Any]) -> Any:
+        try:
+            handler = self.rpcs[name]
+        except KeyError:
+            raise ValueError(f"Unknown RPC: {name}") from None
+        with self._lock:
+            return _wire(handler(self, params))
+
+    # -- HTTP --------------------------------------------------------------
+
+    async def handle_async(self, request: httpx.Request) -> httpx.Response:
+        delay = self._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.handle(request)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        """Serve one PostgREST HTTP request from the in-memory tables."""
+        path = request.url.path.split("/rest/v1/", 1)[-1].strip("/")
+        body = json.loads(request.content) if request.content else None
+        if path.startswith("rpc/"):
+            return httpx.Response(200, json=self.call(path[4:], body or {}))
+
+        query = FakeQuery(self, path)
+        prefer = request.headers.get("prefer", "")
+        for key, value in request.url.params.multi_items():
+            if key == "select":
+                query.select(value)
+            elif key == "order":
+                for part in value.split(","):
+                    column, _, direction = part.partition(".")
+                    query.order(column, desc=direction.startswith("desc"))
+            elif key == "limit":
+                query.limit(int(value))
+            elif key == "offset":
+                query.offset(int(value))
+            elif key == "on_conflict":
+                query.on_conflict = value
+            elif key == "or":
+                query.filters.append(parse_logic(value))
+            else:
+                query.filters.append(parse_filter(key, value))
+
+        returning = "representation" if "return=representation" in prefer else "minimal"
+        if request.method == "GET":
+            return httpx.Response(200, json=self.run(query))
+        if request.method == "POST":
+            if "resolution=merge-duplicates" in prefer or "resolution=ignore-duplicates" in prefer:
+                query.upsert(
+                    body,
+                    returning=returning,
+                    on_conflict=query.on_conflict,
+                    ignore_duplicates="ignore-duplicates" in prefer,
+                )
+            else:
+                query.insert(body, returning=returning)
+            return httpx.Response(201, json=self.run(query))
+        if request.method == "PATCH":
+            query.update(body or {}, returning=returning)
+        elif request.method == "DELETE":
+            query.delete(returning=returning)
+        else:
+            return httpx.Response(405)
+        return httpx.Response(200, json=self.run(query))
+
+
+def _as_list(payload: Any) -> List[Row]:
+    return list(payload) if isinstance(payload, list) else [payload]
+
+
+def _bump_counts(row: Row, label: Optional[str]) -> None:
+    if label is not None:
+        counts = row.setdefault("emotion_counts", {})
+        counts[label] = counts.get(label, 0) + 1
+
+
+def _record_trigger_observation(backend: FakePostgREST, params: Dict[str, Any]) -> None:
+    """Python port of the ``record_trigger_observation`` SQL function (migration 011)."""
+    user_id = params["p_user_id"]
+    trigger_ids = list(params.get("p_trigger_ids") or [])
+    _apply_trigger_observation(backend, user_id, params["p_month_start"], params.get("p_label"), trigger_ids)
+    rebuild = next(
+        (row for row in backend.rows("trigger_stat_rebuilds") if row["user_id"] == user_id and row["in_progress"]),
+        None,
+    )
+    if rebuild is not None and params.get("p_entry_id"):
+        backend.rows("trigger_stat_pending").append(
+            {
+                "user_id": user_id,
+                "generation": rebuild["generation"],
+                "entry_id": params["p_entry_id"],
+                "month_start": params["p_month_start"],
+                "label": params.get("p_label"),
+                "trigger_ids": trigger_ids,
+            }
+        )
+
+
+def _begin_trigger_stats_rebuild(backend: FakePostgREST, params: Dict[str, Any]) -> int:
+    """Python port of ``begin_trigger_stats_rebuild`` (migration 011)."""
+    user_id = params["p_user_id"]
+    pending = backend.rows("trigger_stat_pending")
+    pending[:] = [row for row in pending if row["user_id"] != user_id]
+    rebuilds = backend.rows("trigger_stat_rebuilds")
+    rebuild = next((row for row in rebuilds if row["user_id"] == user_id), None)
+    if rebuild is None:
+        rebuild = {"user_id": user_id, "generation": 0}
+        rebuilds.append(rebuild)
+    rebuild["generation"] += 1
+    rebuild["in_progress"] = True
+    return int(rebuild["generation"])
+
+
+def _replace_trigger_stats(backend: FakePostgREST, params: Dict[str, Any]) -> bool:
+    """Python port of ``replace_trigger_stats`` (migration 011)."""
+    user_id, generation = params["p_user_id"], params["p_generation"]
+    rebuild = next((row for row in backend.rows("trigger_stat_rebuilds") if row["user_id"] == user_id), None)
+    if rebuild is None or rebuild["generation"] != generation or not rebuild["in_progress"]:
+        return False
+    live_triggers = {row["id"] for row in backend.rows("triggers")}
+    for table, records in (("trigger_baselines", params["p_baselines"]), ("trigger_stats", params["p_stats"])):
+        rows = backend.rows(table)
+        rows[:] = [row for row in rows if row["user_id"] != user_id]
+        rows.extend(
+            {**_wire(record), "user_id": user_id}
+            for record in records
+            if table == "trigger_baselines" or record["trigger_id"] in live_triggers
+        )
+    counted = set(params.get("p_entry_ids") or [])
+    pending = backend.rows("trigger_stat_pending")
+    for row in pending:
+        if row["user_id"] == user_id and row["generation"] == generation and row["entry_id"] not in counted:
+            trigger_ids = [trigger_id for trigger_id in row["trigger_ids"] if trigger_id in live_triggers]
+            _apply_trigger_observation(backend, user_id, row["month_start"], row["label"], trigger_ids)
+    pending[:] = [row for row in pending if row["user_id"] != user_id]
+    rebuild["in_progress"] = False
+    return True
+
+
+def _apply_trigger_observation(
+    backend: FakePostgREST, user_id: str, month_start: str, label: Optional[str], trigger_ids: List[str]
+) -> None:
+    baselines = backend.rows("trigger_baselines")
+    baseline = next(
+        (row for row in baselines if row["user_id"] == user_id and row["month_start"] == month_start), None
+    )
+    if baseline is None:
+        baseline = {"user_id": user_id, "month_start": month_start, "entry_count": 0, "emotion_counts": {}}
+        baselines.append(baseline)
+    baseline["entry_count"] += 1
+    _bump_counts(baseline, label)
+
+    stats = backend.rows("trigger_stats")
+    for trigger_id in trigger_ids:
+        row = next(
+            (
+                row
+                for row in stats
+                if row["user_id"] == user_id and row["trigger_id"] == trigger_id and row["month_start"] == month_start
+            ),
+            None,
+        )
+        if row is None:
+            row = {
+                "user_id": user_id,
+                "trigger_id": trigger_id,
+                "month_start": month_start,
+                "match_count": 0,
+                "emotion_counts": {},
+            }
+            stats.append(row)
+        row["match_count"] += 1
+        _bump_counts(row, label)
+
+
+def _compute_daily_metrics(backend: FakePostgREST, params: Dict[str, Any]) -> List[Row]:
+    """Stands in for the SQL aggregation (migration 009) with the Python one it mirrors."""
+    from ..services.analytics import compute_daily_metrics
+
+    query = FakeQuery(backend, "entries").gte("created_at", params["p_start"]).lte("created_at", params["p_end"])
+    if params.get("p_user_id"):
+        query.eq("user_id", params["p_user_id"])
+    query.order("created_at")
+    rows = backend._select(query, backend.rows("entries"))
+    return sorted(compute_daily_metrics(rows), key=lambda row: (row["date"], row["user_id"]))
+
+
+@contextmanager
+def installed(fake: FakePostgREST) -> Iterator[FakePostgREST]:
+    """Route :mod:`backend.db.queries` and :mod:`backend.db.async_queries` to ``fake``."""
+    from ..db import async_queries, queries
+
+    client = fake.client()
+    previous_get_client = queries.get_client
+    previous_async_client = async_queries._client
+    queries.get_client = lambda: client  # type: ignore[assignment]
+    async_queries._client = fake.async_client()
+    try:
+        yield fake
+    finally:
+        queries.get_client = previous_get_client  # type: ignore[assignment]
+        async_queries._client = previous_async_client
@@ -0,0 +1,134 @@
+"""Response and log serialization cost, before and after the fast JSON layer.
+
+Times the encoding step only, with the payload already computed:
+
+* ``GET /entries`` with a 200-entry page. Before, FastAPI revalidated the
+  ``List[EntryOut]`` response model, dumped it to JSON-mode Python objects and
+  ran ``json.dumps``. Now pydantic-core writes the bytes directly.
+* ``GET /insights/summary?days=365``. Before, the ``-> dict`` annotation made
+  FastAPI validate and dump the payload, then ``json.dumps`` it. Now it goes
+  straight through ``serialization.dumps``.
+* One ``request.completed`` access-log line through ``StructuredFormatter``,
+  stdlib ``json`` versus orjson.
+
+    python -m backend.benchmarks.json_responses --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from ..core import serialization
+from ..core.logging import StructuredFormatter
+from ..core.serialization import json_response
+from ..routes.entries import ENTRY_LIST, EntryOut, _entry_from_db
+from ..services.insights import summarize_entries
+from .entry_payload import synthetic_rows
+from .synthetic import best_of
+
+
+def _legacy(field_type: Any) -> Callable[[Any], bytes]:
+    """FastAPI's response-model path followed by a stdlib ``JSONResponse``."""
+    field = create_response_field(name="response", type_=field_type)
+    loop = asyncio.new_event_loop()
+
+    def render(content: Any) -> bytes:
+        encoded = loop.run_until_complete(
+            serialize_response(field=field, response_content=content, is_coroutine=True)
+        )
+        return JSONResponse(encoded).body
+
+    return render
+
+
+def _entries_page(rows: List[Dict[str, Any]]) -> List[EntryOut]:
+    return [_entry_from_db(row) for row in rows[:200]]
+
+
+def _year_of_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    start = datetime.now(UTC) - timedelta(days=365)
+    return [
+        {**row, "created_at": (start + timedelta(hours=8 * index)).isoformat()}
+        for index, row in enumerate(rows)
+    ]
+
+
+def _log_record() -> logging.LogRecord:
+    record = logging.LogRecord("backend.request", logging.INFO, __file__, 0, "request.completed", None, None)
+    record.__dict__.update(
+        {
+            "method": "GET",
+            "path": "/entries",
+            "status_code": 200,
+            "duration_ms": 12.34,
+            "client": "203.0.113.7",
+            "request_id": "2f1c9d7e5b3a4c6d8e0f1a2b3c4d5e6f",
+        }
+    )
+    return record
+
+
+def _row(label: str, before: float, after: float, size: int) -> str:
+    return f"{label:<34}{before * 1e3:>10.3f}{after * 1e3:>10.3f}{before / after:>8.1f}x{size:>10,}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--log-lines", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(3 * 365, seed=7)
+    page = _entries_page(rows)
+    summary = summarize_entries(_year_of_rows(rows))
+
+    legacy_entries = _legacy(List[EntryOut])
+    legacy_summary = _legacy(dict)
+    cases: Dict[str, Dict[str, Callable[[], Any]]] = {
+        "GET /entries (200 entries)": {
+            "before": lambda: legacy_entries(page),
+            "after": lambda: json_response(page, adapter=ENTRY_LIST).body,
+        },
+        "GET /insights/summary (365 days)": {
+            "before": lambda: legacy_summary(summary),
+            "after": lambda: json_response(summary).body,
+        },
+    }
+    for case in cases.values():
+        assert json.loads(case["before"]()) == json.loads(case["after"]())
+
+    print(f"{'payload':<34}{'before ms':>10}{'after ms':>10}{'speedup':>9}{'bytes':>10}")
+    for label, case in cases.items():
+        before = best_of(args.repeat, case["before"])
+        after = best_of(args.repeat, case["after"])
+        print(_row(label, before, after, len(case["after"]())))
+
+    formatter = StructuredFormatter()
+    record = _log_record()
+
+    def log_lines() -> None:
+        for _ in range(args.log_lines):
+            formatter.format(record)
+
+    after = best_of(args.repeat, log_lines)
+    available = serialization.ORJSON_AVAILABLE
+    serialization.ORJSON_AVAILABLE = False
+    try:
+        before = best_of(args.repeat, log_lines)
+    finally:
+        serialization.ORJSON_AVAILABLE = available
+    line = formatter.format(record)
+    print(_row(f"log line x{args.log_lines:,}", before, after, len(line)))
+
+
+if __name__ == "__main__":
+    main()
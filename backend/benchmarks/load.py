@@ -0,0 +1,337 @@
+"""End-to-end load test of the API against an in-process fake PostgREST.
+
+Seeds :class:`~backend.benchmarks.fake_postgrest.FakePostgREST` with users,
+entries and triggers, stubs the emotion model and the LLM, then drives the
+ASGI app through ``httpx.ASGITransport`` with ``--concurrency`` workers and
+reports throughput and latency percentiles per route. Requests carry real
+signed JWTs, so authentication is part of the measured path; rate limits are
+switched off. Background tasks of ``POST /entries`` finish before the request
+does under ASGITransport, so they count toward its latency.
+
+    python -m backend.benchmarks.load --users 20 --entries 200 --concurrency 32 --requests 5000 --latency-ms 5
+
+Set ``RESPONSE_CACHE_TTL_SECONDS=0`` to measure without the response cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+# Settings are read when backend modules are imported, so the defaults go in
+# first. Used only where the environment leaves them unset.
+_BENCH_ENV = {
+    "ENVIRONMENT": "test",
+    "SUPABASE_URL": "https://fake-postgrest.test",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench-service-role-key",
+    "SUPABASE_JWT_SECRET": "bench-jwt-secret-with-at-least-32-bytes",
+    "ALLOWED_ORIGINS": "http://testserver",
+    "TRUSTED_HOSTS": "testserver,localhost",
+    "PRELOAD_MODELS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+for _key, _value in _BENCH_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+from .fake_postgrest import FakePostgREST, installed  # noqa: E402
+from .synthetic import LABELS, synthetic_word  # noqa: E402
+
+# Method and path per route name.
+ROUTES: Dict[str, Tuple[str, str]] = {
+    "entries.create": ("POST", "/entries"),
+    "insights.summary": ("GET", "/insights/summary?days=30"),
+    "triggers.list": ("GET", "/triggers"),
+    "analytics.daily": ("GET", "/analytics/daily"),
+    "analytics.weekly": ("GET", "/analytics/weekly"),
+    "analytics.monthly": ("GET", "/analytics/monthly"),
+    "analytics.rolling": ("GET", "/analytics/rolling"),
+}
+DEFAULT_MIX = (
+    "entries.create=2,insights.summary=2,triggers.list=2,analytics.daily=2,"
+    "analytics.weekly=1,analytics.monthly=1,analytics.rolling=1"
+)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in filter(None, (item.strip() for item in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route {name!r}; choose from {', '.join(ROUTES)}.")
+        mix[name] = float(weight or 1)
+    if not mix:
+        raise ValueError("The route mix is empty.")
+    return mix
+
+
+class _StubAnalyzer:
+    """Deterministic emotion scores derived from a hash of the text."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def analyze(self, text: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=len(LABELS)).digest()
+        total = sum(digest) or 1
+        scores: List[Dict[str, Any]] = sorted(
+            ({"label": label, "score": byte / total} for label, byte in zip(LABELS, digest)),
+            key=lambda item: float(item["score"]),
+            reverse=True,
+        )
+        return scores, scores[0]
+
+
+@contextmanager
+def stubbed_models(*, model_latency: float = 0.0, llm_latency: float = 0.0) -> Iterator[None]:
+    """Replace the emotion model and the LLM-backed replies for the block."""
+    from ..services import coping, emotion_analysis, llm
+
+    analyzer = _StubAnalyzer(model_latency)
+
+    def one_liner(*, top_emotion: str, entry_text: Optional[str] = None, tags: Any = None) -> str:
+        if llm_latency:
+            time.sleep(llm_latency)
+        return coping._fallback_response(top_emotion)
+
+    def weekly_summary(metrics_payload: Mapping[str, Any], *, model: Optional[str] = None):
+        if llm_latency:
+            time.sleep(llm_latency)
+        return {}, "Benchmark summary."
+
+    previous = (emotion_analysis.get_emotion_analyzer, coping.generate_one_liner, llm.generate_weekly_summary)
+    emotion_analysis.get_emotion_analyzer = lambda: analyzer  # type: ignore[assignment]
+    coping.generate_one_liner = one_liner  # type: ignore[assignment]
+    llm.generate_weekly_summary = weekly_summary  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        emotion_analysis.get_emotion_analyzer, coping.generate_one_liner, llm.generate_weekly_summary = previous
+
+
+def _sentence(rng: random.Random, vocabulary: List[str]) -> str:
+    return " ".join(rng.choices(vocabulary, k=rng.randint(8, 40)))
+
+
+def seed_backend(fake: FakePostgREST, *, users: int, entries: int, seed: int) -> List[str]:
+    """Fill ``fake`` with entries and triggers for ``users`` users, then recompute metrics."""
+    from ..services import analytics
+    from ..services.tokens import TOKENIZER_VERSION, tokenize
+
+    rng = random.Random(seed)
+    vocabulary = [synthetic_word(index) for index in range(500)]
+    now = datetime.now(UTC)
+    user_ids = [f"00000000-0000-0000-0000-{index:012d}" for index in range(users)]
+    for user_id in user_ids:
+        rows = []
+        for _ in range(entries):
+            created_at = now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+            text = _sentence(rng, vocabulary)
+            scores = [{"label": label, "score": round(rng.random(), 3)} for label in LABELS]
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "text": text,
+                    "source": "web",
+                    "tags": [rng.choice(["work", "family", "health"])],
+                    "emotion_json": scores,
+                    "created_at": created_at.isoformat(),
+                    "entry_length": len(text),
+                    "sentiment_score": round(rng.uniform(-1, 1), 3),
+                    "tokens": tokenize(text),
+                    "tokens_version": TOKENIZER_VERSION,
+                }
+            )
+        fake.seed("entries", rows)
+        fake.seed(
+            "triggers",
+            [
+                {"user_id": user_id, "name": f"trigger {index}", "words": rng.sample(vocabulary, 2)}
+                for index in range(5)
+            ],
+        )
+
+    latency, jitter = fake.latency, fake.jitter
+    fake.latency = fake.jitter = 0.0
+    try:
+        with installed(fake):
+            for user_id in user_ids:
+                analytics.recompute_daily_metrics(user_id, now - timedelta(days=400), now)
+    finally:
+        fake.latency, fake.jitter = latency, jitter
+    return user_ids
+
+
+def _bearer(user_id: str) -> str:
+    import jwt
+
+    from ..core.settings import get_settings
+
+    settings = get_settings()
+    now = int(time.time())
+    claims: Dict[str, Any] = {"sub": user_id, "iat": now, "exp": now + 3600, "role": "authenticated"}
+    if settings.supabase_jwt_audience:
+        claims["aud"] = settings.supabase_jwt_audience
+    return "Bearer " + jwt.encode(claims, settings.supabase_jwt_secret, algorithm="HS256")
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _drive(
+    app: Any,
+    plan: List[Tuple[str, str]],
+    *,
+    concurrency: int,
+    headers: Mapping[str, Dict[str, str]],
+    rng: random.Random,
+) -> List[Tuple[str, float, int]]:
+    vocabulary = [synthetic_word(index) for index in range(500)]
+    bodies = [{"text": _sentence(rng, vocabulary), "tags": ["work"]} for _ in range(64)]
+    results: List[Tuple[str, float, int]] = []
+    pending = iter(enumerate(plan))
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for index, (route, user_id) in pending:
+            method, path = ROUTES[route]
+            started = time.perf_counter()
+            response = await client.request(
+                method,
+                path,
+                headers=headers[user_id],
+                json=bodies[index % len(bodies)] if method == "POST" else None,
+            )
+            results.append((route, time.perf_counter() - started, response.status_code))
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="https://testserver", timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return results
+
+
+def summarize(results: List[Tuple[str, float, int]], wall_seconds: float) -> Dict[str, Any]:
+    by_route: Dict[str, List[Tuple[float, int]]] = {}
+    for route, seconds, status_code in results:
+        by_route.setdefault(route, []).append((seconds, status_code))
+    routes = {}
+    for route, samples in sorted(by_route.items()):
+        ordered = sorted(seconds for seconds, _ in samples)
+        routes[route] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, status_code in samples if status_code >= 400),
+            "rps": len(samples) / wall_seconds if wall_seconds else 0.0,
+            "p50_ms": _percentile(ordered, 0.50) * 1000,
+            "p90_ms": _percentile(ordered, 0.90) * 1000,
+            "p99_ms": _percentile(ordered, 0.99) * 1000,
+            "max_ms": ordered[-1] * 1000,
+        }
+    return {
+        "requests": len(results),
+        "errors": sum(route["errors"] for route in routes.values()),
+        "wall_seconds": wall_seconds,
+        "rps": len(results) / wall_seconds if wall_seconds else 0.0,
+        "routes": routes,
+    }
+
+
+def run(
+    *,
+    users: int = 10,
+    entries: int = 100,
+    concurrency: int = 16,
+    requests: int = 1_000,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    model_latency: float = 0.0,
+    llm_latency: float = 0.0,
+    mix: str = DEFAULT_MIX,
+    seed: int = 7,
+) -> Dict[str, Any]:
+    """Seed a fake backend, drive the app and return the :func:`summarize` report."""
+    from ..core.rate_limiting import limiter
+    from ..core.settings import get_settings
+    from ..main import app
+
+    weights = parse_mix(mix)
+    rng = random.Random(seed)
+    fake = FakePostgREST(latency=latency, jitter=jitter, seed=seed)
+    user_ids = seed_backend(fake, users=users, entries=entries, seed=seed)
+    settings = get_settings()
+    # Double-submit CSRF pair for the write route.
+    csrf = {settings.csrf_header_name: "bench-csrf", "Cookie": f"{settings.csrf_cookie_name}=bench-csrf"}
+    headers = {user_id: {"Authorization": _bearer(user_id), **csrf} for user_id in user_ids}
+    names = list(weights)
+    plan = [
+        (route, rng.choice(user_ids))
+        for route in rng.choices(names, weights=[weights[name] for name in names], k=requests)
+    ]
+
+    limiter_enabled = limiter.enabled
+    limiter.enabled = False
+    try:
+        with installed(fake), stubbed_models(model_latency=model_latency, llm_latency=llm_latency):
+            started = time.perf_counter()
+            results = asyncio.run(_drive(app, plan, concurrency=concurrency, headers=headers, rng=rng))
+            wall_seconds = time.perf_counter() - started
+    finally:
+        limiter.enabled = limiter_enabled
+    report = summarize(results, wall_seconds)
+    report["backend_requests"] = fake.requests
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--entries", type=int, default=200, help="entries seeded per user")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="fake PostgREST round trip")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--model-ms", type=float, default=0.0, help="stub emotion model time")
+    parser.add_argument("--llm-ms", type=float, default=0.0, help="stub LLM reply time")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight,... from: " + ", ".join(ROUTES))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    report = run(
+        users=args.users,
+        entries=args.entries,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        model_latency=args.model_ms / 1000,
+        llm_latency=args.llm_ms / 1000,
+        mix=args.mix,
+        seed=args.seed,
+    )
+
+    print(
+        f"requests={report['requests']} errors={report['errors']} wall={report['wall_seconds']:.2f}s "
+        f"rps={report['rps']:.1f} backend_requests={report['backend_requests']}"
+    )
+    print(f"{'route':20} {'n':>6} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for route, stats in report["routes"].items():
+        print(
+            f"{route:20} {stats['requests']:6} {stats['errors']:5} {stats['rps']:8.1f} {stats['p50_ms']:8.1f} "
+            f"{stats['p90_ms']:8.1f} {stats['p99_ms']:8.1f} {stats['max_ms']:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Per-request cost of the custom middleware stack.
+
+Calls a bare FastAPI app directly over ASGI, with no server or HTTP client in
+the way, and reports microseconds per request for three stacks: no custom
+middleware, the four pure-ASGI classes from ``backend.core.middleware``, and
+four pass-through ``BaseHTTPMiddleware`` layers. That last stack is what the
+old implementation paid per request before any of its own logic ran, so the
+gap to it is a lower bound on the saving.
+
+    python -m backend.benchmarks.middleware_overhead --requests 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict, List
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message
+
+from ..core.middleware import (
+    BodySizeLimitMiddleware,
+    CSRFMiddleware,
+    RequestContextMiddleware,
+    SecurityHeadersMiddleware,
+)
+
+CSRF_TOKEN = "bench-csrf-token"
+BODY = b'{"text": "' + b"x" * 512 + b'"}'
+
+
+class _PassThrough(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def _bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> Dict[str, bool]:
+        return {"ok": True}
+
+    @app.post("/echo")
+    async def echo(request: Request) -> Dict[str, int]:
+        return {"size": len(await request.body())}
+
+    return app
+
+
+def _pure_asgi(app: FastAPI) -> FastAPI:
+    app.add_middleware(RequestContextMiddleware)
+    app.add_middleware(CSRFMiddleware)
+    app.add_middleware(BodySizeLimitMiddleware, max_body_size=64 * 1024)
+    app.add_middleware(SecurityHeadersMiddleware, content_security_policy="default-src 'self'")
+    return app
+
+
+def _base_http(app: FastAPI) -> FastAPI:
+    for _ in range(4):
+        app.add_middleware(_PassThrough)
+    return app
+
+
+STACKS: Dict[str, Callable[[FastAPI], FastAPI]] = {
+    "none": lambda app: app,
+    "pure ASGI (current)": _pure_asgi,
+    "BaseHTTPMiddleware x4": _base_http,
+}
+
+
+def _scope(method: str, path: str, body: bytes) -> Dict:
+    headers = [
+        (b"host", b"testserver"),
+        (b"cookie", f"csrf_token={CSRF_TOKEN}".encode()),
+        (b"x-csrf-token", CSRF_TOKEN.encode()),
+    ]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "https",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 443),
+    }
+
+
+async def _call(app: ASGIApp, method: str, path: str, body: bytes) -> int:
+    pending: List[Message] = [{"type": "http.request", "body": body, "more_body": False}]
+    status: List[int] = []
+
+    async def receive() -> Message:
+        if pending:
+            return pending.pop()
+        # Block like a server does while the client stays connected.
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(_scope(method, path, body), receive, send)
+    return status[0]
+
+
+async def _measure(app: ASGIApp, method: str, path: str, body: bytes, requests: int, repeat: int) -> float:
+    # Warm the router and middleware stack before timing.
+    for _ in range(50):
+        assert await _call(app, method, path, body) == 200
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(requests):
+            await _call(app, method, path, body)
+        best = min(best, time.perf_counter() - started)
+    return best / requests * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    routes = [("GET", "/ping", b""), ("POST", "/echo", BODY)]
+    results = {}
+    for name, build in STACKS.items():
+        app = build(_bare_app())
+        results[name] = [
+            asyncio.run(_measure(app, method, path, body, args.requests, args.repeat))
+            for method, path, body in routes
+        ]
+
+    baseline = results["none"]
+    print(f"{'stack':<24}{'GET /ping':>14}{'POST /echo':>14}   (us/request, overhead vs none)")
+    for name, timings in results.items():
+        cells = "".join(
+            f"{timing:>8.1f} +{timing - base:>4.0f}" for timing, base in zip(timings, baseline)
+        )
+        print(f"{name:<24}{cells}")
+
+
+if __name__ == "__main__":
+    main()
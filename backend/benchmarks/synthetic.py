@@ -0,0 +1,31 @@
+"""Synthetic data and timing helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+LABELS = ["joy", "sadness", "anger", "fear", "surprise", "neutral"]
+
+
+def synthetic_word(index: int) -> str:
+    """Distinct alphabetic token for ``index``.
+
+    The tokenizer keeps letters only and drops short words, so every word is
+    six letters and survives ``tokenize()`` unchanged.
+    """
+    letters = []
+    for _ in range(5):
+        index, remainder = divmod(index, 26)
+        letters.append(chr(ord("a") + remainder))
+    return "w" + "".join(letters)
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Fastest of ``repeat`` wall-clock timings of ``func``, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
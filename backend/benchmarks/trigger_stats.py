@@ -0,0 +1,133 @@
+"""Benchmark ``compute_trigger_stats`` against a per-trigger linear scan.
+
+Needs the usual backend environment (``SUPABASE_URL`` etc.) because importing
+the services loads settings.
+
+    python -m backend.benchmarks.trigger_stats --entries 10000 --triggers 50
+
+Three paths are timed over the same normalized entries: the original linear
+scan (one pass over the entries per trigger), the compiled automaton walking
+every entry, and ``compute_trigger_stats``, whose first-token posting index
+answers whole-word triggers with posting-list unions and leaves the automaton
+only the entries that may contain a phrase. Typical timings (noisy box):
+
+    --vocabulary 3000   (89% of entries match)   linear ~190 ms, automaton ~135 ms, index ~42 ms
+    --vocabulary 30000  (22% of entries match)   linear ~165 ms, automaton ~76 ms,  index ~29 ms
+
+The index path is bounded by one set intersection per entry; everything after
+that scales with the matches rather than with entries times triggers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List
+
+from ..services.normalized import NormalizedEntry, batch_vocabulary, normalize_entries
+from ..services.tokens import tokenize
+from ..services.trigger_matcher import get_trigger_matcher
+from ..services.triggers import compute_trigger_stats
+from .synthetic import LABELS, best_of, synthetic_word
+
+
+def _synthetic_rows(count: int, vocabulary: List[str], seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    rows = []
+    for index in range(count):
+        words = rng.choices(vocabulary, k=rng.randint(20, 80))
+        rows.append(
+            {
+                "id": f"entry-{index}",
+                "user_id": "bench-user",
+                "text": " ".join(words),
+                "created_at": (start + timedelta(minutes=37 * index)).isoformat(),
+                "emotion_json": [{"label": rng.choice(LABELS), "score": 0.9}],
+            }
+        )
+    return rows
+
+
+def _synthetic_triggers(count: int, vocabulary: List[str], seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed + 1)
+    return [
+        {"id": f"t{index}", "name": f"trigger {index}", "words": rng.sample(vocabulary, 3)}
+        for index in range(count)
+    ]
+
+
+def _linear_scan(entries: List[NormalizedEntry], triggers: List[Dict[str, Any]]) -> List[int]:
+    """The previous algorithm: one full pass over the entries per trigger."""
+    overall = Counter(entry.top_label for entry in entries if entry.top_label)
+    counts = []
+    vocabulary = batch_vocabulary(entries)
+    for trigger in triggers:
+        words = {vocabulary.token_id(word) for word in trigger["words"]}
+        matched = [entry for entry in entries if not entry.token_set.isdisjoint(words)]
+        Counter(entry.top_label for entry in matched if entry.top_label)
+        counts.append(len(matched))
+    assert overall
+    return counts
+
+
+def _automaton_scan(entries: List[NormalizedEntry], triggers: List[Dict[str, Any]]) -> List[int]:
+    """Walk every entry through the compiled matcher, without the posting index."""
+    matcher = get_trigger_matcher("bench-user", triggers, batch_vocabulary(entries))
+    counts = [0] * len(triggers)
+    counters: List[Counter[str]] = [Counter() for _ in triggers]
+    for entry in entries:
+        for position in matcher.scan(entry.token_ids, entry.token_set):
+            counts[position] += 1
+            if entry.top_label:
+                counters[position][entry.top_label] += 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--triggers", type=int, default=50)
+    parser.add_argument("--vocabulary", type=int, default=3_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    vocabulary = [synthetic_word(index) for index in range(args.vocabulary)]
+    # A vocabulary the tokenizer drops (digits, stopwords, short words) leaves
+    # every entry empty and makes both paths trivially fast.
+    assert tokenize(" ".join(vocabulary)) == vocabulary
+    rows = _synthetic_rows(args.entries, vocabulary, args.seed)
+    triggers = _synthetic_triggers(args.triggers, vocabulary, args.seed)
+
+    normalize_seconds = best_of(1, lambda: normalize_entries(rows))
+    entries = normalize_entries(rows)
+    # Building the lazy token sets here also keeps that cost out of both timings.
+    trigger_tokens = batch_vocabulary(entries).encode(word for trigger in triggers for word in trigger["words"])
+    with_trigger = sum(not entry.token_set.isdisjoint(trigger_tokens) for entry in entries)
+    assert with_trigger, "no synthetic entry contains a trigger word"
+
+    # user_id reuses the cached compiled matcher, as GET /triggers does.
+    def compiled() -> List[Dict[str, Any]]:
+        return compute_trigger_stats(entries, triggers, user_id="bench-user")
+
+    expected = _linear_scan(entries, triggers)
+    assert [item["stats"]["count"] for item in compiled()] == expected
+    assert _automaton_scan(entries, triggers) == expected
+
+    scan_seconds = best_of(args.repeat, lambda: _linear_scan(entries, triggers))
+    automaton_seconds = best_of(args.repeat, lambda: _automaton_scan(entries, triggers))
+    index_seconds = best_of(args.repeat, compiled)
+
+    print(f"entries={args.entries} triggers={args.triggers} vocabulary={args.vocabulary}")
+    print(f"entries with a trigger word {with_trigger / len(entries):6.1%}")
+    print(f"normalize (one-off)  {normalize_seconds * 1000:9.1f} ms")
+    print(f"linear scan          {scan_seconds * 1000:9.1f} ms")
+    print(f"automaton per entry  {automaton_seconds * 1000:9.1f} ms  {scan_seconds / automaton_seconds:5.1f}x")
+    print(f"posting index        {index_seconds * 1000:9.1f} ms  {scan_seconds / index_seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+"""Versioned per-user response cache.
+
+Every user has a data-version counter that write paths bump. Computed responses
+are stored under ``(user, endpoint, params, version)``, so a bump makes every
+older response unreachable without having to enumerate or delete it.
+
+Responses live in a size-bounded in-process LRU. When ``RESPONSE_CACHE_PATH`` is
+set, versions and responses are also kept in a SQLite file so that every worker
+process on the host sees the same versions and can reuse each other's results.
+The async entry points run SQLite calls in the threadpool: a bump holds the
+file's write lock, and a read waiting on it must not stall the event loop.
+
+:class:`ReadThroughCache` fronts small, rarely written configuration rows
+(coping kits, digest preferences, profiles, triggers, calendar tokens) with
+per-table TTLs, negative caching and single-flight loads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Mapping, Optional, Tuple, TypeVar, cast
+
+from starlette.concurrency import run_in_threadpool
+
+from .settings import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with a per-entry time-to-live."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteStore:
+    """Host-local store shared by worker processes through one SQLite file."""
+
+    _PRUNE_EVERY = 200
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.execute(
+                "create table if not exists data_versions (user_id text primary key, version integer not null)"
+            )
+            self._conn.execute(
+                "create table if not exists cache_entries "
+                "(key text primary key, value text not null, expires_at real not null)"
+            )
+
+    def get_version(self, user_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "select version from data_versions where user_id = ?", (user_id,)
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def bump_version(self, user_id: str) -> int:
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                self._conn.execute(
+                    "insert into data_versions (user_id, version) values (?, 1) "
+                    "on conflict(user_id) do update set version = version + 1",
+                    (user_id,),
+                )
+                row = self._conn.execute(
+                    "select version from data_versions where user_id = ?", (user_id,)
+                ).fetchone()
+                self._conn.execute("commit")
+            except Exception:
+                self._conn.execute("rollback")
+                raise
+        return int(row[0])
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute(
+                "select value, expires_at from cache_entries where key = ?", (key,)
+            ).fetchone()
+        if not row or row[1] < time.time():
+            return _MISSING
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        payload = json.dumps(value, default=str)
+        with self._lock:
+            self._conn.execute(
+                "insert or replace into cache_entries (key, value, expires_at) values (?, ?, ?)",
+                (key, payload, time.time() + ttl_seconds),
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self._conn.execute("delete from cache_entries where expires_at < ?", (time.time(),))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("delete from cache_entries where key = ?", (key,))
+
+
+def _params_key(params: Mapping[str, Any]) -> str:
+    return json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+
+
+class ResponseCache:
+    """Per-user, version-keyed cache of computed API responses."""
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        ttl_seconds: float,
+        store: Optional[SQLiteStore] = None,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._local = LRUCache(maxsize, ttl_seconds)
+        self._versions: Dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id: str) -> int:
+        if self.store is not None:
+            try:
+                return self.store.get_version(user_id)
+            except sqlite3.Error:
+                logger.warning("cache.version_read_failed", exc_info=True)
+        with self._versions_lock:
+            return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: str) -> int:
+        with self._versions_lock:
+            version = self._versions.get(user_id, 0) + 1
+            self._versions[user_id] = version
+        if self.store is not None:
+            try:
+                version = self.store.bump_version(user_id)
+            except sqlite3.Error:
+                logger.warning("cache.version_bump_failed", exc_info=True)
+        return version
+
+    async def version_async(self, user_id: str) -> int:
+        """:meth:`version` for coroutines; a shared-store read runs in the threadpool."""
+        if self.store is None:
+            return self.version(user_id)
+        return await run_in_threadpool(self.version, user_id)
+
+    def key(self, user_id: str, endpoint: str, params: Mapping[str, Any], version: int) -> str:
+        return f"{user_id}|{endpoint}|{_params_key(params)}|v{version}"
+
+    def _lookup(self, key: str) -> Any:
+        value = self._local.get(key)
+        if value is _MISSING and self.store is not None:
+            try:
+                value = self.store.get(key)
+            except (sqlite3.Error, ValueError):
+                logger.warning("cache.shared_read_failed", exc_info=True)
+                value = _MISSING
+            if value is not _MISSING:
+                self._local.set(key, value)
+        if value is _MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _save(self, key: str, result: Any) -> None:
+        self._local.set(key, result)
+        if self.store is not None:
+            try:
+                self.store.set(key, result, self.ttl_seconds)
+            except (sqlite3.Error, TypeError, ValueError):
+                logger.warning("cache.shared_write_failed", exc_info=True)
+
+    def get_or_compute(
+        self,
+        user_id: str,
+        endpoint: str,
+        params: Mapping[str, Any],
+        compute: Callable[[], T],
+    ) -> T:
+        key = self.key(user_id, endpoint, params, self.version(user_id))
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return cast(T, value)
+        result = compute()
+        self._save(key, result)
+        return result
+
+    async def get_or_compute_async(
+        self,
+        user_id: str,
+        endpoint: str,
+        params: Mapping[str, Any],
+        compute: Callable[[], Awaitable[T]],
+    ) -> T:
+        """:meth:`get_or_compute` for handlers whose computation awaits I/O."""
+        if self.store is None:
+            key = self.key(user_id, endpoint, params, self.version(user_id))
+            value = self._lookup(key)
+        else:
+            key, value = await run_in_threadpool(self._versioned_lookup, user_id, endpoint, params)
+        if value is not _MISSING:
+            return cast(T, value)
+        result = await compute()
+        if self.store is None:
+            self._save(key, result)
+        else:
+            await run_in_threadpool(self._save, key, result)
+        return result
+
+    def _versioned_lookup(self, user_id: str, endpoint: str, params: Mapping[str, Any]) -> Tuple[str, Any]:
+        key = self.key(user_id, endpoint, params, self.version(user_id))
+        return key, self._lookup(key)
+
+    def clear(self) -> None:
+        self._local.clear()
+        with self._versions_lock:
+            self._versions.clear()
+
+
+class ReadThroughCache:
+    """Per-table TTL cache in front of single-row lookups.
+
+    Missing rows are cached as ``None`` for ``negative_ttl_seconds``. Concurrent
+    misses on one key share a single load. ``store`` is an optional shared
+    backend with :class:`SQLiteStore`'s ``get``/``set``/``delete``; tables in
+    ``local_only`` never leave the process. Other processes see an invalidation
+    once their own copy expires, so TTLs bound cross-worker staleness.
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        ttls: Mapping[str, float],
+        negative_ttl_seconds: float,
+        store: Optional[SQLiteStore] = None,
+        local_only: frozenset[str] = frozenset(),
+    ) -> None:
+        self.ttls = dict(ttls)
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.store = store
+        self.local_only = local_only
+        self._local = LRUCache(maxsize, max(self.ttls.values(), default=0))
+        self._loading: Dict[str, threading.Lock] = {}
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        # Bumped by invalidate() so a load that raced a write is not stored.
+        self._generations: Dict[str, int] = {}
+        self._loading_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, table: str, outcome: str) -> None:
+        with self._stats_lock:
+            counters = self._stats.setdefault(table, {"hits": 0, "negative_hits": 0, "misses": 0})
+            counters[outcome] += 1
+
+    def _key(self, table: str, key: Hashable) -> str:
+        return f"config|{table}|{key}"
+
+    def _shared(self, table: str) -> Optional[SQLiteStore]:
+        return None if table in self.local_only else self.store
+
+    def _read(self, table: str, cache_key: str) -> Any:
+        value = self._local.get(cache_key)
+        store = self._shared(table)
+        if value is _MISSING and store is not None:
+            try:
+                value = store.get(cache_key)
+            except (sqlite3.Error, ValueError):
+                logger.warning("cache.shared_read_failed", exc_info=True)
+                value = _MISSING
+            if value is not _MISSING:
+                self._local.set(cache_key, value, self._ttl(table, value))
+        return value
+
+    def _ttl(self, table: str, value: Any) -> float:
+        return self.negative_ttl_seconds if value is None else self.ttls[table]
+
+    def get_or_load(self, table: str, key: Hashable, load: Callable[[], T]) -> T:
+        if self.ttls.get(table, 0) <= 0:
+            return load()
+        cache_key = self._key(table, key)
+        value = self._read(table, cache_key)
+        if value is _MISSING:
+            with self._loading_lock:
+                lock = self._loading.setdefault(cache_key, threading.Lock())
+            with lock:
+                # Whoever held the lock before us may have filled the entry.
+                value = self._read(table, cache_key)
+                if value is _MISSING:
+                    self._count(table, "misses")
+                    with self._loading_lock:
+                        generation = self._generations.get(cache_key, 0)
+                    try:
+                        value = load()
+                        with self._loading_lock:
+                            current = self._generations.get(cache_key, 0) == generation
+                        if current:
+                            self._write(table, cache_key, value)
+                    finally:
+                        with self._loading_lock:
+                            self._loading.pop(cache_key, None)
+                    return value
+        self._count(table, "negative_hits" if value is None else "hits")
+        return cast(T, value)
+
+    async def get_or_load_async(self, table: str, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """:meth:`get_or_load` for async loaders; concurrent misses await one task."""
+        if self.ttls.get(table, 0) <= 0:
+            return await load()
+        cache_key = self._key(table, key)
+        value = self._local.get(cache_key)
+        if value is _MISSING and self._shared(table) is not None:
+            value = await run_in_threadpool(self._read, table, cache_key)
+        if value is not _MISSING:
+            self._count(table, "negative_hits" if value is None else "hits")
+            return cast(T, value)
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            self._count(table, "hits")
+            return cast(T, await asyncio.shield(pending))
+        self._count(table, "misses")
+        generation = self._generations.get(cache_key, 0)
+        task = asyncio.ensure_future(load())
+        self._inflight[cache_key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(cache_key, None)
+        if self._generations.get(cache_key, 0) == generation:
+            if self._shared(table) is None:
+                self._write(table, cache_key, value)
+            else:
+                await run_in_threadpool(self._write, table, cache_key, value)
+        return cast(T, value)
+
+    def _write(self, table: str, cache_key: str, value: Any) -> None:
+        ttl = self._ttl(table, value)
+        self._local.set(cache_key, value, ttl)
+        store = self._shared(table)
+        if store is not None:
+            try:
+                store.set(cache_key, value, ttl)
+            except (sqlite3.Error, TypeError, ValueError):
+                logger.warning("cache.shared_write_failed", exc_info=True)
+
+    def invalidate(self, table: str, key: Hashable) -> None:
+        cache_key = self._key(table, key)
+        with self._loading_lock:
+            self._generations[cache_key] = self._generations.get(cache_key, 0) + 1
+        self._local.pop(cache_key)
+        store = self._shared(table)
+        if store is not None:
+            try:
+                store.delete(cache_key)
+            except sqlite3.Error:
+                logger.warning("cache.shared_delete_failed", exc_info=True)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._stats_lock:
+            snapshot: Dict[str, Dict[str, Any]] = {table: dict(counters) for table, counters in self._stats.items()}
+        for counters in snapshot.values():
+            lookups = counters["hits"] + counters["negative_hits"] + counters["misses"]
+            counters["hit_rate"] = round((lookups - counters["misses"]) / lookups, 4) if lookups else 0.0
+        return snapshot
+
+    def clear(self) -> None:
+        self._local.clear()
+        with self._stats_lock:
+            self._stats.clear()
+
+
+# Seconds a row is served from cache. Calendar tokens stay short-lived and in
+# process: they are credentials and refreshes rewrite them.
+CONFIG_CACHE_TTLS: Dict[str, float] = {
+    "coping_kits": 300,
+    "digest_prefs": 600,
+    "user_profiles": 600,
+    "triggers": 120,
+    "calendar_tokens": 60,
+}
+CONFIG_CACHE_LOCAL_ONLY = frozenset({"calendar_tokens"})
+
+
+@lru_cache(maxsize=1)
+def _shared_store() -> Optional[SQLiteStore]:
+    path = get_settings().response_cache_path
+    return SQLiteStore(path) if path else None
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    return ResponseCache(
+        maxsize=settings.response_cache_size,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+        store=_shared_store(),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_config_cache() -> ReadThroughCache:
+    settings = get_settings()
+    return ReadThroughCache(
+        maxsize=settings.config_cache_size,
+        ttls=CONFIG_CACHE_TTLS if settings.config_cache_size else {},
+        negative_ttl_seconds=settings.config_cache_negative_ttl_seconds,
+        store=_shared_store(),
+        local_only=CONFIG_CACHE_LOCAL_ONLY,
+    )
+
+
+def bump_user_version(user_id: Optional[str]) -> None:
+    """Invalidate every cached response for ``user_id``."""
+    if user_id:
+        get_response_cache().bump(user_id)
+
+
+def cached_response(
+    user_id: str,
+    endpoint: str,
+    params: Mapping[str, Any],
+    compute: Callable[[], T],
+) -> T:
+    """Return the cached response for this user/endpoint/params, computing on miss."""
+    return get_response_cache().get_or_compute(user_id, endpoint, params, compute)
+
+
+async def cached_response_async(
+    user_id: str,
+    endpoint: str,
+    params: Mapping[str, Any],
+    compute: Callable[[], Awaitable[T]],
+) -> T:
+    """Async counterpart of :func:`cached_response`."""
+    return await get_response_cache().get_or_compute_async(user_id, endpoint, params, compute)
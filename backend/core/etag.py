@@ -0,0 +1,102 @@
+"""Conditional GET support built on the per-user data version.
+
+Read endpoints await :func:`conditional_get` before touching Supabase. The ETag is
+derived from the user's data version plus the resolved request parameters, so an
+unchanged dashboard poll is answered with ``304 Not Modified`` without running a
+query, aggregating, or serializing a body.
+
+The validators are weak. Versions are bumped by writes in this process (or in
+any worker sharing ``RESPONSE_CACHE_PATH``); a write made elsewhere, such as
+the weekly DAG or another host, is only reflected once the validator rotates at
+the next ``RESPONSE_CACHE_TTL_SECONDS`` boundary. A 304 can therefore confirm a
+copy that is at most one TTL stale, the same bound the response cache accepts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Dict, Mapping, Optional
+
+from fastapi import Request, Response
+
+from .cache import get_response_cache
+
+
+class NotModified(Exception):
+    """Raised by :func:`conditional_get` when the client's copy is current."""
+
+    def __init__(self, headers: Dict[str, str]) -> None:
+        super().__init__("Not Modified")
+        self.headers = headers
+
+
+def cache_control(max_age: int) -> str:
+    """Per-user responses are private; ``max_age=0`` forces revalidation every time."""
+    if max_age <= 0:
+        return "private, no-cache"
+    return f"private, max-age={max_age}, must-revalidate"
+
+
+# In-process version counters restart from zero, so the same number can stand
+# for different data in another worker or after a restart. Without a shared
+# store the validators are scoped to this process.
+_PROCESS_NONCE = uuid.uuid4().hex
+
+
+async def version_etag(user_id: str, endpoint: str, params: Mapping[str, Any]) -> str:
+    """Weak ETag for ``endpoint`` at the user's current data version."""
+    cache = get_response_cache()
+    # A shared-store read can wait on another worker's bump; keep it off the loop.
+    version = await cache.version_async(user_id)
+    epoch = int(time.time() // cache.ttl_seconds) if cache.ttl_seconds > 0 else 0
+    scope = "shared" if cache.store is not None else _PROCESS_NONCE
+    material = json.dumps(
+        [user_id, endpoint, params, version, epoch, scope],
+        sort_keys=True,
+        default=str,
+        separators=(",", ":"),
+    )
+    return 'W/"' + hashlib.sha256(material.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """``If-None-Match`` uses the weak comparison function (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    candidates = [item.strip() for item in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.removeprefix("W/") == opaque for candidate in candidates)
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    *,
+    user_id: str,
+    endpoint: str,
+    params: Mapping[str, Any],
+    max_age: int = 0,
+) -> str:
+    """Attach validators to ``response`` or raise :class:`NotModified`."""
+    etag = await version_etag(user_id, endpoint, params)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(max_age),
+        # The session can come from the bearer header or the echo_session cookie.
+        "Vary": "Authorization, Cookie",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(headers)
+    response.headers.update(headers)
+    return etag
+
+
+async def not_modified_handler(request: Request, exc: Exception) -> Response:
+    if not isinstance(exc, NotModified):
+        raise exc
+    return Response(status_code=304, headers=exc.headers)
@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import logging.config
 from typing import Any, Dict
 
 from .context import get_request_id
+from .serialization import dumps
 from .settings import Settings
 
 
@@ -23,8 +23,14 @@ class RequestIdFilter(logging.Filter):
         return True
 
 
+# Attributes every LogRecord carries; anything else arrived through ``extra=``.
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "request_id", "color_message"}
+
+
 class StructuredFormatter(logging.Formatter):
-    """Emit logs as structured JSON strings."""
+    """Emit logs as structured JSON strings, including any ``extra`` fields."""
 
     def format(self, record: logging.LogRecord) -> str:  # pragma: no cover - trivial
         log_entry: Dict[str, Any] = {
@@ -34,11 +40,14 @@ class StructuredFormatter(logging.Formatter):
             "message": record.getMessage(),
             "request_id": getattr(record, "request_id", "-"),
         }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                log_entry.setdefault(key, value)
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
         if record.stack_info:
             log_entry["stack"] = self.formatStack(record.stack_info)
-        return json.dumps(log_entry, ensure_ascii=False)
+        return dumps(log_entry, default=str).decode("utf-8")
 
 
 def configure_logging(settings: Settings) -> None:
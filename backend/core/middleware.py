@@ -1,95 +1,168 @@
-"""Custom ASGI middleware for the Echo backend."""
+"""Custom ASGI middleware for the Echo backend.
+
+Every class here is plain ASGI rather than ``BaseHTTPMiddleware``: they read
+the request from ``scope``, reject by sending a response directly, and edit
+response headers on the ``http.response.start`` message. Nothing is buffered,
+so streamed responses stay streamed and no extra task runs per request.
+"""
 
 from __future__ import annotations
 
 import logging
-import time
-from typing import Callable, Optional
 import secrets
+import time
+from typing import Optional
 
-from fastapi import Request, status
-from fastapi.responses import JSONResponse, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from ..db.loader import query_scope
 from .context import get_request_id, new_request_id, reset_request_id, set_request_id
 
 
-class RequestContextMiddleware(BaseHTTPMiddleware):
+class RequestContextMiddleware:
     """Attach request identifiers and emit structured access logs."""
 
     def __init__(self, app: ASGIApp, header_name: str = "X-Request-ID") -> None:
-        super().__init__(app)
+        self.app = app
         self.header_name = header_name
         self.logger = logging.getLogger("backend.request")
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        request_id = request.headers.get(self.header_name) or new_request_id()
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        request_id = connection.headers.get(self.header_name) or new_request_id()
         token = set_request_id(request_id)
         start = time.perf_counter()
+        status_code = 500
+        completed = False
+        log_extra = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "client": connection.client.host if connection.client else "-",
+        }
+
+        def log_completed() -> None:
+            nonlocal completed
+            completed = True
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.logger.info(
+                "request.completed",
+                extra={**log_extra, "status_code": status_code, "duration_ms": round(duration_ms, 2)},
+            )
+
+        async def send_with_context(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers[self.header_name] = request_id
+                headers["X-Response-Time"] = f"{(time.perf_counter() - start) * 1000:.2f}ms"
+            await send(message)
+            # Logged once the last body chunk is sent, so background tasks
+            # that run afterwards do not count towards the request's duration.
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                log_completed()
+
         try:
-            response = await call_next(request)
+            with query_scope():
+                await self.app(scope, receive, send_with_context)
         except Exception:
             duration_ms = (time.perf_counter() - start) * 1000
             self.logger.exception(
                 "request.failed",
-                extra={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "duration_ms": round(duration_ms, 2),
-                    "client": request.client.host if request.client else "-",
-                },
+                extra={**log_extra, "duration_ms": round(duration_ms, 2)},
             )
             raise
         else:
-            duration_ms = (time.perf_counter() - start) * 1000
-            self.logger.info(
-                "request.completed",
-                extra={
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status_code": response.status_code,
-                    "duration_ms": round(duration_ms, 2),
-                    "client": request.client.host if request.client else "-",
-                },
-            )
+            if not completed:
+                log_completed()
         finally:
             reset_request_id(token)
 
-        response.headers[self.header_name] = request_id
-        response.headers["X-Response-Time"] = f"{duration_ms:.2f}ms"
-        return response
 
+class BodySizeLimitMiddleware:
+    """Reject requests that exceed the configured body size limit.
 
-class BodySizeLimitMiddleware(BaseHTTPMiddleware):
-    """Reject requests that exceed the configured body size limit."""
+    ``Content-Length`` is checked up front, and the streamed ``http.request``
+    chunks are counted as they are received so chunked uploads, or a header
+    that understates the body, cannot slip past the limit.
+    """
 
     def __init__(self, app: ASGIApp, max_body_size: int) -> None:
-        super().__init__(app)
+        self.app = app
         self.max_body_size = max_body_size
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        content_length = request.headers.get("content-length")
+    def _too_large(self) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={
+                "detail": "Request body too large.",
+                "limit_bytes": self.max_body_size,
+            },
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = HTTPConnection(scope).headers.get("content-length")
         if content_length:
             try:
-                if int(content_length) > self.max_body_size:
-                    return JSONResponse(
-                        status_code=413,
-                        content={
-                            "detail": "Request body too large.",
-                            "limit_bytes": self.max_body_size,
-                        },
-                    )
+                declared = int(content_length)
             except ValueError:
-                return JSONResponse(
-                    status_code=400,
+                response = JSONResponse(
+                    status_code=status.HTTP_400_BAD_REQUEST,
                     content={"detail": "Invalid Content-Length header."},
                 )
+                await response(scope, receive, send)
+                return
+            if declared > self.max_body_size:
+                await self._too_large()(scope, receive, send)
+                return
+
+        received = 0
+        response_started = False
+        limit_error: Optional[HTTPException] = None
 
-        return await call_next(request)
+        async def receive_limited() -> Message:
+            nonlocal received, limit_error
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Raised inside the body read so FastAPI's exception
+                    # handlers answer it when the route is the reader.
+                    limit_error = HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Request body too large.",
+                    )
+                    raise limit_error
+            return message
+
+        async def send_tracking(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_limited, send_tracking)
+        except HTTPException as exc:
+            if exc is not limit_error or response_started:
+                raise
+            await self._too_large()(scope, receive, send)
 
 
-class CSRFMiddleware(BaseHTTPMiddleware):
+class CSRFMiddleware:
     """Validate double-submit CSRF tokens for state-changing requests."""
 
     def __init__(
@@ -99,35 +172,35 @@ class CSRFMiddleware(BaseHTTPMiddleware):
         cookie_name: str = "csrf_token",
         header_name: str = "X-CSRF-Token",
     ) -> None:
-        super().__init__(app)
+        self.app = app
         self.cookie_name = cookie_name
         self.header_name = header_name
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        if request.method.upper() in {"POST", "PUT", "PATCH", "DELETE"}:
-            cookie_token = request.cookies.get(self.cookie_name)
-            header_token = request.headers.get(self.header_name)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"].upper() in {"POST", "PUT", "PATCH", "DELETE"}:
+            connection = HTTPConnection(scope)
+            cookie_token = connection.cookies.get(self.cookie_name)
+            header_token = connection.headers.get(self.header_name)
+            detail = None
             if not cookie_token or not header_token:
-                return JSONResponse(
+                detail = "CSRF token missing."
+            elif not secrets.compare_digest(cookie_token, header_token):
+                detail = "CSRF token mismatch."
+            if detail is not None:
+                response = JSONResponse(
                     status_code=status.HTTP_403_FORBIDDEN,
                     content={
-                        "detail": "CSRF token missing.",
-                        "request_id": get_request_id() or "-",
-                    },
-                )
-            if not secrets.compare_digest(cookie_token, header_token):
-                return JSONResponse(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    content={
-                        "detail": "CSRF token mismatch.",
+                        "detail": detail,
                         "request_id": get_request_id() or "-",
                     },
                 )
+                await response(scope, receive, send)
+                return
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Apply secure HTTP response headers."""
 
     def __init__(
@@ -143,7 +216,7 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         hsts_include_subdomains: bool = True,
         hsts_preload: bool = True,
     ) -> None:
-        super().__init__(app)
+        self.app = app
         self.content_security_policy = content_security_policy
         self.referrer_policy = referrer_policy
         self.permissions_policy = permissions_policy
@@ -153,32 +226,41 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         self.hsts_include_subdomains = hsts_include_subdomains
         self.hsts_preload = hsts_preload
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Response]) -> Response:
-        response = await call_next(request)
-
-        if self.content_security_policy and not response.headers.get("content-security-policy"):
-            response.headers["Content-Security-Policy"] = self.content_security_policy
-
-        if self.referrer_policy and not response.headers.get("referrer-policy"):
-            response.headers["Referrer-Policy"] = self.referrer_policy
+        defaults = []
+        if content_security_policy:
+            defaults.append(("Content-Security-Policy", content_security_policy))
+        if referrer_policy:
+            defaults.append(("Referrer-Policy", referrer_policy))
+        if permissions_policy:
+            defaults.append(("Permissions-Policy", permissions_policy))
+        if frame_deny:
+            defaults.append(("X-Frame-Options", "DENY"))
+        if content_type_nosniff:
+            defaults.append(("X-Content-Type-Options", "nosniff"))
+        self._defaults = defaults
 
-        if self.permissions_policy and not response.headers.get("permissions-policy"):
-            response.headers["Permissions-Policy"] = self.permissions_policy
+        directives = [f"max-age={hsts_max_age}"]
+        if hsts_include_subdomains:
+            directives.append("includeSubDomains")
+        if hsts_preload:
+            directives.append("preload")
+        self._hsts = "; ".join(directives)
 
-        if self.frame_deny and not response.headers.get("x-frame-options"):
-            response.headers["X-Frame-Options"] = "DENY"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        if self.content_type_nosniff and not response.headers.get("x-content-type-options"):
-            response.headers["X-Content-Type-Options"] = "nosniff"
+        https = scope.get("scheme") == "https"
 
-        if request.url.scheme == "https":
-            directives = [f"max-age={self.hsts_max_age}"]
-            if self.hsts_include_subdomains:
-                directives.append("includeSubDomains")
-            if self.hsts_preload:
-                directives.append("preload")
-            existing = response.headers.get("strict-transport-security")
-            if not existing:
-                response.headers["Strict-Transport-Security"] = "; ".join(directives)
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self._defaults:
+                    if name not in headers:
+                        headers[name] = value
+                if https and "strict-transport-security" not in headers:
+                    headers["Strict-Transport-Security"] = self._hsts
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,101 @@
+"""Fast JSON encoding for API responses and structured logs.
+
+``dumps`` uses orjson when it is installed and falls back to the standard
+library otherwise. :class:`FastJSONResponse` is the application's default
+response class. Routes whose payload is already JSON-ready, such as the rows
+returned by ``queries.*`` or models the route built itself, return
+:func:`json_response` so that FastAPI's ``jsonable_encoder`` and response-model
+pass do not walk the payload a second time.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from typing import Any, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+    ORJSON_AVAILABLE = False
+else:
+    ORJSON_AVAILABLE = True
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _finite(value: Any) -> Any:
+    """``value`` with NaN and infinities replaced by ``None``, as orjson writes them."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(content: Any, default: Callable[[Any], Any]) -> bytes:
+    return json.dumps(
+        _finite(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=lambda value: _finite(default(value)),
+    ).encode("utf-8")
+
+
+def dumps(content: Any, *, default: Callable[[Any], Any] = jsonable_encoder) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON.
+
+    Types neither encoder knows natively go through ``default``, which is
+    ``jsonable_encoder`` so responses encode exactly as FastAPI would have.
+    Values orjson rejects (integers wider than 64 bits) use the stdlib path.
+    Both paths write NaN and infinities as ``null``; JSON has no spelling for
+    them, and raising would turn one bad average into a 500.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(content, default=default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+    return _stdlib_dumps(content, default)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered through :func:`dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(
+    content: Any,
+    response: Optional[Response] = None,
+    *,
+    adapter: Optional[TypeAdapter] = None,
+    status_code: int = 200,
+) -> Response:
+    """Serialize a pre-validated payload straight to a response.
+
+    ``response`` is the route's injected ``Response``; headers set on it (ETag,
+    Cache-Control, cursors) are carried over because FastAPI only merges them
+    into responses it builds itself. Pass ``adapter`` for pydantic models so
+    pydantic-core writes the JSON bytes directly.
+    """
+    body = adapter.dump_json(content) if adapter is not None else dumps(content)
+    result = Response(body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        if response.status_code:
+            result.status_code = response.status_code
+        result.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name != b"content-length"
+        )
+    return result
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import os
 from functools import lru_cache
-from typing import List
+from typing import Any, Dict, List, Literal
 
 from pydantic import BaseModel, Field, HttpUrl, ValidationError
 
@@ -34,6 +34,7 @@ class Settings(BaseModel):
             "Content-Type",
             "X-Request-ID",
             "Accept",
+            "If-None-Match",
         ]
     )
     rate_limit_default: str = Field(default="120/minute")
@@ -60,6 +61,22 @@ class Settings(BaseModel):
     sentry_dsn: str | None = None
     csrf_cookie_name: str = Field(default="csrf_token")
     csrf_header_name: str = Field(default="X-CSRF-Token")
+    recompute_workers: int = Field(default=2, ge=1, le=16)
+    response_cache_size: int = Field(default=1024, ge=0, le=100_000)
+    response_cache_ttl_seconds: int = Field(default=300, ge=0, le=86_400)
+    response_cache_path: str | None = None
+    config_cache_size: int = Field(default=4096, ge=0, le=100_000)
+    config_cache_negative_ttl_seconds: int = Field(default=60, ge=0, le=3600)
+    batch_data_backend: Literal["supabase", "postgres"] = Field(default="supabase")
+    database_url: str | None = None
+    database_pool_size: int = Field(default=4, ge=1, le=64)
+    supabase_timeout_seconds: float = Field(default=10.0, gt=0, le=120)
+    supabase_max_retries: int = Field(default=2, ge=0, le=10)
+    supabase_max_connections: int = Field(default=100, ge=1, le=1000)
+    slow_query_threshold_ms: int = Field(default=500, ge=0, le=600_000)
+    auth_token_cache_size: int = Field(default=4096, ge=0, le=100_000)
+    auth_token_cache_skew_seconds: int = Field(default=30, ge=0, le=3600)
+    metrics_token: str | None = None
 
     @classmethod
     def from_env(cls) -> "Settings":
@@ -129,7 +146,7 @@ class Settings(BaseModel):
         cors_allow_methods = _split_csv(os.getenv("CORS_ALLOW_METHODS", "")) or None
         cors_allow_headers = _split_csv(os.getenv("CORS_ALLOW_HEADERS", "")) or None
 
-        data = {
+        data: Dict[str, Any] = {
             "environment": environment,
             "allowed_origins": allowed_origins,
             "trusted_hosts": trusted_hosts,
@@ -158,6 +175,34 @@ class Settings(BaseModel):
             data["permissions_policy"] = permissions_policy
         data["csrf_cookie_name"] = os.getenv("CSRF_COOKIE_NAME", "csrf_token").strip() or "csrf_token"
         data["csrf_header_name"] = os.getenv("CSRF_HEADER_NAME", "X-CSRF-Token").strip() or "X-CSRF-Token"
+        data["recompute_workers"] = int(os.getenv("RECOMPUTE_WORKERS", "2").strip() or "2")
+        data["response_cache_size"] = int(os.getenv("RESPONSE_CACHE_SIZE", "1024").strip() or "1024")
+        data["response_cache_ttl_seconds"] = int(
+            os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300").strip() or "300"
+        )
+        data["response_cache_path"] = os.getenv("RESPONSE_CACHE_PATH", "").strip() or None
+        data["config_cache_size"] = int(os.getenv("CONFIG_CACHE_SIZE", "4096").strip() or "4096")
+        data["config_cache_negative_ttl_seconds"] = int(
+            os.getenv("CONFIG_CACHE_NEGATIVE_TTL_SECONDS", "60").strip() or "60"
+        )
+        data["batch_data_backend"] = os.getenv("BATCH_DATA_BACKEND", "supabase").strip().lower() or "supabase"
+        data["database_url"] = os.getenv("DATABASE_URL", "").strip() or None
+        data["database_pool_size"] = int(os.getenv("DATABASE_POOL_SIZE", "4").strip() or "4")
+        data["supabase_timeout_seconds"] = float(
+            os.getenv("SUPABASE_TIMEOUT_SECONDS", "10").strip() or "10"
+        )
+        data["supabase_max_retries"] = int(os.getenv("SUPABASE_MAX_RETRIES", "2").strip() or "2")
+        data["supabase_max_connections"] = int(
+            os.getenv("SUPABASE_MAX_CONNECTIONS", "100").strip() or "100"
+        )
+        data["slow_query_threshold_ms"] = int(
+            os.getenv("SLOW_QUERY_THRESHOLD_MS", "500").strip() or "500"
+        )
+        data["auth_token_cache_size"] = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096").strip() or "4096")
+        data["auth_token_cache_skew_seconds"] = int(
+            os.getenv("AUTH_TOKEN_CACHE_SKEW_SECONDS", "30").strip() or "30"
+        )
+        data["metrics_token"] = os.getenv("METRICS_TOKEN", "").strip() or None
 
         try:
             return cls.model_validate(data)
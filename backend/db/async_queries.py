@@ -0,0 +1,345 @@
+"""
+Async PostgREST access for the read-heavy API routes.
+
+The sync Supabase client holds a threadpool thread for the whole round trip.
+This module talks to ``{SUPABASE_URL}/rest/v1`` with one pooled
+``httpx.AsyncClient`` (HTTP/2 when ``h2`` is installed), so a worker can keep
+hundreds of requests in flight. Each call has its own timeout. Idempotent calls
+are retried on transport errors, 429 and 5xx with full-jitter exponential
+backoff. Return shapes match :mod:`backend.db.queries`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+from datetime import date, datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+
+try:  # pragma: no cover - optional dependency
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+from ..core.cache import get_config_cache
+from ..core.settings import get_settings
+from .instrument import instrumented, on_response_async
+from .queries import DatabaseError, EntryProjection, entry_columns, keyset_before
+from .supabase import SupabaseConfigError
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_BASE_DELAY_SECONDS = 0.1
+RETRY_MAX_DELAY_SECONDS = 2.0
+
+Params = List[Tuple[str, str]]
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    url = os.getenv("SUPABASE_URL")
+    service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    if not url or not service_role_key:
+        raise SupabaseConfigError(
+            "Supabase configuration missing. Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY."
+        )
+    settings = get_settings()
+    return httpx.AsyncClient(
+        base_url=url.rstrip("/") + "/rest/v1",
+        headers={
+            "apikey": service_role_key,
+            "Authorization": f"Bearer {service_role_key}",
+            "Accept": "application/json",
+        },
+        http2=HTTP2_AVAILABLE,
+        event_hooks={"response": [on_response_async]},
+        timeout=httpx.Timeout(settings.supabase_timeout_seconds),
+        limits=httpx.Limits(
+            max_connections=settings.supabase_max_connections,
+            max_keepalive_connections=settings.supabase_max_connections,
+        ),
+    )
+
+
+async def get_async_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use.
+
+    Construction does not await, so two coroutines cannot both build one.
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+async def close_async_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform over [0, base * 2**attempt], capped."""
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2**attempt))
+
+
+async def _request(
+    method: str,
+    table: str,
+    *,
+    params: Optional[Params] = None,
+    json: Any = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: Optional[float] = None,
+    idempotent: bool = True,
+) -> Any:
+    client = await get_async_client()
+    settings = get_settings()
+    max_retries = settings.supabase_max_retries if idempotent else 0
+    attempt = 0
+    while True:
+        try:
+            response = await client.request(
+                method,
+                f"/{table}",
+                # httpx's list form is invariant in the value type; its tuple form is not.
+                params=tuple(params) if params is not None else None,
+                json=json,
+                headers=headers,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+        except httpx.TransportError as exc:
+            if attempt >= max_retries:
+                raise DatabaseError(f"Supabase request to {table} failed: {exc.__class__.__name__}") from exc
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_retries:
+                if response.is_error:
+                    raise DatabaseError(
+                        f"Supabase request to {table} failed with status {response.status_code}."
+                    )
+                return response.json() if response.content else None
+        delay = _backoff(attempt)
+        attempt += 1
+        logger.warning(
+            "db.async_retry",
+            extra={"table": table, "method": method, "attempt": attempt, "delay_seconds": round(delay, 3)},
+        )
+        await asyncio.sleep(delay)
+
+
+async def _select(table: str, params: Params) -> List[Dict[str, Any]]:
+    data = await _request("GET", table, params=params)
+    if not isinstance(data, list):
+        raise DatabaseError("Unexpected Supabase response payload.")
+    return data
+
+
+def _eq(value: Any) -> str:
+    return f"eq.{value}"
+
+
+@instrumented("entries")
+async def get_entries(
+    user_id: str,
+    *,
+    projection: EntryProjection,
+    limit: int = 100,
+    offset: int = 0,
+    before: Optional[Tuple[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """See :func:`backend.db.queries.get_entries`."""
+    params: Params = [("select", entry_columns(projection)), ("user_id", _eq(user_id))]
+    if before is not None:
+        params += [("created_at", f"lte.{before[0]}"), ("or", f"({keyset_before(*before)})")]
+        offset = 0
+    params += [
+        ("order", "created_at.desc,id.desc"),
+        ("limit", str(limit)),
+        ("offset", str(offset)),
+    ]
+    return await _select("entries", params)
+
+
+@instrumented("entries")
+async def get_entry(
+    user_id: str, entry_id: str, *, projection: EntryProjection
+) -> Optional[Dict[str, Any]]:
+    rows = await _select(
+        "entries",
+        [("select", entry_columns(projection)), ("user_id", _eq(user_id)), ("id", _eq(entry_id)), ("limit", "1")],
+    )
+    return rows[0] if rows else None
+
+
+@instrumented("entries")
+async def fetch_entries_since(
+    user_id: str, since: datetime, *, projection: EntryProjection
+) -> List[Dict[str, Any]]:
+    return await _select(
+        "entries",
+        [
+            ("select", entry_columns(projection)),
+            ("user_id", _eq(user_id)),
+            ("created_at", f"gte.{since.isoformat()}"),
+            ("order", "created_at.desc"),
+        ],
+    )
+
+
+async def _metrics(table: str, column: str, user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    return await _select(
+        table,
+        [
+            ("select", "*"),
+            ("user_id", _eq(user_id)),
+            (column, f"gte.{start.isoformat()}"),
+            (column, f"lte.{end.isoformat()}"),
+            ("order", column),
+        ],
+    )
+
+
+@instrumented("daily_metrics")
+async def get_daily_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    return await _metrics("daily_metrics", "date", user_id, start, end)
+
+
+@instrumented("weekly_metrics")
+async def get_weekly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    return await _metrics("weekly_metrics", "week_start", user_id, start, end)
+
+
+@instrumented("monthly_metrics")
+async def get_monthly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    return await _metrics("monthly_metrics", "month_start", user_id, start, end)
+
+
+@instrumented("yearly_metrics")
+async def get_yearly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    return await _metrics("yearly_metrics", "year_start", user_id, start, end)
+
+
+@instrumented("sentiment_anomalies")
+async def list_anomalies(
+    user_id: str,
+    *,
+    since: datetime,
+    until: Optional[datetime] = None,
+    kind: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    params: Params = [
+        ("select", "*"),
+        ("user_id", _eq(user_id)),
+        ("observed_at", f"gte.{since.isoformat()}"),
+    ]
+    if until is not None:
+        params.append(("observed_at", f"lte.{until.isoformat()}"))
+    if kind is not None:
+        params.append(("kind", _eq(kind)))
+    params.append(("order", "observed_at.desc"))
+    return await _select("sentiment_anomalies", params)
+
+
+@instrumented("triggers")
+async def list_triggers(user_id: str) -> List[Dict[str, Any]]:
+    async def fetch() -> List[Dict[str, Any]]:
+        return await _select(
+            "triggers",
+            [("select", "*"), ("user_id", _eq(user_id)), ("order", "created_at.desc")],
+        )
+
+    return await get_config_cache().get_or_load_async("triggers", user_id, fetch)
+
+
+@instrumented("trigger_baselines")
+async def get_trigger_baselines(user_id: str, since: date) -> List[Dict[str, Any]]:
+    return await _select(
+        "trigger_baselines",
+        [
+            ("select", "month_start,entry_count,emotion_counts"),
+            ("user_id", _eq(user_id)),
+            ("month_start", f"gte.{since.isoformat()}"),
+        ],
+    )
+
+
+@instrumented("trigger_stats")
+async def get_trigger_stats(user_id: str, since: date) -> List[Dict[str, Any]]:
+    return await _select(
+        "trigger_stats",
+        [
+            ("select", "trigger_id,month_start,match_count,emotion_counts"),
+            ("user_id", _eq(user_id)),
+            ("month_start", f"gte.{since.isoformat()}"),
+        ],
+    )
+
+
+@instrumented("weekly_summary")
+async def get_latest_weekly_summary(user_id: str) -> Optional[Dict[str, Any]]:
+    rows = await _select(
+        "weekly_summary",
+        [("select", "*"), ("user_id", _eq(user_id)), ("order", "week_start.desc"), ("limit", "1")],
+    )
+    return rows[0] if rows else None
+
+
+@instrumented("weekly_summary")
+async def get_previous_weekly_summary(user_id: str, before: date) -> Optional[Dict[str, Any]]:
+    rows = await _select(
+        "weekly_summary",
+        [
+            ("select", "*"),
+            ("user_id", _eq(user_id)),
+            ("week_start", f"lt.{before.isoformat()}"),
+            ("order", "week_start.desc"),
+            ("limit", "1"),
+        ],
+    )
+    return rows[0] if rows else None
+
+
+@instrumented("summaries")
+async def upsert_summary(*, user_id: str, week_start: date, summary_text: str) -> Dict[str, Any]:
+    # An upsert on the unique key is idempotent, so it is safe to retry.
+    data = await _request(
+        "POST",
+        "summaries",
+        params=[("on_conflict", "user_id,week_start")],
+        json={"user_id": user_id, "week_start": week_start.isoformat(), "summary_text": summary_text},
+        headers={"Prefer": "resolution=merge-duplicates,return=representation"},
+    )
+    rows: Sequence[Dict[str, Any]] = data if isinstance(data, list) else []
+    if not rows:
+        raise DatabaseError("Failed to upsert weekly summary.")
+    return rows[0]
+
+
+__all__ = [
+    "close_async_client",
+    "fetch_entries_since",
+    "get_async_client",
+    "get_daily_metrics",
+    "get_entries",
+    "get_entry",
+    "get_latest_weekly_summary",
+    "get_monthly_metrics",
+    "get_previous_weekly_summary",
+    "get_trigger_baselines",
+    "get_trigger_stats",
+    "get_weekly_metrics",
+    "get_yearly_metrics",
+    "list_anomalies",
+    "list_triggers",
+    "upsert_summary",
+]
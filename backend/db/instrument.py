@@ -0,0 +1,251 @@
+"""Per-query instrumentation for the database layer.
+
+Every public function in :mod:`backend.db.queries` and
+:mod:`backend.db.async_queries` is wrapped with :func:`instrumented`, which
+records wall time, rows returned, approximate response bytes and the error
+class, labelled by function name and table. The PostgREST HTTP clients report
+each response to the innermost active call through an httpx event hook, so
+bytes and the filter chain (the request query string) need no extra parsing.
+
+Figures go to fixed-bucket histograms served by ``GET /metrics``, to a
+``db.query`` debug log, and to a ``db.slow_query`` warning with the filter
+chain once a call exceeds ``SLOW_QUERY_THRESHOLD_MS``. A call costs a few
+microseconds, so instrumentation stays on in production.
+"""
+
+from __future__ import annotations
+
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from urllib.parse import unquote
+
+import httpx
+
+from ..core.settings import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+LATENCY_BUCKETS_SECONDS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS: Tuple[float, ...] = (0, 1, 10, 100, 1_000, 10_000, 100_000)
+BYTE_BUCKETS: Tuple[float, ...] = (1_024, 10_240, 102_400, 1_048_576, 10_485_760, 104_857_600)
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram, Prometheus style."""
+
+    __slots__ = ("bounds", "counts", "count", "total")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets: Dict[str, int] = {}
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            buckets[f"{bound:g}"] = running
+        buckets["+Inf"] = self.count
+        return {"count": self.count, "sum": self.total, "buckets": buckets}
+
+
+class QueryStats:
+    """Histograms and error counts for one (function, table) label pair."""
+
+    __slots__ = ("errors", "latency", "rows", "response_bytes")
+
+    def __init__(self) -> None:
+        self.errors: Dict[str, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.rows = Histogram(ROW_BUCKETS)
+        self.response_bytes = Histogram(BYTE_BUCKETS)
+
+
+class QueryMetrics:
+    """Process-wide registry of :class:`QueryStats`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], QueryStats] = {}
+
+    def record(
+        self, function: str, table: str, seconds: float, rows: int, size: int, error: Optional[str]
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get((function, table))
+            if stats is None:
+                stats = self._stats[(function, table)] = QueryStats()
+            stats.latency.observe(seconds)
+            stats.rows.observe(rows)
+            stats.response_bytes.observe(size)
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One entry per label pair, the largest total wall time first."""
+        with self._lock:
+            items = [
+                {
+                    "function": function,
+                    "table": table,
+                    "errors": dict(stats.errors),
+                    "latency_seconds": stats.latency.snapshot(),
+                    "rows": stats.rows.snapshot(),
+                    "response_bytes": stats.response_bytes.snapshot(),
+                }
+                for (function, table), stats in self._stats.items()
+            ]
+        return sorted(items, key=lambda item: item["latency_seconds"]["sum"], reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+@lru_cache(maxsize=1)
+def get_query_metrics() -> QueryMetrics:
+    return QueryMetrics()
+
+
+class _Call:
+    __slots__ = ("function", "table", "started", "responses", "parent")
+
+    def __init__(self, function: str, table: str, parent: Optional["_Call"]) -> None:
+        self.function = function
+        self.table = table
+        self.started = time.perf_counter()
+        self.responses: List[httpx.Response] = []
+        self.parent = parent
+
+
+_active_call: ContextVar[Optional[_Call]] = ContextVar("db_active_call", default=None)
+
+
+def on_response(response: httpx.Response) -> None:
+    """httpx response hook: attribute the response to every active call."""
+    call = _active_call.get()
+    while call is not None:
+        call.responses.append(response)
+        call = call.parent
+
+
+async def on_response_async(response: httpx.Response) -> None:
+    on_response(response)
+
+
+def _response_size(response: httpx.Response) -> int:
+    try:
+        return len(response.content)
+    except httpx.ResponseNotRead:
+        return int(response.headers.get("content-length") or 0)
+
+
+def _filter_chain(response: httpx.Response) -> str:
+    url = response.request.url
+    query = unquote(url.query.decode("ascii", "replace"))
+    return f"{response.request.method} {url.path}" + (f"?{query}" if query else "")
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    rows = getattr(result, "rows", None)
+    if isinstance(rows, int):
+        return rows
+    return 1
+
+
+def _finish(call: _Call, result: Any, error: Optional[BaseException]) -> None:
+    seconds = time.perf_counter() - call.started
+    rows = _row_count(result) if error is None else 0
+    size = sum(_response_size(response) for response in call.responses)
+    error_class = type(error).__name__ if error is not None else None
+    get_query_metrics().record(call.function, call.table, seconds, rows, size, error_class)
+
+    threshold_ms = get_settings().slow_query_threshold_ms
+    slow = threshold_ms > 0 and seconds * 1000 >= threshold_ms
+    if not slow and not logger.isEnabledFor(logging.DEBUG):
+        return
+    fields: Dict[str, Any] = {
+        "function": call.function,
+        "table": call.table,
+        "duration_ms": round(seconds * 1000, 2),
+        "rows": rows,
+        "response_bytes": size,
+        "requests": len(call.responses),
+        "error": error_class,
+    }
+    if slow:
+        fields["filters"] = [_filter_chain(response) for response in call.responses]
+        logger.warning("db.slow_query", extra=fields)
+    else:
+        logger.debug("db.query", extra=fields)
+
+
+def instrumented(table: str) -> Callable[[F], F]:
+    """Record every call of the decorated query function under ``table``."""
+
+    def decorate(func: F) -> F:
+        # ``queries.get_entries`` and ``async_queries.get_entries`` stay apart.
+        name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                call = _Call(name, table, _active_call.get())
+                token = _active_call.set(call)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as exc:
+                    _finish(call, None, exc)
+                    raise
+                finally:
+                    _active_call.reset(token)
+                _finish(call, result, None)
+                return result
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            call = _Call(name, table, _active_call.get())
+            token = _active_call.set(call)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exc:
+                _finish(call, None, exc)
+                raise
+            finally:
+                _active_call.reset(token)
+            _finish(call, result, None)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def install_hooks(session: httpx.Client) -> None:
+    """Report ``session``'s responses to the active instrumented call."""
+    hooks = session.event_hooks["response"]
+    if on_response not in hooks:
+        hooks.append(on_response)
@@ -0,0 +1,162 @@
+"""Request- and job-scoped read coalescing.
+
+Inside a :func:`query_scope`, identical reads run once and per-user point
+lookups can be batched into one ``in.(...)`` query. The memo is bound to a
+context variable, so every handler, service and threadpool call made for the
+same request or job shares it, and it is dropped when the scope exits. Outside
+a scope every call goes straight to the database.
+
+Writes through :mod:`backend.db.queries` replace or forget the keys they
+change, so a read after a write in the same scope sees the new row.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar, cast
+
+T = TypeVar("T")
+K = TypeVar("K", bound=Hashable)
+
+_MISSING = object()
+
+
+class QueryScope:
+    """Memo of the reads made in one request or job."""
+
+    __slots__ = ("_memo", "_lock", "closed", "hits", "misses")
+
+    def __init__(self) -> None:
+        self._memo: Dict[Tuple[str, Hashable], Any] = {}
+        self._lock = threading.Lock()
+        self.closed = False
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, table: str, key: Hashable) -> Any:
+        with self._lock:
+            value = self._memo.get((table, key), _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def prime(self, table: str, key: Hashable, value: Any) -> None:
+        if not self.closed:
+            with self._lock:
+                self._memo[(table, key)] = value
+
+    def forget(self, table: str, key: Hashable) -> None:
+        with self._lock:
+            self._memo.pop((table, key), None)
+
+    def forget_table(self, table: str) -> None:
+        with self._lock:
+            for memo_key in [memo_key for memo_key in self._memo if memo_key[0] == table]:
+                del self._memo[memo_key]
+
+    def load(self, table: str, key: Hashable, fetch: Callable[[], T]) -> T:
+        if self.closed:
+            return fetch()
+        value = self._get(table, key)
+        if value is not _MISSING:
+            return cast(T, value)
+        fetched = fetch()
+        self.prime(table, key, fetched)
+        return fetched
+
+    def load_many(
+        self,
+        table: str,
+        keys: Sequence[K],
+        fetch_many: Callable[[Sequence[K]], Mapping[K, T]],
+        *,
+        default: Optional[Callable[[], T]] = None,
+    ) -> Dict[K, T]:
+        """Values for ``keys``, fetching every key not yet memoized in one call.
+
+        Keys that ``fetch_many`` leaves out get ``default()`` (``None`` if unset),
+        so a missing row is memoized as well.
+        """
+        found: Dict[K, T] = {}
+        missing: List[K] = []
+        for key in dict.fromkeys(keys):
+            value = _MISSING if self.closed else self._get(table, key)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = cast(T, value)
+        if missing:
+            fetched = fetch_many(missing)
+            for key in missing:
+                loaded = fetched[key] if key in fetched else (default() if default else None)
+                found[key] = cast(T, loaded)
+                self.prime(table, key, loaded)
+        return found
+
+    def close(self) -> None:
+        self.closed = True
+        with self._lock:
+            self._memo.clear()
+
+
+_scope_var: ContextVar[Optional[QueryScope]] = ContextVar("query_scope", default=None)
+
+
+def current_scope() -> Optional[QueryScope]:
+    return _scope_var.get()
+
+
+@contextmanager
+def query_scope() -> Iterator[QueryScope]:
+    """Open a scope, or join the one already active in this context."""
+    active = _scope_var.get()
+    if active is not None and not active.closed:
+        yield active
+        return
+    scope = QueryScope()
+    token = _scope_var.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope_var.reset(token)
+        scope.close()
+
+
+def load(table: str, key: Hashable, fetch: Callable[[], T]) -> T:
+    scope = _scope_var.get()
+    return fetch() if scope is None else scope.load(table, key, fetch)
+
+
+def load_many(
+    table: str,
+    keys: Sequence[K],
+    fetch_many: Callable[[Sequence[K]], Mapping[K, T]],
+    *,
+    default: Optional[Callable[[], T]] = None,
+) -> Dict[K, T]:
+    scope = _scope_var.get()
+    if scope is None:
+        scope = QueryScope()  # still batches, just remembers nothing afterwards
+    return scope.load_many(table, keys, fetch_many, default=default)
+
+
+def prime(table: str, key: Hashable, value: Any) -> None:
+    scope = _scope_var.get()
+    if scope is not None:
+        scope.prime(table, key, value)
+
+
+def forget(table: str, key: Hashable) -> None:
+    scope = _scope_var.get()
+    if scope is not None:
+        scope.forget(table, key)
+
+
+def forget_table(table: str) -> None:
+    scope = _scope_var.get()
+    if scope is not None:
+        scope.forget_table(table)
@@ -0,0 +1,95 @@
+-- Hierarchical rollups: daily_metrics -> monthly_metrics -> yearly_metrics.
+-- Monthly rows are rebuilt from daily rows, yearly rows from monthly rows, so a
+-- year-long chart reads a dozen rows instead of every entry.
+
+create table if not exists monthly_metrics (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid,
+    month_start date not null,
+    month_end date not null,
+    avg_sentiment double precision,
+    top_emotion text,
+    emotion_counts jsonb default '{}'::jsonb,
+    message_count integer default 0,
+    active_days integer default 0,
+    avg_entry_length double precision,
+    -- Moments of the per-day average sentiment, kept so yearly volatility can be
+    -- pooled exactly from monthly rows.
+    sentiment_days integer default 0,
+    daily_sentiment_mean double precision,
+    volatility double precision,
+    time_buckets jsonb default '{}'::jsonb,
+    created_at timestamptz default now(),
+    updated_at timestamptz default now(),
+    unique (user_id, month_start)
+);
+
+create table if not exists yearly_metrics (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid,
+    year_start date not null,
+    year_end date not null,
+    avg_sentiment double precision,
+    top_emotion text,
+    emotion_counts jsonb default '{}'::jsonb,
+    message_count integer default 0,
+    active_days integer default 0,
+    avg_entry_length double precision,
+    sentiment_days integer default 0,
+    daily_sentiment_mean double precision,
+    volatility double precision,
+    time_buckets jsonb default '{}'::jsonb,
+    created_at timestamptz default now(),
+    updated_at timestamptz default now(),
+    unique (user_id, year_start)
+);
+
+create index if not exists idx_monthly_metrics_user_month on public.monthly_metrics (user_id, month_start);
+create index if not exists idx_yearly_metrics_user_year on public.yearly_metrics (user_id, year_start);
+
+alter table if exists public.monthly_metrics enable row level security;
+alter table if exists public.monthly_metrics force row level security;
+alter table if exists public.yearly_metrics enable row level security;
+alter table if exists public.yearly_metrics force row level security;
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_policies
+        where schemaname = 'public' and tablename = 'monthly_metrics' and polname = 'monthly_metrics_owner'
+    ) then
+        execute $policy$
+            create policy "monthly_metrics_owner"
+                on public.monthly_metrics
+                for all
+                using (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                )
+                with check (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                );
+        $policy$;
+    end if;
+
+    if not exists (
+        select 1 from pg_policies
+        where schemaname = 'public' and tablename = 'yearly_metrics' and polname = 'yearly_metrics_owner'
+    ) then
+        execute $policy$
+            create policy "yearly_metrics_owner"
+                on public.yearly_metrics
+                for all
+                using (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                )
+                with check (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                );
+        $policy$;
+    end if;
+end
+$$;
@@ -0,0 +1,76 @@
+-- Online sentiment anomaly detection: compact per-user EWMA state plus the
+-- anomalies it flagged, so reports can read spikes instead of rescanning data.
+
+create table if not exists anomaly_detector_state (
+    user_id uuid not null,
+    kind text not null check (kind in ('entry', 'day')),
+    mean double precision not null default 0,
+    variance double precision not null default 0,
+    count integer not null default 0,
+    last_observed timestamptz,
+    updated_at timestamptz default now(),
+    primary key (user_id, kind)
+);
+
+create table if not exists sentiment_anomalies (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null,
+    kind text not null check (kind in ('entry', 'day')),
+    observed_at timestamptz not null,
+    value double precision not null,
+    zscore double precision not null,
+    baseline_mean double precision,
+    entry_id uuid,
+    created_at timestamptz default now(),
+    unique (user_id, kind, observed_at)
+);
+
+create index if not exists idx_sentiment_anomalies_user_observed
+    on public.sentiment_anomalies (user_id, observed_at desc);
+
+alter table if exists public.anomaly_detector_state enable row level security;
+alter table if exists public.anomaly_detector_state force row level security;
+alter table if exists public.sentiment_anomalies enable row level security;
+alter table if exists public.sentiment_anomalies force row level security;
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_policies
+        where schemaname = 'public' and tablename = 'anomaly_detector_state' and polname = 'anomaly_detector_state_owner'
+    ) then
+        execute $policy$
+            create policy "anomaly_detector_state_owner"
+                on public.anomaly_detector_state
+                for all
+                using (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                )
+                with check (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                );
+        $policy$;
+    end if;
+
+    if not exists (
+        select 1 from pg_policies
+        where schemaname = 'public' and tablename = 'sentiment_anomalies' and polname = 'sentiment_anomalies_owner'
+    ) then
+        execute $policy$
+            create policy "sentiment_anomalies_owner"
+                on public.sentiment_anomalies
+                for all
+                using (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                )
+                with check (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                );
+        $policy$;
+    end if;
+end
+$$;
@@ -0,0 +1,10 @@
+-- Tokenize entries once at write time. `tokens` keeps the full filtered token
+-- sequence (not a set) so keyword frequency counts stay exact; `tokens_version`
+-- records which tokenizer produced it so a tokenizer change can be backfilled.
+alter table entries
+    add column if not exists tokens text[],
+    add column if not exists tokens_version smallint;
+
+create index if not exists idx_entries_tokens_pending
+    on public.entries (id)
+    where tokens_version is null;
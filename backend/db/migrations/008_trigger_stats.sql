@@ -0,0 +1,115 @@
+-- Incrementally maintained trigger statistics, bucketed by calendar month so the
+-- API can sum the months inside its look-back window. `trigger_baselines` holds
+-- the per-month entry and top-emotion counts every trigger is compared against.
+
+create table if not exists trigger_baselines (
+    user_id uuid not null,
+    month_start date not null,
+    entry_count integer not null default 0,
+    emotion_counts jsonb not null default '{}'::jsonb,
+    updated_at timestamptz default now(),
+    primary key (user_id, month_start)
+);
+
+create table if not exists trigger_stats (
+    user_id uuid not null,
+    trigger_id uuid not null references public.triggers (id) on delete cascade,
+    month_start date not null,
+    match_count integer not null default 0,
+    emotion_counts jsonb not null default '{}'::jsonb,
+    updated_at timestamptz default now(),
+    primary key (user_id, trigger_id, month_start)
+);
+
+create index if not exists idx_trigger_stats_user_month on public.trigger_stats (user_id, month_start);
+
+alter table if exists public.trigger_baselines enable row level security;
+alter table if exists public.trigger_baselines force row level security;
+alter table if exists public.trigger_stats enable row level security;
+alter table if exists public.trigger_stats force row level security;
+
+do $$
+begin
+    if not exists (
+        select 1 from pg_policies
+        where schemaname = 'public' and tablename = 'trigger_baselines' and polname = 'trigger_baselines_owner'
+    ) then
+        execute $policy$
+            create policy "trigger_baselines_owner"
+                on public.trigger_baselines
+                for all
+                using (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                )
+                with check (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                );
+        $policy$;
+    end if;
+
+    if not exists (
+        select 1 from pg_policies
+        where schemaname = 'public' and tablename = 'trigger_stats' and polname = 'trigger_stats_owner'
+    ) then
+        execute $policy$
+            create policy "trigger_stats_owner"
+                on public.trigger_stats
+                for all
+                using (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                )
+                with check (
+                    auth.uid() = user_id
+                    or coalesce(auth.jwt() ->> 'role', '') = 'admin'
+                );
+        $policy$;
+    end if;
+end
+$$;
+
+-- Adds one entry to the month's baseline and to every matched trigger in a
+-- single round trip. Increments happen in SQL so concurrent writers never lose
+-- updates the way a read-modify-write from the API would.
+create or replace function public.record_trigger_observation(
+    p_user_id uuid,
+    p_month_start date,
+    p_label text,
+    p_trigger_ids uuid[]
+) returns void
+language plpgsql
+as $$
+declare
+    label_delta jsonb := case
+        when p_label is null then '{}'::jsonb
+        else jsonb_build_object(p_label, 1)
+    end;
+begin
+    insert into public.trigger_baselines as b (user_id, month_start, entry_count, emotion_counts)
+    values (p_user_id, p_month_start, 1, label_delta)
+    on conflict (user_id, month_start) do update
+        set entry_count = b.entry_count + 1,
+            emotion_counts = case
+                when p_label is null then b.emotion_counts
+                else b.emotion_counts || jsonb_build_object(
+                    p_label, coalesce((b.emotion_counts ->> p_label)::integer, 0) + 1
+                )
+            end,
+            updated_at = now();
+
+    insert into public.trigger_stats as s (user_id, trigger_id, month_start, match_count, emotion_counts)
+    select p_user_id, trigger_id, p_month_start, 1, label_delta
+    from unnest(coalesce(p_trigger_ids, '{}'::uuid[])) as trigger_id
+    on conflict (user_id, trigger_id, month_start) do update
+        set match_count = s.match_count + 1,
+            emotion_counts = case
+                when p_label is null then s.emotion_counts
+                else s.emotion_counts || jsonb_build_object(
+                    p_label, coalesce((s.emotion_counts ->> p_label)::integer, 0) + 1
+                )
+            end,
+            updated_at = now();
+end
+$$;
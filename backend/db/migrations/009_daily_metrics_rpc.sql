@@ -0,0 +1,149 @@
+-- Server-side daily metric aggregation. `compute_daily_metrics` returns the
+-- same rows as `backend.services.analytics.compute_daily_metrics`, so the
+-- recompute path receives one row per user and day instead of every entry.
+-- The helpers mirror `normalized._top_emotion` and
+-- `metrics.sentiment_from_emotions`; keep them in step with the Python code
+-- (backend/tests/test_daily_metrics_rpc.py checks parity).
+
+create or replace function public.entry_top_emotion(p_emotions jsonb)
+returns text
+language sql
+immutable
+as $$
+    select coalesce(nullif(lower(e.value ->> 'label'), ''), 'neutral')
+    from jsonb_array_elements(
+        case when jsonb_typeof(p_emotions) = 'array' then p_emotions else '[]'::jsonb end
+    ) with ordinality as e(value, position)
+    where jsonb_typeof(e.value) = 'object'
+    order by
+        case when jsonb_typeof(e.value -> 'score') = 'number' then (e.value ->> 'score')::double precision else 0 end desc,
+        e.position
+    limit 1
+$$;
+
+create or replace function public.entry_sentiment(p_emotions jsonb)
+returns double precision
+language sql
+immutable
+as $$
+    select case
+        when coalesce(sum(scored.score), 0) <= 0 then 0
+        else greatest(-1, least(1, sum(scored.weight * scored.score) / sum(scored.score)))
+    end
+    from (
+        select
+            coalesce(w.weight, 0) as weight,
+            case when jsonb_typeof(e.value -> 'score') = 'number' then (e.value ->> 'score')::double precision else 0 end as score
+        from jsonb_array_elements(
+            case when jsonb_typeof(p_emotions) = 'array' then p_emotions else '[]'::jsonb end
+        ) as e(value)
+        left join (
+            values
+                ('joy', 0.9), ('love', 0.85), ('calm', 0.6), ('proud', 0.7), ('grateful', 0.75),
+                ('surprise', 0.2), ('hopeful', 0.55), ('neutral', 0.0), ('content', 0.45),
+                ('sadness', -0.6), ('anger', -0.7), ('fear', -0.65), ('anxiety', -0.7),
+                ('frustrated', -0.55), ('disgust', -0.5), ('tired', -0.4), ('overwhelmed', -0.6),
+                ('stress', -0.6)
+        ) as w(label, weight) on w.label = lower(e.value ->> 'label')
+    ) as scored
+$$;
+
+-- `entries` is left unqualified so a session's temp table can stand in for it
+-- in the parity test. Runs as the caller, so row level security still applies.
+create or replace function public.compute_daily_metrics(
+    p_start timestamptz,
+    p_end timestamptz,
+    p_user_id uuid default null
+) returns table (
+    user_id uuid,
+    date date,
+    avg_sentiment double precision,
+    top_emotion text,
+    emotion_counts jsonb,
+    message_count integer,
+    avg_entry_length double precision,
+    time_buckets jsonb
+)
+language sql
+stable
+as $$
+    with scored as (
+        select
+            e.user_id as owner,
+            (e.created_at at time zone 'utc')::date as day,
+            row_number() over (order by e.created_at, e.id) as position,
+            coalesce(public.entry_top_emotion(e.emotion_json), 'neutral') as label,
+            coalesce(
+                e.sentiment_score::double precision,
+                case
+                    when jsonb_typeof(e.emotion_json) = 'array' and jsonb_array_length(e.emotion_json) > 0
+                    then public.entry_sentiment(e.emotion_json)
+                end
+            ) as sentiment,
+            coalesce(
+                e.entry_length,
+                char_length(regexp_replace(coalesce(e.text, ''), '^\s+|\s+$', '', 'g'))
+            )::double precision as length,
+            coalesce(
+                nullif(e.time_of_day, ''),
+                case
+                    when extract(hour from e.created_at at time zone 'utc') < 5 then 'Night'
+                    when extract(hour from e.created_at at time zone 'utc') < 12 then 'Morning'
+                    when extract(hour from e.created_at at time zone 'utc') < 17 then 'Afternoon'
+                    when extract(hour from e.created_at at time zone 'utc') < 21 then 'Evening'
+                    else 'Night'
+                end
+            ) as bucket
+        from entries as e
+        where e.created_at >= p_start
+          and e.created_at <= p_end
+          and e.user_id is not null
+          and (p_user_id is null or e.user_id = p_user_id)
+    ),
+    labels as (
+        select s.owner, s.day, s.label, count(*) as hits, min(s.position) as first_seen
+        from scored as s
+        group by s.owner, s.day, s.label
+    ),
+    buckets as (
+        select s.owner, s.day, s.bucket, count(*) as hits, avg(s.sentiment) as avg_sentiment
+        from scored as s
+        group by s.owner, s.day, s.bucket
+    ),
+    days as (
+        select
+            s.owner,
+            s.day,
+            count(*)::integer as message_count,
+            avg(s.sentiment) as avg_sentiment,
+            avg(s.length) as avg_entry_length
+        from scored as s
+        group by s.owner, s.day
+    )
+    select
+        d.owner,
+        d.day,
+        d.avg_sentiment,
+        (
+            select l.label from labels as l
+            where l.owner = d.owner and l.day = d.day
+            order by l.hits desc, l.first_seen
+            limit 1
+        ),
+        (
+            select jsonb_object_agg(l.label, l.hits) from labels as l
+            where l.owner = d.owner and l.day = d.day
+        ),
+        d.message_count,
+        d.avg_entry_length,
+        (
+            select jsonb_object_agg(
+                b.bucket,
+                jsonb_build_object('message_count', b.hits, 'avg_sentiment', b.avg_sentiment)
+            )
+            from buckets as b
+            where b.owner = d.owner and b.day = d.day
+        )
+    from days as d
+    order by d.day, d.owner
+$$;
@@ -0,0 +1,22 @@
+-- Backfill writes for `entries.tokens`. The function only updates: an entry
+-- deleted after the backfill read it stays deleted, and `text` is never
+-- rewritten. Rows the write path already tokenized with the same version are
+-- skipped, so an edit that landed between the read and this call keeps the
+-- tokens computed from its new text.
+create or replace function public.update_entry_tokens(p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    updated integer;
+begin
+    update public.entries as e
+    set tokens = r.tokens,
+        tokens_version = r.tokens_version
+    from jsonb_to_recordset(p_rows) as r(id uuid, tokens text[], tokens_version smallint)
+    where e.id = r.id
+      and e.tokens_version is distinct from r.tokens_version;
+    get diagnostics updated = row_count;
+    return updated;
+end
+$$;
@@ -0,0 +1,193 @@
+-- Atomic trigger counter rebuilds.
+--
+-- A rebuild counts a user's entries in the API (trigger matching lives in
+-- Python), so the entry fetch and the swap cannot share a transaction. Instead:
+--
+-- 1. `begin_trigger_stats_rebuild` opens a new rebuild generation for the user.
+-- 2. While it is open, `record_trigger_observation` still increments the live
+--    counters and also logs the observation by entry id in
+--    `trigger_stat_pending`.
+-- 3. `replace_trigger_stats` swaps in the rebuilt rows in one transaction, then
+--    replays every logged observation whose entry the rebuild did not count.
+--
+-- Every one of these functions takes the same per-user advisory lock, so an
+-- increment never interleaves with a swap. Readers see either the old counters
+-- or the new ones, never an empty table.
+
+create table if not exists trigger_stat_rebuilds (
+    user_id uuid primary key,
+    generation bigint not null default 0,
+    in_progress boolean not null default false,
+    started_at timestamptz
+);
+
+create table if not exists trigger_stat_pending (
+    user_id uuid not null,
+    generation bigint not null,
+    entry_id uuid not null,
+    month_start date not null,
+    label text,
+    trigger_ids uuid[] not null default '{}',
+    primary key (user_id, generation, entry_id)
+);
+
+-- Bookkeeping only: no policies, so only the service role can touch them.
+alter table if exists public.trigger_stat_rebuilds enable row level security;
+alter table if exists public.trigger_stat_rebuilds force row level security;
+alter table if exists public.trigger_stat_pending enable row level security;
+alter table if exists public.trigger_stat_pending force row level security;
+
+create or replace function public.lock_trigger_stats(p_user_id uuid)
+returns void
+language sql
+as $$
+    select pg_advisory_xact_lock(hashtextextended('trigger_stats:' || p_user_id::text, 0))
+$$;
+
+-- The increment body of migration 008's `record_trigger_observation`.
+create or replace function public.apply_trigger_observation(
+    p_user_id uuid,
+    p_month_start date,
+    p_label text,
+    p_trigger_ids uuid[]
+) returns void
+language plpgsql
+as $$
+declare
+    label_delta jsonb := case
+        when p_label is null then '{}'::jsonb
+        else jsonb_build_object(p_label, 1)
+    end;
+begin
+    insert into public.trigger_baselines as b (user_id, month_start, entry_count, emotion_counts)
+    values (p_user_id, p_month_start, 1, label_delta)
+    on conflict (user_id, month_start) do update
+        set entry_count = b.entry_count + 1,
+            emotion_counts = case
+                when p_label is null then b.emotion_counts
+                else b.emotion_counts || jsonb_build_object(
+                    p_label, coalesce((b.emotion_counts ->> p_label)::integer, 0) + 1
+                )
+            end,
+            updated_at = now();
+
+    insert into public.trigger_stats as s (user_id, trigger_id, month_start, match_count, emotion_counts)
+    select p_user_id, trigger_id, p_month_start, 1, label_delta
+    from unnest(coalesce(p_trigger_ids, '{}'::uuid[])) as trigger_id
+    on conflict (user_id, trigger_id, month_start) do update
+        set match_count = s.match_count + 1,
+            emotion_counts = case
+                when p_label is null then s.emotion_counts
+                else s.emotion_counts || jsonb_build_object(
+                    p_label, coalesce((s.emotion_counts ->> p_label)::integer, 0) + 1
+                )
+            end,
+            updated_at = now();
+end
+$$;
+
+drop function if exists public.record_trigger_observation(uuid, date, text, uuid[]);
+
+create or replace function public.record_trigger_observation(
+    p_user_id uuid,
+    p_month_start date,
+    p_label text,
+    p_trigger_ids uuid[],
+    p_entry_id uuid default null
+) returns void
+language plpgsql
+as $$
+declare
+    open_generation bigint;
+begin
+    perform public.lock_trigger_stats(p_user_id);
+    perform public.apply_trigger_observation(p_user_id, p_month_start, p_label, p_trigger_ids);
+
+    select generation into open_generation
+    from public.trigger_stat_rebuilds
+    where user_id = p_user_id and in_progress;
+
+    if open_generation is not null and p_entry_id is not null then
+        insert into public.trigger_stat_pending (user_id, generation, entry_id, month_start, label, trigger_ids)
+        values (p_user_id, open_generation, p_entry_id, p_month_start, p_label, coalesce(p_trigger_ids, '{}'::uuid[]))
+        on conflict do nothing;
+    end if;
+end
+$$;
+
+-- Call before fetching the entries to rebuild from. A newer call supersedes an
+-- unfinished rebuild: its observations are older than the new fetch, so that
+-- fetch already contains their entries.
+create or replace function public.begin_trigger_stats_rebuild(p_user_id uuid)
+returns bigint
+language plpgsql
+as $$
+declare
+    opened bigint;
+begin
+    perform public.lock_trigger_stats(p_user_id);
+    delete from public.trigger_stat_pending where user_id = p_user_id;
+    insert into public.trigger_stat_rebuilds as r (user_id, generation, in_progress, started_at)
+    values (p_user_id, 1, true, now())
+    on conflict (user_id) do update
+        set generation = r.generation + 1,
+            in_progress = true,
+            started_at = now()
+    returning generation into opened;
+    return opened;
+end
+$$;
+
+-- Counter rows for triggers deleted since the rebuild read them are dropped.
+-- Returns false without writing when `p_generation` is no longer the open
+-- rebuild (a newer one started and will write its own counts).
+create or replace function public.replace_trigger_stats(
+    p_user_id uuid,
+    p_generation bigint,
+    p_entry_ids uuid[],
+    p_baselines jsonb,
+    p_stats jsonb
+) returns boolean
+language plpgsql
+as $$
+declare
+    pending record;
+begin
+    perform public.lock_trigger_stats(p_user_id);
+    if not exists (
+        select 1 from public.trigger_stat_rebuilds
+        where user_id = p_user_id and generation = p_generation and in_progress
+    ) then
+        return false;
+    end if;
+
+    delete from public.trigger_stats where user_id = p_user_id;
+    delete from public.trigger_baselines where user_id = p_user_id;
+
+    insert into public.trigger_baselines (user_id, month_start, entry_count, emotion_counts)
+    select p_user_id, b.month_start, b.entry_count, coalesce(b.emotion_counts, '{}'::jsonb)
+    from jsonb_to_recordset(p_baselines) as b(month_start date, entry_count integer, emotion_counts jsonb);
+
+    insert into public.trigger_stats (user_id, trigger_id, month_start, match_count, emotion_counts)
+    select p_user_id, s.trigger_id, s.month_start, s.match_count, coalesce(s.emotion_counts, '{}'::jsonb)
+    from jsonb_to_recordset(p_stats) as s(trigger_id uuid, month_start date, match_count integer, emotion_counts jsonb)
+    join public.triggers t on t.id = s.trigger_id;
+
+    for pending in
+        select month_start, label, array(
+            select trigger_id from unnest(trigger_ids) as trigger_id
+            where exists (select 1 from public.triggers t where t.id = trigger_id)
+        ) as trigger_ids
+        from public.trigger_stat_pending
+        where user_id = p_user_id
+          and generation = p_generation
+          and entry_id <> all(coalesce(p_entry_ids, '{}'::uuid[]))
+    loop
+        perform public.apply_trigger_observation(p_user_id, pending.month_start, pending.label, pending.trigger_ids);
+    end loop;
+
+    delete from public.trigger_stat_pending where user_id = p_user_id;
+    update public.trigger_stat_rebuilds set in_progress = false where user_id = p_user_id;
+    return true;
+end
+$$;
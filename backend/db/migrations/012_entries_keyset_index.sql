@@ -0,0 +1,8 @@
+-- `GET /entries` pages newest first by keyset over `(created_at, id)`. The
+-- request filters on `created_at <= cursor` and breaks ties on `id`; with `id`
+-- in the index that is one range scan that also yields rows in page order.
+create index if not exists idx_entries_user_created_at_id
+    on public.entries (user_id, created_at desc, id desc);
+
+-- Every query the old index served is a prefix of the new one.
+drop index if exists public.idx_entries_user_created_at;
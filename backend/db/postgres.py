@@ -0,0 +1,262 @@
+"""
+Direct Postgres access for batch jobs.
+
+PostgREST encodes every row as JSON and caps response sizes, which makes
+fleet-wide scans and metric rewrites slow. When ``BATCH_DATA_BACKEND=postgres``
+and ``DATABASE_URL`` are set (and psycopg is installed), batch reads stream
+entries through a server-side cursor and batch upserts ``COPY`` rows into a
+temporary staging table, then merge them with one ``insert ... on conflict``.
+
+Rows come back in PostgREST's JSON shape (ISO timestamps, string UUIDs), so
+callers and XCom payloads cannot tell the backends apart.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import psycopg
+    from psycopg import sql
+    from psycopg_pool import ConnectionPool
+except ImportError:  # pragma: no cover - optional dependency
+    psycopg = None  # type: ignore
+    sql = None  # type: ignore
+    ConnectionPool = None  # type: ignore
+
+from ..core.settings import get_settings
+from .queries import BulkWriteResult, DatabaseError, EntryProjection, entry_columns
+
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH_SIZE = 2_000
+_JSON_TYPES = frozenset({"json", "jsonb"})
+
+
+class PostgresUnavailable(DatabaseError):
+    """Raised when the direct backend is requested but cannot be used."""
+
+
+def is_enabled() -> bool:
+    """Whether batch work should use direct Postgres instead of PostgREST."""
+    settings = get_settings()
+    return settings.batch_data_backend == "postgres" and bool(settings.database_url) and psycopg is not None
+
+
+@lru_cache(maxsize=1)
+def get_pool() -> "ConnectionPool":
+    if psycopg is None:
+        raise PostgresUnavailable("psycopg is not installed; pip install 'psycopg[binary,pool]'.")
+    settings = get_settings()
+    if not settings.database_url:
+        raise PostgresUnavailable("DATABASE_URL is not set.")
+    return ConnectionPool(
+        settings.database_url,
+        min_size=1,
+        max_size=settings.database_pool_size,
+        kwargs={"autocommit": False},
+        open=True,
+    )
+
+
+def close_pool() -> None:
+    if get_pool.cache_info().currsize:
+        get_pool().close()
+        get_pool.cache_clear()
+
+
+@contextmanager
+def connection(conn: Optional["psycopg.Connection"] = None) -> Iterator["psycopg.Connection"]:
+    """Use ``conn`` if given, else borrow one from the pool for the block."""
+    if conn is not None:
+        yield conn
+        return
+    with get_pool().connection() as pooled:
+        yield pooled
+
+
+def _rest_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_entries_for_range(
+    *,
+    start: datetime,
+    end: datetime,
+    projection: EntryProjection,
+    user_id: Optional[str] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    conn: Optional["psycopg.Connection"] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream entries created in ``[start, end]`` through a server-side cursor.
+
+    Memory stays at one batch however many rows the range holds.
+    """
+    columns = entry_columns(projection).split(",")
+    query = sql.SQL(
+        "select {columns} from entries where created_at >= %s and created_at <= %s{user_filter} "
+        "order by created_at"
+    ).format(
+        columns=sql.SQL(", ").join(sql.Identifier(column) for column in columns),
+        user_filter=sql.SQL(" and user_id = %s") if user_id else sql.SQL(""),
+    )
+    params: List[Any] = [start, end] + ([user_id] if user_id else [])
+    with connection(conn) as active:
+        with active.transaction():
+            with active.cursor(name=f"entries_{uuid.uuid4().hex[:12]}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield {column: _rest_value(value) for column, value in zip(columns, row)}
+
+
+def fetch_entries_for_range_all(
+    *, start: datetime, end: datetime, projection: EntryProjection
+) -> List[Dict[str, Any]]:
+    return list(iter_entries_for_range(start=start, end=end, projection=projection))
+
+
+def _column_types(active: "psycopg.Connection", table: str) -> Dict[str, Tuple[str, bool]]:
+    """Map each column to its type and whether an insert must supply it."""
+    rows = active.execute(
+        "select attname, format_type(atttypid, atttypmod), "
+        "attnotnull and not atthasdef and attidentity = '' and attgenerated = '' "
+        "from pg_attribute where attrelid = %s::regclass and attnum > 0 and not attisdropped",
+        (table,),
+    ).fetchall()
+    return {name: (type_name, required) for name, type_name, required in rows}
+
+
+def copy_upsert(
+    table: str,
+    records: Sequence[Dict[str, Any]],
+    *,
+    on_conflict: str,
+    conn: Optional["psycopg.Connection"] = None,
+) -> BulkWriteResult:
+    """Upsert ``records`` by ``COPY`` into a staging table and one merge statement.
+
+    Every record must carry the same keys; a mismatch raises
+    :class:`DatabaseError` before anything is written. Columns missing from the
+    records keep their stored values on conflict, as with PostgREST's
+    merge-duplicates. Records that leave out a column an insert would need
+    (``not null`` without a default) can only update existing rows, so they
+    are merged with an ``update`` and any record without a row is an error.
+    """
+    result = BulkWriteResult(table)
+    if not records:
+        return result
+    columns = list(records[0].keys())
+    for index, record in enumerate(records):
+        if record.keys() != records[0].keys():
+            raise DatabaseError(f"Record {index} for {table} does not have the same keys as record 0.")
+    conflict_columns = [column.strip() for column in on_conflict.split(",")]
+    update_columns = [column for column in columns if column not in conflict_columns]
+    started = time.perf_counter()
+
+    with connection(conn) as active:
+        with active.transaction():
+            types = _column_types(active, table)
+            unknown = [column for column in columns if column not in types]
+            if unknown:
+                raise DatabaseError(f"Unknown columns for {table}: {', '.join(unknown)}")
+            json_columns = {index for index, column in enumerate(columns) if types[column][0] in _JSON_TYPES}
+            missing_required = [
+                column for column, (_, required) in types.items() if required and column not in columns
+            ]
+            stage = sql.Identifier(f"_stage_{table}")
+            target = sql.Identifier(table)
+            column_list = sql.SQL(", ").join(sql.Identifier(column) for column in columns)
+            # Only the copied columns, with no constraints or defaults: a column
+            # the records leave out must not be required (or filled) in staging.
+            active.execute(
+                sql.SQL(
+                    "create temp table {stage} on commit drop as select {columns} from {target} with no data"
+                ).format(stage=stage, columns=column_list, target=target)
+            )
+            with active.cursor() as cursor:
+                copy_statement = sql.SQL("copy {stage} ({columns}) from stdin").format(
+                    stage=stage, columns=column_list
+                )
+                with cursor.copy(copy_statement) as copy:
+                    for record in records:
+                        copy.write_row(
+                            [
+                                json.dumps(record[column], default=str)
+                                if index in json_columns and record[column] is not None
+                                else record[column]
+                                for index, column in enumerate(columns)
+                            ]
+                        )
+                        result.rows += 1
+            conflict_list = sql.SQL(", ").join(sql.Identifier(column) for column in conflict_columns)
+            if missing_required:
+                # An insert would fail on the missing columns even when it
+                # conflicts, so update the existing rows in place instead.
+                cursor = active.execute(
+                    sql.SQL("update {target} set {assignments} from {stage} where {match}").format(
+                        target=target,
+                        assignments=sql.SQL(", ").join(
+                            sql.SQL("{column} = {stage}.{column}").format(column=sql.Identifier(column), stage=stage)
+                            # With nothing to change, a no-op assignment still counts the matches.
+                            for column in update_columns or conflict_columns[:1]
+                        ),
+                        stage=stage,
+                        match=sql.SQL(" and ").join(
+                            sql.SQL("{target}.{column} = {stage}.{column}").format(
+                                target=target, stage=stage, column=sql.Identifier(column)
+                            )
+                            for column in conflict_columns
+                        ),
+                    )
+                )
+                if cursor.rowcount < result.rows:
+                    raise DatabaseError(
+                        f"{result.rows - cursor.rowcount} records for {table} match no row and omit "
+                        f"required columns: {', '.join(missing_required)}"
+                    )
+            else:
+                action: sql.Composable
+                if update_columns:
+                    action = sql.SQL("do update set {assignments}").format(
+                        assignments=sql.SQL(", ").join(
+                            sql.SQL("{column} = excluded.{column}").format(column=sql.Identifier(column))
+                            for column in update_columns
+                        )
+                    )
+                else:
+                    action = sql.SQL("do nothing")
+                active.execute(
+                    sql.SQL(
+                        "insert into {target} ({columns}) select {columns} from {stage} "
+                        "on conflict ({conflict}) {action}"
+                    ).format(
+                        target=target,
+                        columns=column_list,
+                        stage=stage,
+                        conflict=conflict_list,
+                        action=action,
+                    )
+                )
+
+    result.chunks = 1
+    result.elapsed_seconds = time.perf_counter() - started
+    logger.info("db.copy_upsert", extra=result.as_dict())
+    return result
@@ -7,12 +7,86 @@ so they can be consumed easily by FastAPI route handlers and services.
 
 from __future__ import annotations
 
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple, TypeVar, cast
 
+from postgrest import ReturnMethod
+
+from ..core.cache import bump_user_version, get_config_cache
+from . import loader
+from .instrument import instrumented
 from .supabase import get_client
 
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_BULK_CHUNK_SIZE = 500
+# Ids per ``in.(...)`` filter; keeps batched lookups well inside URL limits.
+IN_FILTER_CHUNK_SIZE = 200
+DEFAULT_BULK_MAX_RETRIES = 2
+BULK_RETRY_BACKOFF_SECONDS = 0.5
+
+Returning = Literal["minimal", "representation"]
+T = TypeVar("T")
+# (user_id, week start, week end) memo key for weekly metric reads.
+WeeklyMetricsKey = Tuple[str, date, date]
+
+# Named column sets for entry reads. Nothing selects ``*``: that would also
+# pull the 1536-dimension ``embedding`` vector, ``ai_response`` and raw text
+# into code that never looks at them.
+_ENTRY_METRIC_COLUMNS = (
+    "id,user_id,created_at,emotion_json,sentiment_score,entry_length,time_of_day,weekday,tags"
+)
+ENTRY_PROJECTIONS: Dict[str, str] = {
+    # Fields of the API's EntryOut model.
+    "list": (
+        "id,user_id,text,source,tags,emotion_json,ai_response,created_at,"
+        "entry_length,time_of_day,weekday,sentiment_score,response_delay_ms"
+    ),
+    "detail": (
+        "id,user_id,text,source,tags,emotion_json,ai_response,created_at,"
+        "entry_length,time_of_day,weekday,sentiment_score,response_delay_ms"
+    ),
+    # Everything normalize_entry reads except tokens: metrics and summaries.
+    "analytics": _ENTRY_METRIC_COLUMNS,
+    # Keyword, trigger and discovery work. ``text`` stays as the fallback for
+    # rows the backfill has not tokenized yet.
+    "tokens": _ENTRY_METRIC_COLUMNS + ",tokens,tokens_version,text",
+}
+EntryProjection = Literal["list", "detail", "analytics", "tokens"]
+
+
+def keyset_before(created_at: str, entry_id: str) -> str:
+    """PostgREST ``or`` filter for rows after ``(created_at, id)`` in newest-first order.
+
+    Postgres cannot turn the ``or`` into an index range, so callers also send
+    ``created_at <= created_at`` as a plain filter; that bound is what lets
+    ``idx_entries_user_created_at_id`` start the scan at the cursor.
+    """
+    return f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{entry_id})'
+
+
+def _config_row(table: str, user_id: str, fetch: Callable[[], T]) -> T:
+    """Read a per-user configuration row through the request memo and the TTL cache."""
+    return loader.load(table, user_id, lambda: get_config_cache().get_or_load(table, user_id, fetch))
+
+
+def _config_written(table: str, user_id: str, value: Any) -> None:
+    get_config_cache().invalidate(table, user_id)
+    loader.prime(table, user_id, value)
+
+
+def entry_columns(projection: str) -> str:
+    try:
+        return ENTRY_PROJECTIONS[projection]
+    except KeyError:
+        raise ValueError(f"Unknown entry projection: {projection!r}") from None
+
+
 class DatabaseError(RuntimeError):
     """Raised when a Supabase operation fails."""
 
@@ -23,6 +97,123 @@ def _ensure_response(data: Any) -> List[Dict[str, Any]]:
     return data
 
 
+def _bump_versions(records: Sequence[Dict[str, Any]]) -> None:
+    """Invalidate cached responses for every user touched by a bulk write."""
+    for user_id in {record.get("user_id") for record in records}:
+        bump_user_version(user_id)
+
+
+class BulkWriteResult:
+    """Outcome of a :func:`bulk_upsert` call."""
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+        self.rows = 0
+        self.chunks = 0
+        self.retries = 0
+        self.failed_chunks: List[int] = []
+        self.bytes_sent = 0
+        self.elapsed_seconds = 0.0
+        self.records: List[Dict[str, Any]] = []
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds > 0 else float(self.rows)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "retries": self.retries,
+            "failed_chunks": list(self.failed_chunks),
+            "bytes_sent": self.bytes_sent,
+            "elapsed_seconds": round(self.elapsed_seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def bulk_upsert(
+    table: str,
+    records: Sequence[Dict[str, Any]],
+    *,
+    on_conflict: str,
+    chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    returning: Returning = "minimal",
+    max_workers: int = 1,
+    max_retries: int = DEFAULT_BULK_MAX_RETRIES,
+) -> BulkWriteResult:
+    """Upsert ``records`` in chunks, retrying only the chunks that fail.
+
+    ``returning="minimal"`` stops PostgREST from echoing every row back; pass
+    ``"representation"`` only when the caller needs the stored rows. With
+    ``max_workers > 1`` chunks are submitted concurrently.
+    """
+    result = BulkWriteResult(table)
+    if not records:
+        return result
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive.")
+    if returning == "minimal":
+        from . import postgres  # imported lazily: postgres builds on this module
+
+        if postgres.is_enabled():
+            return postgres.copy_upsert(table, records, on_conflict=on_conflict)
+
+    client = get_client()
+    chunks = [list(records[i : i + chunk_size]) for i in range(0, len(records), chunk_size)]
+    result.chunks = len(chunks)
+
+    def send(index: int) -> tuple[int, int, int, List[Dict[str, Any]] | None]:
+        chunk = chunks[index]
+        payload_bytes = len(json.dumps(chunk, default=str).encode("utf-8"))
+        attempts = 0
+        while True:
+            try:
+                response = (
+                    client.table(table)
+                    .upsert(chunk, on_conflict=on_conflict, returning=ReturnMethod(returning))
+                    .execute()
+                )
+            except Exception:
+                if attempts >= max_retries:
+                    logger.exception(
+                        "db.bulk_upsert.chunk_failed",
+                        extra={"table": table, "chunk": index, "rows": len(chunk)},
+                    )
+                    return index, attempts, payload_bytes * (attempts + 1), None
+                attempts += 1
+                time.sleep(BULK_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1))
+                continue
+            rows = _ensure_response(response.data) if returning == "representation" else []
+            return index, attempts, payload_bytes * (attempts + 1), rows
+
+    start = time.perf_counter()
+    if max_workers > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            outcomes = list(executor.map(send, range(len(chunks))))
+    else:
+        outcomes = [send(index) for index in range(len(chunks))]
+    result.elapsed_seconds = time.perf_counter() - start
+
+    for index, retries, sent, rows in outcomes:
+        result.retries += retries
+        result.bytes_sent += sent
+        if rows is None:
+            result.failed_chunks.append(index)
+            continue
+        result.rows += len(chunks[index])
+        result.records.extend(rows)
+
+    logger.info("db.bulk_upsert", extra=result.as_dict())
+    if result.failed_chunks:
+        raise DatabaseError(
+            f"Bulk upsert into {table} failed for {len(result.failed_chunks)} of {result.chunks} chunks."
+        )
+    return result
+
+
+@instrumented("entries")
 def insert_entry(
     *,
     user_id: str,
@@ -38,9 +229,11 @@ def insert_entry(
     sentiment_score: Optional[float] = None,
     embedding: Optional[List[float]] = None,
     created_at: Optional[datetime] = None,
+    tokens: Optional[List[str]] = None,
+    tokens_version: Optional[int] = None,
 ) -> Dict[str, Any]:
     client = get_client()
-    payload = {
+    payload: Dict[str, Any] = {
         "user_id": user_id,
         "text": text,
         "source": source,
@@ -63,13 +256,18 @@ def insert_entry(
         payload["embedding"] = embedding
     if created_at is not None:
         payload["created_at"] = created_at.isoformat()
+    if tokens is not None:
+        payload["tokens"] = tokens
+        payload["tokens_version"] = tokens_version
     response = client.table("entries").insert(payload).execute()
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to insert entry.")
+    bump_user_version(user_id)
     return rows[0]
 
 
+@instrumented("entries")
 def update_entry_emotions(
     entry_id: str, emotion_json: List[Dict[str, Any]], ai_response: Optional[str] = None
 ) -> Dict[str, Any]:
@@ -86,27 +284,47 @@ def update_entry_emotions(
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to update entry emotion data.")
+    bump_user_version(rows[0].get("user_id"))
     return rows[0]
 
 
-def get_entries(user_id: str, *, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+@instrumented("entries")
+def get_entries(
+    user_id: str,
+    *,
+    projection: EntryProjection,
+    limit: int = 100,
+    offset: int = 0,
+    before: Optional[tuple[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """Newest entries first, ordered by ``(created_at, id)``.
+
+    ``before`` is a keyset position: rows strictly after it are returned and
+    ``offset`` is ignored, so the read stays an index range scan however deep
+    the page is.
+    """
     client = get_client()
+    query = client.table("entries").select(entry_columns(projection)).eq("user_id", user_id)
+    if before is not None:
+        query = query.lte("created_at", before[0]).or_(keyset_before(*before))
+        offset = 0
     response = (
-        client.table("entries")
-        .select("*")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
+        query.order("created_at", desc=True)
+        .order("id", desc=True)
         .range(offset, offset + limit - 1)
         .execute()
     )
     return _ensure_response(response.data)
 
 
-def get_entry(user_id: str, entry_id: str) -> Optional[Dict[str, Any]]:
+@instrumented("entries")
+def get_entry(
+    user_id: str, entry_id: str, *, projection: EntryProjection
+) -> Optional[Dict[str, Any]]:
     client = get_client()
     response = (
         client.table("entries")
-        .select("*")
+        .select(entry_columns(projection))
         .eq("user_id", user_id)
         .eq("id", entry_id)
         .limit(1)
@@ -116,11 +334,14 @@ def get_entry(user_id: str, entry_id: str) -> Optional[Dict[str, Any]]:
     return rows[0] if rows else None
 
 
-def fetch_entries_since(user_id: str, since: datetime) -> List[Dict[str, Any]]:
+@instrumented("entries")
+def fetch_entries_since(
+    user_id: str, since: datetime, *, projection: EntryProjection
+) -> List[Dict[str, Any]]:
     client = get_client()
     response = (
         client.table("entries")
-        .select("*")
+        .select(entry_columns(projection))
         .eq("user_id", user_id)
         .gte("created_at", since.isoformat())
         .order("created_at", desc=True)
@@ -129,13 +350,14 @@ def fetch_entries_since(user_id: str, since: datetime) -> List[Dict[str, Any]]:
     return _ensure_response(response.data)
 
 
+@instrumented("entries")
 def fetch_entries_for_range(
-    user_id: str, *, start: datetime, end: datetime
+    user_id: str, *, start: datetime, end: datetime, projection: EntryProjection
 ) -> List[Dict[str, Any]]:
     client = get_client()
     response = (
         client.table("entries")
-        .select("*")
+        .select(entry_columns(projection))
         .eq("user_id", user_id)
         .gte("created_at", start.isoformat())
         .lte("created_at", end.isoformat())
@@ -145,13 +367,18 @@ def fetch_entries_for_range(
     return _ensure_response(response.data)
 
 
+@instrumented("entries")
 def fetch_entries_for_range_all(
-    *, start: datetime, end: datetime
+    *, start: datetime, end: datetime, projection: EntryProjection
 ) -> List[Dict[str, Any]]:
+    from . import postgres
+
+    if postgres.is_enabled():
+        return postgres.fetch_entries_for_range_all(start=start, end=end, projection=projection)
     client = get_client()
     response = (
         client.table("entries")
-        .select("*")
+        .select(entry_columns(projection))
         .gte("created_at", start.isoformat())
         .lte("created_at", end.isoformat())
         .order("created_at")
@@ -160,6 +387,53 @@ def fetch_entries_for_range_all(
     return _ensure_response(response.data)
 
 
+@instrumented("entries")
+def fetch_entries_needing_tokens(
+    *, tokens_version: int, after_id: Optional[str] = None, limit: int = DEFAULT_BULK_CHUNK_SIZE
+) -> List[Dict[str, Any]]:
+    """Entries never tokenized or tokenized by an older tokenizer, in id order."""
+    client = get_client()
+    query = (
+        client.table("entries")
+        .select("id,text")
+        .or_(f"tokens_version.is.null,tokens_version.lt.{tokens_version}")
+    )
+    if after_id:
+        query = query.gt("id", after_id)
+    response = query.order("id").limit(limit).execute()
+    return _ensure_response(response.data)
+
+
+@instrumented("entries")
+def save_entry_tokens(
+    records: Sequence[Dict[str, Any]], *, chunk_size: int = DEFAULT_BULK_CHUNK_SIZE
+) -> BulkWriteResult:
+    """Write backfilled ``tokens``/``tokens_version`` through the ``update_entry_tokens`` RPC.
+
+    Records carry only ``id``, ``tokens`` and ``tokens_version``. The RPC never
+    inserts, so entries deleted since the backfill read them stay deleted, and
+    rows the write path already tokenized at this version are left alone.
+    ``result.rows`` counts the rows actually updated.
+    """
+    result = BulkWriteResult("entries")
+    if not records:
+        return result
+    client = get_client()
+    start = time.perf_counter()
+    for offset in range(0, len(records), chunk_size):
+        chunk = [
+            {"id": record["id"], "tokens": record["tokens"], "tokens_version": record["tokens_version"]}
+            for record in records[offset : offset + chunk_size]
+        ]
+        result.bytes_sent += len(json.dumps(chunk).encode("utf-8"))
+        response = client.rpc("update_entry_tokens", {"p_rows": chunk}).execute()
+        result.rows += cast(int, response.data or 0)
+        result.chunks += 1
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
+
+
+@instrumented("summaries")
 def upsert_summary(
     *,
     user_id: str,
@@ -186,6 +460,7 @@ def upsert_summary(
     return rows[0]
 
 
+@instrumented("summaries")
 def get_latest_summary(user_id: str) -> Optional[Dict[str, Any]]:
     client = get_client()
     response = (
@@ -200,21 +475,26 @@ def get_latest_summary(user_id: str) -> Optional[Dict[str, Any]]:
     return rows[0] if rows else None
 
 
+@instrumented("coping_kits")
 def get_coping_kit(user_id: str) -> Optional[List[str]]:
-    client = get_client()
-    response = (
-        client.table("coping_kits")
-        .select("actions")
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    rows = _ensure_response(response.data)
-    if not rows:
-        return None
-    return rows[0].get("actions") or []
+    def fetch() -> Optional[List[str]]:
+        client = get_client()
+        response = (
+            client.table("coping_kits")
+            .select("actions")
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        rows = _ensure_response(response.data)
+        if not rows:
+            return None
+        return rows[0].get("actions") or []
+
+    return _config_row("coping_kits", user_id, fetch)
 
 
+@instrumented("coping_kits")
 def save_coping_kit(user_id: str, actions: List[str]) -> List[str]:
     client = get_client()
     response = (
@@ -229,21 +509,29 @@ def save_coping_kit(user_id: str, actions: List[str]) -> List[str]:
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to save coping kit.")
-    return rows[0].get("actions") or []
+    bump_user_version(user_id)
+    actions = rows[0].get("actions") or []
+    _config_written("coping_kits", user_id, actions)
+    return actions
 
 
+@instrumented("triggers")
 def list_triggers(user_id: str) -> List[Dict[str, Any]]:
-    client = get_client()
-    response = (
-        client.table("triggers")
-        .select("*")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .execute()
-    )
-    return _ensure_response(response.data)
+    def fetch() -> List[Dict[str, Any]]:
+        client = get_client()
+        response = (
+            client.table("triggers")
+            .select("*")
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .execute()
+        )
+        return _ensure_response(response.data)
+
+    return _config_row("triggers", user_id, fetch)
 
 
+@instrumented("triggers")
 def upsert_trigger(
     *,
     user_id: str,
@@ -267,24 +555,128 @@ def upsert_trigger(
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to upsert trigger.")
+    bump_user_version(user_id)
+    get_config_cache().invalidate("triggers", user_id)
+    loader.forget("triggers", user_id)
     return rows[0]
 
 
-def get_digest_pref(user_id: str) -> Optional[bool]:
+@instrumented("trigger_stats")
+def record_trigger_observation(
+    user_id: str,
+    month_start: date,
+    label: Optional[str],
+    trigger_ids: Sequence[str],
+    *,
+    entry_id: Optional[str] = None,
+) -> None:
+    """Count one entry into the live counters (migration 011).
+
+    ``entry_id`` lets an in-flight rebuild replay the observation if its entry
+    was written too late to be in the rebuild's fetch.
+    """
+    client = get_client()
+    client.rpc(
+        "record_trigger_observation",
+        {
+            "p_user_id": user_id,
+            "p_month_start": month_start.isoformat(),
+            "p_label": label,
+            "p_trigger_ids": list(trigger_ids),
+            "p_entry_id": entry_id,
+        },
+    ).execute()
+    bump_user_version(user_id)
+
+
+@instrumented("trigger_baselines")
+def get_trigger_baselines(user_id: str, since: date) -> List[Dict[str, Any]]:
     client = get_client()
     response = (
-        client.table("digest_prefs")
-        .select("weekly_email_enabled")
+        client.table("trigger_baselines")
+        .select("month_start,entry_count,emotion_counts")
         .eq("user_id", user_id)
-        .limit(1)
+        .gte("month_start", since.isoformat())
         .execute()
     )
-    rows = _ensure_response(response.data)
-    if not rows:
-        return None
-    return bool(rows[0].get("weekly_email_enabled", True))
+    return _ensure_response(response.data)
 
 
+@instrumented("trigger_stats")
+def get_trigger_stats(user_id: str, since: date) -> List[Dict[str, Any]]:
+    client = get_client()
+    response = (
+        client.table("trigger_stats")
+        .select("trigger_id,month_start,match_count,emotion_counts")
+        .eq("user_id", user_id)
+        .gte("month_start", since.isoformat())
+        .execute()
+    )
+    return _ensure_response(response.data)
+
+
+@instrumented("trigger_stats")
+def begin_trigger_stats_rebuild(user_id: str) -> int:
+    """Open a rebuild generation; call it before fetching the entries to count."""
+    client = get_client()
+    response = client.rpc("begin_trigger_stats_rebuild", {"p_user_id": user_id}).execute()
+    return cast(int, response.data)
+
+
+@instrumented("trigger_stats")
+def replace_trigger_stats(
+    user_id: str,
+    generation: int,
+    entry_ids: Sequence[str],
+    baselines: Sequence[Dict[str, Any]],
+    stats: Sequence[Dict[str, Any]],
+) -> bool:
+    """Swap a user's trigger counters for rebuilt ones in one transaction.
+
+    ``entry_ids`` are the entries the rebuild counted; observations recorded
+    for any other entry since :func:`begin_trigger_stats_rebuild` are replayed
+    on top. Returns ``False`` when a newer rebuild superseded ``generation``.
+    """
+    client = get_client()
+    response = client.rpc(
+        "replace_trigger_stats",
+        {
+            "p_user_id": user_id,
+            "p_generation": generation,
+            "p_entry_ids": list(entry_ids),
+            "p_baselines": [
+                {key: row[key] for key in ("month_start", "entry_count", "emotion_counts")} for row in baselines
+            ],
+            "p_stats": [
+                {key: row[key] for key in ("trigger_id", "month_start", "match_count", "emotion_counts")}
+                for row in stats
+            ],
+        },
+    ).execute()
+    bump_user_version(user_id)
+    return bool(response.data)
+
+
+@instrumented("digest_prefs")
+def get_digest_pref(user_id: str) -> Optional[bool]:
+    def fetch() -> Optional[bool]:
+        client = get_client()
+        response = (
+            client.table("digest_prefs")
+            .select("weekly_email_enabled")
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        rows = _ensure_response(response.data)
+        if not rows:
+            return None
+        return bool(rows[0].get("weekly_email_enabled", True))
+
+    return _config_row("digest_prefs", user_id, fetch)
+
+
+@instrumented("digest_prefs")
 def set_digest_pref(user_id: str, enabled: bool) -> bool:
     client = get_client()
     response = (
@@ -299,22 +691,29 @@ def set_digest_pref(user_id: str, enabled: bool) -> bool:
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to update digest preference.")
-    return bool(rows[0].get("weekly_email_enabled", enabled))
+    value = bool(rows[0].get("weekly_email_enabled", enabled))
+    _config_written("digest_prefs", user_id, value)
+    return value
 
 
+@instrumented("calendar_tokens")
 def get_calendar_token(user_id: str) -> Optional[Dict[str, Any]]:
-    client = get_client()
-    response = (
-        client.table("calendar_tokens")
-        .select("*")
-        .eq("user_id", user_id)
-        .limit(1)
-        .execute()
-    )
-    rows = _ensure_response(response.data)
-    return rows[0] if rows else None
+    def fetch() -> Optional[Dict[str, Any]]:
+        client = get_client()
+        response = (
+            client.table("calendar_tokens")
+            .select("*")
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        rows = _ensure_response(response.data)
+        return rows[0] if rows else None
+
+    return _config_row("calendar_tokens", user_id, fetch)
 
 
+@instrumented("calendar_tokens")
 def save_calendar_token(
     *,
     user_id: str,
@@ -340,25 +739,43 @@ def save_calendar_token(
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to store calendar token.")
+    _config_written("calendar_tokens", user_id, rows[0])
     return rows[0]
 
 
+@instrumented("calendar_tokens")
 def delete_calendar_token(user_id: str) -> None:
     client = get_client()
     client.table("calendar_tokens").delete().eq("user_id", user_id).execute()
+    _config_written("calendar_tokens", user_id, None)
 
-def upsert_daily_metrics(records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    if not records:
-        return []
+@instrumented("daily_metrics")
+def upsert_daily_metrics(
+    records: Sequence[Dict[str, Any]], *, returning: Returning = "minimal"
+) -> List[Dict[str, Any]]:
+    result = bulk_upsert("daily_metrics", records, on_conflict="user_id,date", returning=returning)
+    _bump_versions(records)
+    return result.records
+
+
+@instrumented("entries")
+def aggregate_daily_metrics(
+    user_id: Optional[str], *, start: datetime, end: datetime
+) -> List[Dict[str, Any]]:
+    """Daily metric rows computed in Postgres by the ``compute_daily_metrics`` RPC.
+
+    Rows match :func:`backend.services.analytics.compute_daily_metrics` for the
+    entries created in ``[start, end]``; pass ``user_id=None`` for every user.
+    """
     client = get_client()
-    response = (
-        client.table("daily_metrics")
-        .upsert(records, on_conflict="user_id,date", returning="representation")
-        .execute()
-    )
+    response = client.rpc(
+        "compute_daily_metrics",
+        {"p_start": start.isoformat(), "p_end": end.isoformat(), "p_user_id": user_id},
+    ).execute()
     return _ensure_response(response.data)
 
 
+@instrumented("daily_metrics")
 def get_daily_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
     client = get_client()
     response = (
@@ -373,32 +790,114 @@ def get_daily_metrics(user_id: str, start: date, end: date) -> List[Dict[str, An
     return _ensure_response(response.data)
 
 
-def upsert_weekly_metrics(records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    if not records:
-        return []
+@instrumented("weekly_metrics")
+def upsert_weekly_metrics(
+    records: Sequence[Dict[str, Any]], *, returning: Returning = "minimal"
+) -> List[Dict[str, Any]]:
+    result = bulk_upsert("weekly_metrics", records, on_conflict="user_id,week_start", returning=returning)
+    loader.forget_table("weekly_metrics")
+    _bump_versions(records)
+    return result.records
+
+
+@instrumented("weekly_metrics")
+def get_weekly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+    def fetch() -> List[Dict[str, Any]]:
+        client = get_client()
+        response = (
+            client.table("weekly_metrics")
+            .select("*")
+            .eq("user_id", user_id)
+            .gte("week_start", start.isoformat())
+            .lte("week_start", end.isoformat())
+            .order("week_start")
+            .execute()
+        )
+        return _ensure_response(response.data)
+
+    return loader.load("weekly_metrics", (user_id, start, end), fetch)
+
+
+@instrumented("weekly_metrics")
+def get_weekly_metrics_for_users(
+    user_ids: Sequence[str], start: date, end: date
+) -> Dict[str, List[Dict[str, Any]]]:
+    """:func:`get_weekly_metrics` for many users in one ``in.(...)`` query per chunk."""
+
+    def fetch_many(keys: Sequence[WeeklyMetricsKey]) -> Dict[WeeklyMetricsKey, List[Dict[str, Any]]]:
+        client = get_client()
+        found: Dict[WeeklyMetricsKey, List[Dict[str, Any]]] = {key: [] for key in keys}
+        ids = [key[0] for key in keys]
+        for offset in range(0, len(ids), IN_FILTER_CHUNK_SIZE):
+            response = (
+                client.table("weekly_metrics")
+                .select("*")
+                .in_("user_id", ids[offset : offset + IN_FILTER_CHUNK_SIZE])
+                .gte("week_start", start.isoformat())
+                .lte("week_start", end.isoformat())
+                .order("week_start")
+                .execute()
+            )
+            for row in _ensure_response(response.data):
+                found[(row["user_id"], start, end)].append(row)
+        return found
+
+    keys: List[WeeklyMetricsKey] = [(user_id, start, end) for user_id in user_ids]
+    loaded: Dict[WeeklyMetricsKey, List[Dict[str, Any]]] = loader.load_many(
+        "weekly_metrics", keys, fetch_many, default=list
+    )
+    return {key[0]: rows for key, rows in loaded.items()}
+
+
+@instrumented("monthly_metrics")
+def upsert_monthly_metrics(
+    records: Sequence[Dict[str, Any]], *, returning: Returning = "minimal"
+) -> List[Dict[str, Any]]:
+    result = bulk_upsert("monthly_metrics", records, on_conflict="user_id,month_start", returning=returning)
+    _bump_versions(records)
+    return result.records
+
+
+@instrumented("monthly_metrics")
+def get_monthly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
     client = get_client()
     response = (
-        client.table("weekly_metrics")
-        .upsert(records, on_conflict="user_id,week_start", returning="representation")
+        client.table("monthly_metrics")
+        .select("*")
+        .eq("user_id", user_id)
+        .gte("month_start", start.isoformat())
+        .lte("month_start", end.isoformat())
+        .order("month_start")
         .execute()
     )
     return _ensure_response(response.data)
 
 
-def get_weekly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
+@instrumented("yearly_metrics")
+def upsert_yearly_metrics(
+    records: Sequence[Dict[str, Any]], *, returning: Returning = "minimal"
+) -> List[Dict[str, Any]]:
+    result = bulk_upsert("yearly_metrics", records, on_conflict="user_id,year_start", returning=returning)
+    _bump_versions(records)
+    return result.records
+
+
+@instrumented("yearly_metrics")
+def get_yearly_metrics(user_id: str, start: date, end: date) -> List[Dict[str, Any]]:
     client = get_client()
     response = (
-        client.table("weekly_metrics")
+        client.table("yearly_metrics")
         .select("*")
         .eq("user_id", user_id)
-        .gte("week_start", start.isoformat())
-        .lte("week_start", end.isoformat())
-        .order("week_start")
+        .gte("year_start", start.isoformat())
+        .lte("year_start", end.isoformat())
+        .order("year_start")
         .execute()
     )
     return _ensure_response(response.data)
 
 
+@instrumented("weekly_summary")
 def get_latest_weekly_summary(user_id: str) -> Optional[Dict[str, Any]]:
     client = get_client()
     response = (
@@ -413,6 +912,7 @@ def get_latest_weekly_summary(user_id: str) -> Optional[Dict[str, Any]]:
     return rows[0] if rows else None
 
 
+@instrumented("weekly_summary")
 def get_previous_weekly_summary(user_id: str, before: date) -> Optional[Dict[str, Any]]:
     client = get_client()
     response = (
@@ -428,6 +928,7 @@ def get_previous_weekly_summary(user_id: str, before: date) -> Optional[Dict[str
     return rows[0] if rows else None
 
 
+@instrumented("weekly_summary")
 def upsert_weekly_summary(record: Dict[str, Any]) -> Dict[str, Any]:
     client = get_client()
     response = (
@@ -441,12 +942,19 @@ def upsert_weekly_summary(record: Dict[str, Any]) -> Dict[str, Any]:
     return rows[0]
 
 
-def get_profile(user_id: str) -> Optional[Dict[str, Any]]:
+@instrumented("weekly_summary")
+def upsert_weekly_summaries(records: Sequence[Dict[str, Any]]) -> BulkWriteResult:
+    return bulk_upsert("weekly_summary", records, on_conflict="user_id,week_start")
+
+
+@instrumented("anomaly_detector_state")
+def get_anomaly_state(user_id: str, kind: str) -> Optional[Dict[str, Any]]:
     client = get_client()
     response = (
-        client.table("user_profiles")
+        client.table("anomaly_detector_state")
         .select("*")
         .eq("user_id", user_id)
+        .eq("kind", kind)
         .limit(1)
         .execute()
     )
@@ -454,6 +962,90 @@ def get_profile(user_id: str) -> Optional[Dict[str, Any]]:
     return rows[0] if rows else None
 
 
+@instrumented("anomaly_detector_state")
+def save_anomaly_state(record: Dict[str, Any]) -> None:
+    client = get_client()
+    client.table("anomaly_detector_state").upsert(
+        record, on_conflict="user_id,kind", returning=ReturnMethod.minimal
+    ).execute()
+
+
+@instrumented("anomaly_detector_state")
+def swap_anomaly_state(record: Dict[str, Any], *, previous_observed: Optional[str]) -> bool:
+    """Write ``record`` only if the stored ``last_observed`` is still ``previous_observed``.
+
+    ``last_observed`` only moves forward, so it serves as the row version for a
+    compare-and-swap. ``None`` means no state was stored. Returns ``False``
+    when another writer saved first; the caller re-reads and retries.
+    """
+    client = get_client()
+    if previous_observed is None:
+        response = client.table("anomaly_detector_state").upsert(
+            record,
+            on_conflict="user_id,kind",
+            ignore_duplicates=True,
+            returning=ReturnMethod.representation,
+        ).execute()
+        if response.data:
+            return True
+        query = client.table("anomaly_detector_state").update(record).is_("last_observed", "null")
+    else:
+        query = client.table("anomaly_detector_state").update(record).eq("last_observed", previous_observed)
+    response = query.eq("user_id", record["user_id"]).eq("kind", record["kind"]).execute()
+    return bool(response.data)
+
+
+@instrumented("sentiment_anomalies")
+def insert_anomalies(records: Sequence[Dict[str, Any]]) -> None:
+    if not records:
+        return
+    client = get_client()
+    client.table("sentiment_anomalies").upsert(
+        list(records), on_conflict="user_id,kind,observed_at", returning=ReturnMethod.minimal
+    ).execute()
+
+
+@instrumented("sentiment_anomalies")
+def list_anomalies(
+    user_id: str,
+    *,
+    since: datetime,
+    until: Optional[datetime] = None,
+    kind: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    client = get_client()
+    query = (
+        client.table("sentiment_anomalies")
+        .select("*")
+        .eq("user_id", user_id)
+        .gte("observed_at", since.isoformat())
+    )
+    if until is not None:
+        query = query.lte("observed_at", until.isoformat())
+    if kind is not None:
+        query = query.eq("kind", kind)
+    response = query.order("observed_at", desc=True).execute()
+    return _ensure_response(response.data)
+
+
+@instrumented("user_profiles")
+def get_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    def fetch() -> Optional[Dict[str, Any]]:
+        client = get_client()
+        response = (
+            client.table("user_profiles")
+            .select("*")
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        rows = _ensure_response(response.data)
+        return rows[0] if rows else None
+
+    return _config_row("user_profiles", user_id, fetch)
+
+
+@instrumented("user_profiles")
 def upsert_profile(user_id: str, full_name: str) -> Dict[str, Any]:
     client = get_client()
     response = (
@@ -468,4 +1060,5 @@ def upsert_profile(user_id: str, full_name: str) -> Dict[str, Any]:
     rows = _ensure_response(response.data)
     if not rows:
         raise DatabaseError("Failed to upsert profile.")
+    _config_written("user_profiles", user_id, rows[0])
     return rows[0]
@@ -11,6 +11,8 @@ from typing import Optional
 
 from supabase import Client, create_client
 
+from .instrument import install_hooks
+
 
 class SupabaseConfigError(RuntimeError):
     """Raised when Supabase environment variables are missing."""
@@ -27,7 +29,9 @@ def get_client() -> Client:
             "Supabase configuration missing. Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY."
         )
 
-    return create_client(url, service_role_key)
+    client = create_client(url, service_role_key)
+    install_hooks(client.postgrest.session)
+    return client
 
 
 def refresh_client() -> Optional[Client]:
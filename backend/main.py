@@ -24,7 +24,10 @@ from slowapi.middleware import SlowAPIMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 
 from .core import get_settings, limiter
+from .core.cache import get_config_cache, get_response_cache
 from .core.context import get_request_id
+from .core.etag import NotModified, not_modified_handler
+from .core.serialization import FastJSONResponse
 from .core.logging import configure_logging
 from .core.middleware import (
     CSRFMiddleware,
@@ -33,7 +36,10 @@ from .core.middleware import (
     SecurityHeadersMiddleware,
 )
 from .core.rate_limiting import rate_limit_handler
+from .db.async_queries import close_async_client
+from .db.instrument import get_query_metrics
 from .db.supabase import SupabaseConfigError, get_client
+from .services.auth import get_token_cache, require_metrics_token
 from .routes import (
     analyze,
     analytics,
@@ -47,6 +53,7 @@ from .routes import (
     triggers as triggers_routes,
 )
 from .services.emotion_analysis import get_emotion_analyzer
+from .services.jobs import get_job_manager
 from .services.summarizer import get_weekly_summarizer
 
 
@@ -79,6 +86,7 @@ app = FastAPI(
     title="Echo API",
     version="0.2.0",
     description="Backend for Echo emotional journaling apps.",
+    default_response_class=FastJSONResponse,
 )
 app.state.settings = settings
 app.state.limiter = limiter
@@ -115,11 +123,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=settings.cors_allow_methods,
     allow_headers=settings.cors_allow_headers,
+    expose_headers=["ETag", "X-Next-Cursor"],
     max_age=3600,
 )
 app.add_middleware(SlowAPIMiddleware)
 
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
+app.add_exception_handler(NotModified, not_modified_handler)
 
 
 def _error_payload(detail: Union[str, Dict[str, Any], list[Any]]) -> Dict[str, Any]:
@@ -182,6 +192,15 @@ async def warm_models() -> None:
     logger.info("startup.complete", extra={"environment": settings.environment})
 
 
+@app.on_event("shutdown")
+async def close_connections() -> None:
+    # Only a worker that ever ran a recompute has a pool to drain.
+    if get_job_manager.cache_info().currsize:
+        get_job_manager().shutdown(wait=True)
+        get_job_manager.cache_clear()
+    await close_async_client()
+
+
 def _check_supabase() -> tuple[bool, str | None]:
     try:
         client = get_client()
@@ -204,6 +223,26 @@ def healthz() -> Dict[str, Any]:
     }
 
 
+@app.get(
+    "/metrics",
+    tags=["platform"],
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+def cache_metrics() -> Dict[str, Any]:
+    """Cache counters, avoided token verifications and per-query histograms for this worker.
+
+    Query filters and cache keys leak user ids, so it needs ``METRICS_TOKEN``.
+    """
+    response_cache = get_response_cache()
+    return {
+        "response_cache": {"hits": response_cache.hits, "misses": response_cache.misses},
+        "config_cache": get_config_cache().stats(),
+        "auth_token_cache": get_token_cache().stats(),
+        "queries": get_query_metrics().snapshot(),
+    }
+
+
 @app.get("/readyz", tags=["platform"])
 def readiness() -> JSONResponse:
     """Deep readiness probe that checks downstream dependencies."""
@@ -3,14 +3,19 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timedelta, timezone
-from typing import List, Literal, Optional
+from typing import Callable, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from starlette.concurrency import run_in_threadpool
 
 from ..core import rate_limit_write
-from ..db import queries
+from ..core.cache import cached_response_async
+from ..core.etag import conditional_get
+from ..core.serialization import json_response
+from ..db import async_queries
 from ..services import analytics as analytics_service
 from ..services.auth import AuthenticatedUser, get_current_user
+from ..services.jobs import Job, get_job_manager
 
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
@@ -32,40 +37,204 @@ def _date_range(start: Optional[str], end: Optional[str], default_span_days: int
     return start_date, end_date
 
 
-@router.get("/daily")
-def get_daily_analytics(
+# Client-side freshness per route: metric rows only change on recompute or the
+# weekly DAG, and long-range rollups change least of all.
+MAX_AGE_SECONDS = {"daily": 60, "weekly": 60, "rolling": 60, "monthly": 300, "yearly": 300}
+
+
+@router.get("/daily", response_model=List[dict])
+async def get_daily_analytics(
+    request: Request,
+    response: Response,
     start: Optional[str] = Query(None),
     end: Optional[str] = Query(None),
     user: AuthenticatedUser = Depends(get_current_user),
-) -> List[dict]:
+) -> Response:
     start_date, end_date = _date_range(start, end)
-    return queries.get_daily_metrics(user.id, start_date, end_date)
-
-
-@router.get("/weekly")
-def get_weekly_analytics(
+    params = {"start": start_date, "end": end_date}
+    await conditional_get(
+        request,
+        response,
+        user_id=user.id,
+        endpoint="analytics.daily",
+        params=params,
+        max_age=MAX_AGE_SECONDS["daily"],
+    )
+    rows = await cached_response_async(
+        user.id,
+        "analytics.daily",
+        params,
+        lambda: async_queries.get_daily_metrics(user.id, start_date, end_date),
+    )
+    return json_response(rows, response)
+
+
+@router.get("/weekly", response_model=List[dict])
+async def get_weekly_analytics(
+    request: Request,
+    response: Response,
     start: Optional[str] = Query(None),
     end: Optional[str] = Query(None),
     user: AuthenticatedUser = Depends(get_current_user),
-) -> List[dict]:
+) -> Response:
     start_date, end_date = _date_range(start, end, default_span_days=70)
-    return queries.get_weekly_metrics(user.id, start_date, end_date)
+    params = {"start": start_date, "end": end_date}
+    await conditional_get(
+        request,
+        response,
+        user_id=user.id,
+        endpoint="analytics.weekly",
+        params=params,
+        max_age=MAX_AGE_SECONDS["weekly"],
+    )
+    rows = await cached_response_async(
+        user.id,
+        "analytics.weekly",
+        params,
+        lambda: async_queries.get_weekly_metrics(user.id, start_date, end_date),
+    )
+    return json_response(rows, response)
+
+
+@router.get("/monthly", response_model=List[dict])
+async def get_monthly_analytics(
+    request: Request,
+    response: Response,
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    user: AuthenticatedUser = Depends(get_current_user),
+) -> Response:
+    start_date, end_date = _date_range(start, end, default_span_days=365)
+    start_date = start_date.replace(day=1)
+    await conditional_get(
+        request,
+        response,
+        user_id=user.id,
+        endpoint="analytics.monthly",
+        params={"start": start_date, "end": end_date},
+        max_age=MAX_AGE_SECONDS["monthly"],
+    )
+    return json_response(await async_queries.get_monthly_metrics(user.id, start_date, end_date), response)
+
+
+@router.get("/yearly", response_model=List[dict])
+async def get_yearly_analytics(
+    request: Request,
+    response: Response,
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    user: AuthenticatedUser = Depends(get_current_user),
+) -> Response:
+    start_date, end_date = _date_range(start, end, default_span_days=5 * 365)
+    start_date = start_date.replace(month=1, day=1)
+    await conditional_get(
+        request,
+        response,
+        user_id=user.id,
+        endpoint="analytics.yearly",
+        params={"start": start_date, "end": end_date},
+        max_age=MAX_AGE_SECONDS["yearly"],
+    )
+    return json_response(await async_queries.get_yearly_metrics(user.id, start_date, end_date), response)
+
+
+def _parse_windows(value: str) -> List[int]:
+    try:
+        windows = sorted({int(item) for item in value.split(",") if item.strip()})
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="windows must be integers") from exc
+    if not windows or len(windows) > 5 or windows[0] < 2 or windows[-1] > 365:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="windows must list 1-5 day counts between 2 and 365",
+        )
+    return windows
+
+
+@router.get("/rolling", response_model=List[dict])
+async def get_rolling_analytics(
+    request: Request,
+    response: Response,
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    windows: str = Query("7,14,30"),
+    ewma_span: int = Query(7, ge=2, le=365),
+    user: AuthenticatedUser = Depends(get_current_user),
+) -> Response:
+    start_date, end_date = _date_range(start, end, default_span_days=90)
+    window_days = _parse_windows(windows)
+    await conditional_get(
+        request,
+        response,
+        user_id=user.id,
+        endpoint="analytics.rolling",
+        params={"start": start_date, "end": end_date, "windows": window_days, "ewma_span": ewma_span},
+        max_age=MAX_AGE_SECONDS["rolling"],
+    )
+    daily = await async_queries.get_daily_metrics(
+        user.id, start_date - timedelta(days=window_days[-1] - 1), end_date
+    )
+    rows = await run_in_threadpool(
+        analytics_service.compute_rolling_metrics,
+        daily,
+        start_date,
+        end_date,
+        windows=window_days,
+        ewma_span=ewma_span,
+    )
+    return json_response(rows, response)
+
+
+@router.get("/anomalies", response_model=List[dict])
+async def get_recent_anomalies(
+    days: int = Query(default=30, ge=1, le=365),
+    kind: Optional[Literal["entry", "day"]] = Query(None),
+    user: AuthenticatedUser = Depends(get_current_user),
+) -> Response:
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return json_response(await async_queries.list_anomalies(user.id, since=since, kind=kind))
+
 
+RECOMPUTE_WINDOWS = {"daily": 30, "weekly": 90}
 
-@router.post("/recompute")
+
+def _recompute_job(user_id: str, scope: str) -> Callable[[Job], Dict[str, int]]:
+    def run(job: Job) -> Dict[str, int]:
+        now = datetime.now(timezone.utc)
+        start = now - timedelta(days=RECOMPUTE_WINDOWS[scope])
+        if scope == "daily":
+            records = analytics_service.recompute_daily_metrics(user_id, start, now, progress=job.report)
+        else:
+            records = analytics_service.recompute_weekly_metrics(user_id, start, now, progress=job.report)
+        return {scope: len(records)}
+
+    return run
+
+
+@router.post("/recompute", status_code=status.HTTP_202_ACCEPTED)
 @rate_limit_write()
 def recompute_analytics(
     request: Request,
     scope: Literal["daily", "weekly"] = Query(...),
     user: AuthenticatedUser = Depends(get_current_user),
 ) -> dict:
-    now = datetime.now(timezone.utc)
-    if scope == "daily":
-        start = now - timedelta(days=30)
-        records = analytics_service.recompute_daily_metrics(user.id, start, now)
-        return {"scope": "daily", "rows": len(records)}
-    if scope == "weekly":
-        start = now - timedelta(days=90)
-        records = analytics_service.recompute_weekly_metrics(user.id, start, now)
-        return {"scope": "weekly", "rows": len(records)}
-    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported scope")
+    if scope not in RECOMPUTE_WINDOWS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported scope")
+    job, created = get_job_manager().submit(
+        user_id=user.id,
+        kind="analytics.recompute",
+        scope=scope,
+        func=_recompute_job(user.id, scope),
+    )
+    return {**job.to_dict(), "deduplicated": not created}
+
+
+@router.get("/recompute/{job_id}")
+def get_recompute_status(
+    job_id: str,
+    user: AuthenticatedUser = Depends(get_current_user),
+) -> dict:
+    job = get_job_manager().get(job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    return job.to_dict()
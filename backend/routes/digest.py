@@ -13,8 +13,10 @@ from sendgrid.helpers.mail import Mail
 
 from ..core import rate_limit_write
 from ..db import queries
+from ..db.loader import query_scope
 from ..services.auth import AuthenticatedUser, get_current_user
 from ..services.insights import summarize_entries
+from ..services.normalized import normalize_entries
 from ..services.summarizer import get_weekly_summarizer
 
 
@@ -65,18 +67,22 @@ def send_digest_now(
     if not user.email:
         raise HTTPException(status_code=400, detail="User email unavailable for digest.")
 
-    pref = queries.get_digest_pref(user.id)
-    if pref is False:
-        return {"ok": False, "reason": "Digest disabled"}
+    # Joins the request's scope when the middleware opened one. The three
+    # reads hit different tables, so there is nothing to batch; the scope
+    # only answers repeats of them from memory.
+    with query_scope():
+        pref = queries.get_digest_pref(user.id)
+        if pref is False:
+            return {"ok": False, "reason": "Digest disabled"}
+
+        since = datetime.now(UTC) - timedelta(days=7)
+        entries = normalize_entries(queries.fetch_entries_since(user.id, since, projection="tokens"))
+        coping_actions = queries.get_coping_kit(user.id) or []
 
-    since = datetime.now(UTC) - timedelta(days=7)
-    entries = queries.fetch_entries_since(user.id, since)
     insights = summarize_entries(entries)
     summarizer = get_weekly_summarizer()
     summary_text = summarizer.summarize(entries)
 
-    coping_actions = queries.get_coping_kit(user.id) or []
-
     body = _format_digest_body(
         user_email=user.email,
         summary=summary_text,
@@ -1,15 +1,21 @@
 """Entry CRUD endpoints."""
 
+import base64
+import binascii
+import json
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
-from pydantic import BaseModel, Field, field_validator
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 from ..core import rate_limit_write
-from ..db import queries
-from ..services import coping, emotion_analysis, metrics
+from ..core.etag import conditional_get
+from ..core.serialization import json_response
+from ..db import async_queries, queries
+from ..services import anomalies, coping, emotion_analysis, metrics, trigger_stats
 from ..services.auth import AuthenticatedUser, get_current_user
+from ..services.tokens import TOKENIZER_VERSION, tokenize
 
 
 router = APIRouter(prefix="/entries", tags=["entries"])
@@ -83,6 +89,8 @@ EntryCreate.model_rebuild()
 EntryOut.model_rebuild()
 EntryCreateResponse.model_rebuild()
 
+ENTRY_LIST = TypeAdapter(List[EntryOut])
+
 
 def _derive_top_emotion(emotions: List[EmotionScore]) -> Optional[EmotionScore]:
     if not emotions:
@@ -122,6 +130,7 @@ def _entry_from_db(data: dict) -> EntryOut:
 @rate_limit_write()
 def create_entry(
     request: Request,
+    background_tasks: BackgroundTasks,
     payload: EntryCreate = Body(...),
     user: AuthenticatedUser = Depends(get_current_user),
 ) -> EntryCreateResponse:
@@ -153,8 +162,13 @@ def create_entry(
         response_delay_ms=None,
         sentiment_score=sentiment_score,
         created_at=now,
+        tokens=tokenize(payload.text),
+        tokens_version=TOKENIZER_VERSION,
     )
 
+    background_tasks.add_task(anomalies.observe_entry_safely, entry_record)
+    background_tasks.add_task(trigger_stats.record_entry_safely, entry_record)
+
     entry_out = _entry_from_db(entry_record)
     entry_out.top_emotion = EmotionScore(label=top["label"], score=float(top["score"]))
     entry_out.suggestion = one_liner
@@ -162,22 +176,70 @@ def create_entry(
     return EntryCreateResponse(entry=entry_out, one_liner=one_liner)
 
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(record: dict) -> str:
+    """Opaque keyset position of ``record`` in the newest-first listing."""
+    raw = json.dumps([str(record["created_at"]), str(record["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, entry_id = json.loads(raw)
+        datetime.fromisoformat(created_at)
+        if not isinstance(entry_id, str) or not entry_id.replace("-", "").isalnum():
+            raise ValueError(entry_id)
+    except (binascii.Error, TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.") from None
+    return created_at, entry_id
+
+
 @router.get("", response_model=List[EntryOut])
-def list_entries(
+async def list_entries(
+    request: Request,
+    response: Response,
     user: AuthenticatedUser = Depends(get_current_user),
     limit: int = Query(default=100, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
-) -> List[EntryOut]:
-    records = queries.get_entries(user.id, limit=limit, offset=offset)
-    return [_entry_from_db(record) for record in records]
+    cursor: Optional[str] = Query(default=None, max_length=200),
+) -> Response:
+    """Newest entries first.
+
+    Follow the ``X-Next-Cursor`` response header with ``?cursor=`` to page by
+    keyset; the header is absent on the last page. ``offset`` still works but
+    cannot be combined with a cursor.
+    """
+    if cursor is not None and offset:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Use either cursor or offset, not both."
+        )
+    before = decode_cursor(cursor) if cursor is not None else None
+    await conditional_get(
+        request,
+        response,
+        user_id=user.id,
+        endpoint="entries.list",
+        params={"limit": limit, "offset": offset, "cursor": cursor},
+    )
+    # One extra row tells us whether another page exists.
+    records = await async_queries.get_entries(
+        user.id, projection="list", limit=limit + 1, offset=offset, before=before
+    )
+    if len(records) > limit:
+        records = records[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(records[-1])
+    return json_response([_entry_from_db(record) for record in records], response, adapter=ENTRY_LIST)
 
 
 @router.get("/{entry_id}", response_model=EntryOut)
-def get_entry(
+async def get_entry(
     entry_id: str,
     user: AuthenticatedUser = Depends(get_current_user),
 ) -> EntryOut:
-    record = queries.get_entry(user.id, entry_id)
+    record = await async_queries.get_entry(user.id, entry_id, projection="detail")
     if not record:
         raise HTTPException(status_code=404, detail="Entry not found.")
     return _entry_from_db(record)
@@ -4,9 +4,13 @@ from __future__ import annotations
 
 from datetime import UTC, datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 
-from ..db import queries
+from ..core.cache import cached_response_async
+from ..core.etag import conditional_get
+from ..core.serialization import json_response
+from ..db import async_queries
 from ..services.auth import AuthenticatedUser, get_current_user
 from ..services.insights import summarize_entries
 
@@ -14,12 +18,22 @@ from ..services.insights import summarize_entries
 router = APIRouter(prefix="/insights", tags=["insights"])
 
 
-@router.get("/summary")
-def get_insights_summary(
+@router.get("/summary", response_model=dict)
+async def get_insights_summary(
+    request: Request,
+    response: Response,
     days: int = Query(default=7, ge=1, le=365),
     user: AuthenticatedUser = Depends(get_current_user),
-) -> dict:
+) -> Response:
     now = datetime.now(UTC)
-    since = now - timedelta(days=days)
-    entries = queries.fetch_entries_since(user.id, since)
-    return summarize_entries(entries)
+    params = {"days": days, "as_of": now.date()}
+    await conditional_get(request, response, user_id=user.id, endpoint="insights.summary", params=params)
+
+    async def compute() -> dict:
+        entries = await async_queries.fetch_entries_since(
+            user.id, now - timedelta(days=days), projection="tokens"
+        )
+        return await run_in_threadpool(summarize_entries, entries)
+
+    payload = await cached_response_async(user.id, "insights.summary", params, compute)
+    return json_response(payload, response)
@@ -7,8 +7,10 @@ from typing import Any, Dict, Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from ..db import queries
+from ..core.cache import cached_response_async
+from ..db import async_queries
 from ..services.auth import AuthenticatedUser, get_current_user
 from ..services.summarizer import get_weekly_summarizer
 
@@ -25,7 +27,7 @@ PERIOD_TO_DAYS: dict[str, int | None] = {"day": 1, "week": 7, "month": None}
 
 
 @router.get("", response_model=SummaryResponse)
-def get_summary(
+async def get_summary(
     period: Literal["day", "week", "month"] = Query(default="week"),
     user: AuthenticatedUser = Depends(get_current_user),
 ) -> SummaryResponse:
@@ -40,30 +42,35 @@ def get_summary(
         window_start_dt = datetime(now.year, now.month, 1, tzinfo=UTC)
         since = window_start_dt
 
-    entries = queries.fetch_entries_since(user.id, since)
-    summarizer = get_weekly_summarizer()
-    summary_text = summarizer.summarize(entries, timeframe=period)
+    async def compute() -> Dict[str, str]:
+        entries = await async_queries.fetch_entries_since(user.id, since, projection="analytics")
+        summarizer = await run_in_threadpool(get_weekly_summarizer)
+        summary_text = await run_in_threadpool(summarizer.summarize, entries, timeframe=period)
 
-    if period == "week":
-        record = queries.upsert_summary(
-            user_id=user.id,
-            week_start=window_start_dt.date(),
-            summary_text=summary_text,
-        )
-        return SummaryResponse(
-            summary_text=record["summary_text"],
-            week_start=str(record["week_start"]),
-        )
+        if period == "week":
+            record = await async_queries.upsert_summary(
+                user_id=user.id,
+                week_start=window_start_dt.date(),
+                summary_text=summary_text,
+            )
+            return {
+                "summary_text": record["summary_text"],
+                "week_start": str(record["week_start"]),
+            }
+        return {"summary_text": summary_text, "week_start": str(window_start_dt.date())}
 
-    return SummaryResponse(summary_text=summary_text, week_start=str(window_start_dt.date()))
+    payload = await cached_response_async(
+        user.id, "summary", {"period": period, "as_of": now.date()}, compute
+    )
+    return SummaryResponse(**payload)
 
 
 @router.get("/weekly/latest")
-def get_latest_weekly_summary(
+async def get_latest_weekly_summary(
     include_previous: bool = Query(default=False),
     user: AuthenticatedUser = Depends(get_current_user),
 ) -> dict:
-    record = queries.get_latest_weekly_summary(user.id)
+    record = await async_queries.get_latest_weekly_summary(user.id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No weekly summary found.")
     response: Dict[str, Any] = {"current": record}
@@ -75,7 +82,7 @@ def get_latest_weekly_summary(
                 if isinstance(week_start_raw, date)
                 else datetime.fromisoformat(str(week_start_raw)).date()
             )
-            previous = queries.get_previous_weekly_summary(user.id, week_start_date)
+            previous = await async_queries.get_previous_weekly_summary(user.id, week_start_date)
             if previous:
                 response["previous"] = previous
     return response
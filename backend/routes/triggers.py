@@ -1,15 +1,24 @@
 """Trigger library routes."""
 
+import asyncio
 from datetime import UTC, datetime, timedelta
 from typing import List
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, Field, validator
+from starlette.concurrency import run_in_threadpool
 
 from ..core import rate_limit_write
-from ..db import queries
-from ..services import triggers as trigger_service
+from ..core.cache import cached_response_async
+from ..db import async_queries, queries
+from ..services import trigger_discovery, trigger_stats, triggers as trigger_service
 from ..services.auth import AuthenticatedUser, get_current_user
+from ..services.trigger_matcher import (
+    MIN_PREFIX_LENGTH,
+    PREFIX_MARKER,
+    compile_pattern,
+    invalidate_trigger_matcher,
+)
 
 
 router = APIRouter(prefix="/triggers", tags=["triggers"])
@@ -21,11 +30,17 @@ class TriggerPayload(BaseModel):
 
     @validator("words", each_item=True)
     def normalize_word(cls, value: str) -> str:
-        word = value.strip().lower()
+        word = " ".join(value.lower().split())
         if not word:
             raise ValueError("Trigger word cannot be empty.")
         if len(word) > 30:
             raise ValueError("Trigger word must be under 30 characters.")
+        if PREFIX_MARKER in word.rstrip(PREFIX_MARKER):
+            raise ValueError("'*' is only allowed at the end of a trigger word.")
+        if compile_pattern(word) is None:
+            raise ValueError(
+                f"Trigger word needs a meaningful token; prefixes need {MIN_PREFIX_LENGTH}+ letters."
+            )
         return word
 
 
@@ -33,13 +48,60 @@ TriggerPayload.model_rebuild()
 
 
 @router.get("")
-def list_triggers(user: AuthenticatedUser = Depends(get_current_user)) -> list[dict]:
-    entries = queries.fetch_entries_since(
-        user.id,
-        datetime.now(UTC) - timedelta(days=180),
-    )
-    stored_triggers = queries.list_triggers(user.id)
-    return trigger_service.compute_trigger_stats(entries, stored_triggers)
+async def list_triggers(user: AuthenticatedUser = Depends(get_current_user)) -> list[dict]:
+    now = datetime.now(UTC)
+
+    async def compute() -> list[dict]:
+        since = trigger_stats.window_start(now)
+        stored_triggers, baselines, stats = await asyncio.gather(
+            async_queries.list_triggers(user.id),
+            async_queries.get_trigger_baselines(user.id, since),
+            async_queries.get_trigger_stats(user.id, since),
+        )
+        if not stored_triggers:
+            return []
+        stored = trigger_stats.results_from_rows(stored_triggers, baselines, stats, since=since)
+        if stored is not None:
+            return stored
+        # Counters not built yet: answer from a live scan once and build them.
+        trigger_stats.schedule_rebuild(user.id)
+        entries = await async_queries.fetch_entries_since(
+            user.id, now - timedelta(days=trigger_stats.STATS_WINDOW_DAYS), projection="tokens"
+        )
+        return await run_in_threadpool(
+            trigger_service.compute_trigger_stats, entries, stored_triggers, user_id=user.id
+        )
+
+    return await cached_response_async(user.id, "triggers.list", {"as_of": now.date()}, compute)
+
+
+@router.get("/discover")
+async def discover_triggers(
+    days: int = Query(default=365, ge=30, le=730),
+    limit: int = Query(default=trigger_discovery.DEFAULT_LIMIT, ge=1, le=50),
+    min_entries: int = Query(default=trigger_discovery.DEFAULT_MIN_DOCUMENTS, ge=2, le=50),
+    user: AuthenticatedUser = Depends(get_current_user),
+) -> list[dict]:
+    now = datetime.now(UTC)
+
+    async def compute() -> list[dict]:
+        entries, stored_triggers = await asyncio.gather(
+            async_queries.fetch_entries_since(
+                user.id, now - timedelta(days=days), projection="tokens"
+            ),
+            async_queries.list_triggers(user.id),
+        )
+        existing = [word for trigger in stored_triggers for word in trigger.get("words") or []]
+        return await run_in_threadpool(
+            trigger_discovery.discover_triggers,
+            entries,
+            exclude=existing,
+            min_documents=min_entries,
+            limit=limit,
+        )
+
+    params = {"days": days, "limit": limit, "min_entries": min_entries, "as_of": now.date()}
+    return await cached_response_async(user.id, "triggers.discover", params, compute)
 
 
 @router.post("", status_code=status.HTTP_200_OK)
@@ -54,4 +116,6 @@ def upsert_trigger(
         name=payload.name.strip(),
         words=payload.words,
     )
+    invalidate_trigger_matcher(user.id)
+    trigger_stats.schedule_rebuild(user.id)
     return record
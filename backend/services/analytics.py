@@ -6,36 +6,35 @@ from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta
 from math import sqrt
 from statistics import pstdev
-from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
 from ..db import queries
-from . import metrics
+from . import anomalies, metrics
+from .normalized import EntryLike, normalize_entries
 
 
-def _parse_created_at(value: Any) -> datetime:
+def _week_bounds(dt: datetime) -> Tuple[date, date]:
+    start = metrics.ensure_utc(dt).date()
+    start = start - timedelta(days=start.weekday())
+    return start, start + timedelta(days=6)
+
+
+def _parse_date(value: Any) -> date:
     if isinstance(value, datetime):
-        return metrics.ensure_utc(value)
-    if isinstance(value, str):
-        return metrics.ensure_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
-    raise ValueError("Unsupported created_at format.")
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
 
 
-def _top_emotion(emotions: Iterable[Mapping[str, Any]]) -> str:
-    best_label = "neutral"
-    best_score = float("-inf")
-    for emotion in emotions:
-        label = str(emotion.get("label", "neutral")).lower() or "neutral"
-        score = float(emotion.get("score", 0.0))
-        if score > best_score:
-            best_score = score
-            best_label = label
-    return best_label
+def _month_bounds(day: date) -> Tuple[date, date]:
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
 
 
-def _week_bounds(dt: datetime) -> Tuple[date, date]:
-    start = metrics.ensure_utc(dt).date()
-    start = start - timedelta(days=start.weekday())
-    return start, start + timedelta(days=6)
+def _year_bounds(day: date) -> Tuple[date, date]:
+    return date(day.year, 1, 1), date(day.year, 12, 31)
 
 
 def _pearson(xs: Sequence[float], ys: Sequence[float]) -> float | None:
@@ -51,16 +50,15 @@ def _pearson(xs: Sequence[float], ys: Sequence[float]) -> float | None:
     return num / sqrt(den_x * den_y)
 
 
-def compute_daily_metrics(entries: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+def compute_daily_metrics(entries: Sequence[EntryLike]) -> List[Dict[str, Any]]:
     aggregates: Dict[Tuple[str, date], Dict[str, Any]] = {}
 
-    for entry in entries:
-        user_id = entry.get("user_id")
-        if not user_id:
+    for entry in normalize_entries(entries):
+        user_id = entry.user_id
+        if not user_id or entry.created_at is None:
             continue
 
-        created_at = _parse_created_at(entry.get("created_at"))
-        entry_date = created_at.date()
+        entry_date = entry.created_at.date()
         key = (user_id, entry_date)
         group = aggregates.setdefault(
             key,
@@ -74,26 +72,18 @@ def compute_daily_metrics(entries: Sequence[Mapping[str, Any]]) -> List[Dict[str
             },
         )
 
-        sentiment = entry.get("sentiment_score")
-        if sentiment is None and entry.get("emotion_json"):
-            sentiment = metrics.sentiment_from_emotions(entry["emotion_json"])
-
-        entry_length = entry.get("entry_length")
-        if entry_length is None:
-            entry_length = metrics.calculate_entry_length(entry.get("text", ""))
-
-        time_bucket = entry.get("time_of_day") or metrics.bucket_time_of_day(created_at)
-        top_emotion = _top_emotion(entry.get("emotion_json") or [])
+        sentiment = entry.sentiment
+        time_bucket = entry.bucket
+        top_emotion = entry.top_label or "neutral"
 
         group["message_count"] += 1
         group["emotion_counts"][top_emotion] += 1
         group["time_bucket_counts"][time_bucket] += 1
 
-        if entry_length is not None:
-            group["lengths"].append(float(entry_length))
+        group["lengths"].append(float(entry.length))
         if sentiment is not None:
-            group["sentiments"].append(float(sentiment))
-            group["time_bucket_sentiments"][time_bucket].append(float(sentiment))
+            group["sentiments"].append(sentiment)
+            group["time_bucket_sentiments"][time_bucket].append(sentiment)
 
     results: List[Dict[str, Any]] = []
     for (user_id, entry_date), data in sorted(aggregates.items(), key=lambda item: item[0][1]):
@@ -131,7 +121,7 @@ def compute_daily_metrics(entries: Sequence[Mapping[str, Any]]) -> List[Dict[str
 
 
 def compute_weekly_metrics(
-    entries: Sequence[Mapping[str, Any]],
+    entries: Sequence[EntryLike],
     daily_metrics: Sequence[Mapping[str, Any]],
 ) -> List[Dict[str, Any]]:
     daily_lookup: Dict[Tuple[str, date], Mapping[str, Any]] = {}
@@ -148,12 +138,11 @@ def compute_weekly_metrics(
         daily_lookup[(user_id, record_date)] = record
 
     aggregates: Dict[Tuple[str, date], Dict[str, Any]] = {}
-    for entry in entries:
-        user_id = entry.get("user_id")
-        if not user_id:
+    for entry in normalize_entries(entries):
+        user_id = entry.user_id
+        if not user_id or entry.created_at is None:
             continue
-        created_at = _parse_created_at(entry.get("created_at"))
-        week_start, week_end = _week_bounds(created_at)
+        week_start, week_end = _week_bounds(entry.created_at)
         key = (user_id, week_start)
         group = aggregates.setdefault(
             key,
@@ -168,31 +157,18 @@ def compute_weekly_metrics(
             },
         )
 
-        sentiment = entry.get("sentiment_score")
-        if sentiment is None and entry.get("emotion_json"):
-            sentiment = metrics.sentiment_from_emotions(entry["emotion_json"])
-        entry_length = entry.get("entry_length")
-        if entry_length is None:
-            entry_length = metrics.calculate_entry_length(entry.get("text", ""))
-
-        time_bucket = entry.get("time_of_day") or metrics.bucket_time_of_day(created_at)
-        weekday = entry.get("weekday")
-        if weekday is None:
-            weekday = metrics.weekday_index(created_at)
-
-        top_emotion = _top_emotion(entry.get("emotion_json") or [])
+        sentiment = entry.sentiment
+        top_emotion = entry.top_label or "neutral"
 
         group["message_count"] += 1
         group["emotion_counts"][top_emotion] += 1
 
         if sentiment is not None:
-            sentiment = float(sentiment)
             group["sentiments"].append(sentiment)
-            group["time_bucket_sentiments"][time_bucket].append(sentiment)
-            group["weekday_sentiments"][weekday].append(sentiment)
+            group["time_bucket_sentiments"][entry.bucket].append(sentiment)
+            group["weekday_sentiments"][entry.weekday].append(sentiment)
 
-        if entry_length is not None:
-            group["entry_lengths"].append(float(entry_length))
+        group["entry_lengths"].append(float(entry.length))
 
     results: List[Dict[str, Any]] = []
     weekday_labels = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
@@ -247,17 +223,303 @@ def compute_weekly_metrics(
     return results
 
 
-def recompute_daily_metrics(user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
-    entries = queries.fetch_entries_for_range(user_id=user_id, start=start, end=end)
-    daily_records = compute_daily_metrics(entries)
+def _daily_as_rollup(record: Mapping[str, Any]) -> Dict[str, Any]:
+    """Express a daily row in the same shape as a monthly/yearly rollup row."""
+    message_count = int(record.get("message_count") or 0)
+    avg_sentiment = record.get("avg_sentiment")
+    return {
+        "avg_sentiment": avg_sentiment,
+        "emotion_counts": record.get("emotion_counts") or {},
+        "message_count": message_count,
+        "active_days": 1 if message_count else 0,
+        "avg_entry_length": record.get("avg_entry_length"),
+        "sentiment_days": 1 if avg_sentiment is not None else 0,
+        "daily_sentiment_mean": avg_sentiment,
+        "volatility": 0.0,
+        "time_buckets": record.get("time_buckets") or {},
+    }
+
+
+def _merge_rollups(rows: Sequence[Mapping[str, Any]]) -> Dict[str, Any]:
+    """Combine rollup rows into one, weighting means by their message counts.
+
+    Volatility is the population standard deviation of per-day average sentiment,
+    pooled from each row's day count, mean and variance so that a yearly value is
+    identical to one computed straight from the daily rows.
+    """
+    emotion_counts: Counter[str] = Counter()
+    bucket_counts: Counter[str] = Counter()
+    bucket_sentiment_totals: Dict[str, float] = defaultdict(float)
+    bucket_sentiment_counts: Counter[str] = Counter()
+    message_count = 0
+    active_days = 0
+    sentiment_total = 0.0
+    sentiment_weight = 0
+    length_total = 0.0
+    length_weight = 0
+    sentiment_days = 0
+    day_mean_total = 0.0
+    day_square_total = 0.0
+
+    for row in rows:
+        count = int(row.get("message_count") or 0)
+        message_count += count
+        active_days += int(row.get("active_days") or 0)
+        emotion_counts.update({str(k): int(v) for k, v in (row.get("emotion_counts") or {}).items()})
+
+        if row.get("avg_sentiment") is not None and count:
+            sentiment_total += float(row["avg_sentiment"]) * count
+            sentiment_weight += count
+        if row.get("avg_entry_length") is not None and count:
+            length_total += float(row["avg_entry_length"]) * count
+            length_weight += count
+
+        days = int(row.get("sentiment_days") or 0)
+        if days and row.get("daily_sentiment_mean") is not None:
+            mean = float(row["daily_sentiment_mean"])
+            variance = float(row.get("volatility") or 0.0) ** 2
+            sentiment_days += days
+            day_mean_total += days * mean
+            day_square_total += days * (variance + mean * mean)
+
+        for bucket, stats in (row.get("time_buckets") or {}).items():
+            bucket_count = int((stats or {}).get("message_count") or 0)
+            bucket_counts[bucket] += bucket_count
+            bucket_sentiment = (stats or {}).get("avg_sentiment")
+            if bucket_sentiment is not None and bucket_count:
+                bucket_sentiment_totals[bucket] += float(bucket_sentiment) * bucket_count
+                bucket_sentiment_counts[bucket] += bucket_count
+
+    daily_sentiment_mean = day_mean_total / sentiment_days if sentiment_days else None
+    volatility = 0.0
+    if sentiment_days > 1 and daily_sentiment_mean is not None:
+        volatility = sqrt(max(day_square_total / sentiment_days - daily_sentiment_mean**2, 0.0))
+
+    counts = dict(emotion_counts)
+    return {
+        "avg_sentiment": sentiment_total / sentiment_weight if sentiment_weight else None,
+        "top_emotion": max(counts.items(), key=lambda item: item[1])[0] if counts else None,
+        "emotion_counts": counts,
+        "message_count": message_count,
+        "active_days": active_days,
+        "avg_entry_length": length_total / length_weight if length_weight else None,
+        "sentiment_days": sentiment_days,
+        "daily_sentiment_mean": daily_sentiment_mean,
+        "volatility": volatility,
+        "time_buckets": {
+            bucket: {
+                "message_count": count,
+                "avg_sentiment": bucket_sentiment_totals[bucket] / bucket_sentiment_counts[bucket]
+                if bucket_sentiment_counts[bucket]
+                else None,
+            }
+            for bucket, count in bucket_counts.items()
+        },
+    }
+
+
+def compute_monthly_metrics(daily_metrics: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    groups: Dict[Tuple[str, date], List[Dict[str, Any]]] = defaultdict(list)
+    for record in daily_metrics:
+        user_id = record.get("user_id")
+        if not user_id or not record.get("date"):
+            continue
+        month_start, _ = _month_bounds(_parse_date(record["date"]))
+        groups[(user_id, month_start)].append(_daily_as_rollup(record))
+
+    results: List[Dict[str, Any]] = []
+    for (user_id, month_start), rows in sorted(groups.items(), key=lambda item: item[0][1]):
+        _, month_end = _month_bounds(month_start)
+        results.append(
+            {
+                "user_id": user_id,
+                "month_start": month_start.isoformat(),
+                "month_end": month_end.isoformat(),
+                **_merge_rollups(rows),
+            }
+        )
+    return results
+
+
+def compute_yearly_metrics(monthly_metrics: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    groups: Dict[Tuple[str, date], List[Mapping[str, Any]]] = defaultdict(list)
+    for record in monthly_metrics:
+        user_id = record.get("user_id")
+        if not user_id or not record.get("month_start"):
+            continue
+        year_start, _ = _year_bounds(_parse_date(record["month_start"]))
+        groups[(user_id, year_start)].append(record)
+
+    results: List[Dict[str, Any]] = []
+    for (user_id, year_start), rows in sorted(groups.items(), key=lambda item: item[0][1]):
+        _, year_end = _year_bounds(year_start)
+        results.append(
+            {
+                "user_id": user_id,
+                "year_start": year_start.isoformat(),
+                "year_end": year_end.isoformat(),
+                **_merge_rollups(rows),
+            }
+        )
+    return results
+
+
+def refresh_rollups(daily_records: Sequence[Mapping[str, Any]]) -> Dict[str, int]:
+    """Rebuild the monthly and yearly rows touched by freshly upserted daily rows.
+
+    Only the months (and then years) that contain one of ``daily_records`` are
+    recomputed, each from the stored rows one level below.
+    """
+    months_by_user: Dict[str, set[date]] = defaultdict(set)
+    for record in daily_records:
+        user_id = record.get("user_id")
+        if user_id and record.get("date"):
+            months_by_user[user_id].add(_month_bounds(_parse_date(record["date"]))[0])
+
+    monthly_records: List[Dict[str, Any]] = []
+    for user_id, months in months_by_user.items():
+        daily_rows = queries.get_daily_metrics(
+            user_id, min(months), _month_bounds(max(months))[1]
+        )
+        monthly_records.extend(
+            record
+            for record in compute_monthly_metrics(daily_rows)
+            if _parse_date(record["month_start"]) in months
+        )
+    queries.upsert_monthly_metrics(monthly_records)
+
+    yearly_records: List[Dict[str, Any]] = []
+    for user_id, months in months_by_user.items():
+        years = {_year_bounds(month)[0] for month in months}
+        monthly_rows = queries.get_monthly_metrics(
+            user_id, min(years), max(years).replace(month=12)
+        )
+        yearly_records.extend(
+            record
+            for record in compute_yearly_metrics(monthly_rows)
+            if _parse_date(record["year_start"]) in years
+        )
+    queries.upsert_yearly_metrics(yearly_records)
+
+    return {"monthly": len(monthly_records), "yearly": len(yearly_records)}
+
+
+DEFAULT_ROLLING_WINDOWS: Tuple[int, ...] = (7, 14, 30)
+
+
+def compute_rolling_metrics(
+    daily_metrics: Sequence[Mapping[str, Any]],
+    start: date,
+    end: date,
+    *,
+    windows: Sequence[int] = DEFAULT_ROLLING_WINDOWS,
+    ewma_span: int = 7,
+) -> List[Dict[str, Any]]:
+    """Rolling mean/volatility of daily average sentiment plus an EWMA, per day.
+
+    The daily series is laid out densely from ``start - (max(windows) - 1)`` so the
+    first reported day already has a full look-back. Prefix sums of count, value
+    and value squared give every window in O(1), making the whole pass O(days).
+    Windows are calendar days; days without entries are skipped, not zero-filled.
+    """
+    if start > end:
+        return []
+    max_window = max(windows) if windows else 1
+    origin = start - timedelta(days=max_window - 1)
+    span = (end - origin).days + 1
+
+    values: List[Optional[float]] = [None] * span
+    counts: List[int] = [0] * span
+    for record in daily_metrics:
+        if not record.get("date"):
+            continue
+        index = (_parse_date(record["date"]) - origin).days
+        if 0 <= index < span:
+            counts[index] = int(record.get("message_count") or 0)
+            if record.get("avg_sentiment") is not None:
+                values[index] = float(record["avg_sentiment"])
+
+    prefix_n = [0] * (span + 1)
+    prefix_sum = [0.0] * (span + 1)
+    prefix_sq = [0.0] * (span + 1)
+    for index, value in enumerate(values):
+        count, total, squares = prefix_n[index], prefix_sum[index], prefix_sq[index]
+        if value is not None:
+            count, total, squares = count + 1, total + value, squares + value * value
+        prefix_n[index + 1], prefix_sum[index + 1], prefix_sq[index + 1] = count, total, squares
+
+    alpha = 2.0 / (ewma_span + 1)
+    ewma: Optional[float] = None
+    first_reported = max_window - 1
+    results: List[Dict[str, Any]] = []
+    for index, value in enumerate(values):
+        if value is not None:
+            ewma = value if ewma is None else alpha * value + (1 - alpha) * ewma
+        if index < first_reported:
+            continue
+
+        row: Dict[str, Any] = {
+            "date": (origin + timedelta(days=index)).isoformat(),
+            "avg_sentiment": value,
+            "message_count": counts[index],
+            "ewma": ewma,
+        }
+        for window in windows:
+            lo = max(index + 1 - window, 0)
+            n = prefix_n[index + 1] - prefix_n[lo]
+            if n == 0:
+                row[f"mean_{window}d"] = None
+                row[f"volatility_{window}d"] = None
+                continue
+            mean = (prefix_sum[index + 1] - prefix_sum[lo]) / n
+            variance = (prefix_sq[index + 1] - prefix_sq[lo]) / n - mean * mean
+            row[f"mean_{window}d"] = mean
+            row[f"volatility_{window}d"] = sqrt(max(variance, 0.0)) if n > 1 else 0.0
+        results.append(row)
+    return results
+
+
+ProgressCallback = Callable[..., None]
+
+
+def _noop_progress(progress: float, rows: Optional[Dict[str, int]] = None) -> None:
+    return None
+
+
+def recompute_daily_metrics(
+    user_id: str,
+    start: datetime,
+    end: datetime,
+    *,
+    progress: ProgressCallback = _noop_progress,
+) -> List[Dict[str, Any]]:
+    # Aggregated in Postgres (migration 009); only one row per day comes back.
+    daily_records = queries.aggregate_daily_metrics(user_id, start=start, end=end)
+    progress(0.4, {"entries": sum(record["message_count"] for record in daily_records)})
     queries.upsert_daily_metrics(daily_records)
+    progress(0.7, {"daily": len(daily_records)})
+    progress(0.9, refresh_rollups(daily_records))
+    progress(1.0, {"anomalies": len(anomalies.observe_daily(daily_records))})
     return daily_records
 
 
-def recompute_weekly_metrics(user_id: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
-    entries = queries.fetch_entries_for_range(user_id=user_id, start=start, end=end)
+def recompute_weekly_metrics(
+    user_id: str,
+    start: datetime,
+    end: datetime,
+    *,
+    progress: ProgressCallback = _noop_progress,
+) -> List[Dict[str, Any]]:
+    entries = normalize_entries(
+        queries.fetch_entries_for_range(user_id=user_id, start=start, end=end, projection="analytics")
+    )
+    progress(0.4, {"entries": len(entries)})
     daily_records = compute_daily_metrics(entries)
     queries.upsert_daily_metrics(daily_records)
+    progress(0.6, {"daily": len(daily_records)})
+    progress(0.7, refresh_rollups(daily_records))
+    progress(0.8, {"anomalies": len(anomalies.observe_daily(daily_records))})
     weekly_records = compute_weekly_metrics(entries, daily_records)
     queries.upsert_weekly_metrics(weekly_records)
+    progress(1.0, {"weekly": len(weekly_records)})
     return weekly_records
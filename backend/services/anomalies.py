@@ -0,0 +1,233 @@
+"""Streaming sentiment anomaly detection.
+
+Each user keeps two exponentially weighted detectors: one fed every entry's
+sentiment as it is written and one fed each completed day's average. Updates are
+O(1) and the state is four numbers, persisted in ``anomaly_detector_state``.
+Flagged observations land in ``sentiment_anomalies`` for the API and the weekly
+report to read.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import UTC, date, datetime, time
+from math import sqrt
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from ..db import queries
+from .normalized import parse_created_at
+
+
+logger = logging.getLogger(__name__)
+
+ALPHA = 0.1
+THRESHOLD = 2.5
+WARMUP = {"entry": 10, "day": 7}
+# Keeps a perfectly flat history from producing infinite z-scores.
+MIN_VARIANCE = 1e-4
+# Compare-and-swap rounds before a contended entry observation is dropped.
+MAX_STATE_ATTEMPTS = 5
+
+
+class EwmaDetector:
+    """Exponentially weighted running mean and variance with z-score flagging."""
+
+    __slots__ = ("mean", "variance", "count", "last_observed")
+
+    def __init__(
+        self,
+        mean: float = 0.0,
+        variance: float = 0.0,
+        count: int = 0,
+        last_observed: Optional[datetime] = None,
+    ) -> None:
+        self.mean = mean
+        self.variance = variance
+        self.count = count
+        self.last_observed = last_observed
+
+    @classmethod
+    def from_record(cls, record: Optional[Mapping[str, Any]]) -> "EwmaDetector":
+        if not record:
+            return cls()
+        return cls(
+            mean=float(record.get("mean") or 0.0),
+            variance=float(record.get("variance") or 0.0),
+            count=int(record.get("count") or 0),
+            last_observed=parse_created_at(record.get("last_observed")),
+        )
+
+    def to_record(self, user_id: str, kind: str) -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "kind": kind,
+            "mean": self.mean,
+            "variance": self.variance,
+            "count": self.count,
+            "last_observed": self.last_observed.isoformat() if self.last_observed else None,
+            "updated_at": datetime.now(UTC).isoformat(),
+        }
+
+    def update(
+        self,
+        value: float,
+        *,
+        alpha: float = ALPHA,
+        threshold: float = THRESHOLD,
+        warmup: int = 10,
+    ) -> Optional[float]:
+        """Fold ``value`` into the state; return its z-score if it is anomalous.
+
+        The z-score is taken against the state *before* the update so a spike
+        cannot dampen its own score.
+        """
+        zscore: Optional[float] = None
+        if self.count >= warmup:
+            zscore = (value - self.mean) / sqrt(max(self.variance, MIN_VARIANCE))
+
+        if self.count == 0:
+            self.mean = value
+            self.variance = 0.0
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+        if zscore is not None and abs(zscore) >= threshold:
+            return zscore
+        return None
+
+
+def _anomaly_record(
+    user_id: str,
+    kind: str,
+    observed_at: datetime,
+    value: float,
+    zscore: float,
+    baseline_mean: float,
+    entry_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    return {
+        "user_id": user_id,
+        "kind": kind,
+        "observed_at": observed_at.isoformat(),
+        "value": value,
+        "zscore": zscore,
+        "baseline_mean": baseline_mean,
+        "entry_id": entry_id,
+    }
+
+
+def observe_entry(entry: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """Feed a freshly written entry to its user's entry-level detector.
+
+    Concurrent writes for one user race on the same state row, so the update is
+    a compare-and-swap on ``last_observed``: a writer that loses re-reads the
+    state and folds its value into the winner's.
+    """
+    user_id = entry.get("user_id")
+    sentiment = entry.get("sentiment_score")
+    observed_at = parse_created_at(entry.get("created_at"))
+    if not user_id or sentiment is None or observed_at is None:
+        return None
+
+    for _ in range(MAX_STATE_ATTEMPTS):
+        state = queries.get_anomaly_state(user_id, "entry")
+        detector = EwmaDetector.from_record(state)
+        if detector.last_observed is not None and observed_at <= detector.last_observed:
+            return None
+
+        baseline_mean = detector.mean
+        zscore = detector.update(float(sentiment), warmup=WARMUP["entry"])
+        detector.last_observed = observed_at
+        previous = state.get("last_observed") if state else None
+        if queries.swap_anomaly_state(detector.to_record(user_id, "entry"), previous_observed=previous):
+            break
+    else:
+        logger.warning("anomalies.state_contended", extra={"user_id": user_id, "kind": "entry"})
+        return None
+
+    if zscore is None:
+        return None
+    record = _anomaly_record(
+        user_id, "entry", observed_at, float(sentiment), zscore, baseline_mean, entry.get("id")
+    )
+    queries.insert_anomalies([record])
+    return record
+
+
+def observe_entry_safely(entry: Mapping[str, Any]) -> None:
+    """Background-task wrapper: detection must never break the write path."""
+    try:
+        observe_entry(entry)
+    except Exception:  # pragma: no cover - best effort side channel
+        logger.warning("anomalies.observe_entry_failed", exc_info=True)
+
+
+def observe_daily(
+    daily_records: Sequence[Mapping[str, Any]], *, today: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """Feed completed days (strictly before ``today``) to each user's day detector.
+
+    Days at or before the detector's ``last_observed`` are skipped, so replaying
+    the same daily rows (recomputes, DAG retries) is idempotent.
+    """
+    today = today or datetime.now(UTC).date()
+    by_user: Dict[str, List[tuple[date, float]]] = defaultdict(list)
+    for record in daily_records:
+        user_id = record.get("user_id")
+        if not user_id or record.get("avg_sentiment") is None or not record.get("date"):
+            continue
+        day = date.fromisoformat(str(record["date"])[:10])
+        if day < today:
+            by_user[user_id].append((day, float(record["avg_sentiment"])))
+
+    flagged: List[Dict[str, Any]] = []
+    for user_id, days in by_user.items():
+        detector = EwmaDetector.from_record(queries.get_anomaly_state(user_id, "day"))
+        changed = False
+        for day, value in sorted(days):
+            observed_at = datetime.combine(day, time.min, tzinfo=UTC)
+            if detector.last_observed is not None and observed_at <= detector.last_observed:
+                continue
+            baseline_mean = detector.mean
+            zscore = detector.update(value, warmup=WARMUP["day"])
+            detector.last_observed = observed_at
+            changed = True
+            if zscore is not None:
+                flagged.append(
+                    _anomaly_record(user_id, "day", observed_at, value, zscore, baseline_mean)
+                )
+        if changed:
+            queries.save_anomaly_state(detector.to_record(user_id, "day"))
+
+    queries.insert_anomalies(flagged)
+    return flagged
+
+
+def weekly_spikes(user_id: str, week_start: date, week_end: date) -> Optional[List[Dict[str, Any]]]:
+    """Day-level anomalies for the week in the report's spike format.
+
+    Returns ``None`` while the detector is still warming up so callers can fall
+    back to rescanning the week.
+    """
+    state = queries.get_anomaly_state(user_id, "day")
+    if not state or int(state.get("count") or 0) < WARMUP["day"]:
+        return None
+    records = queries.list_anomalies(
+        user_id,
+        since=datetime.combine(week_start, time.min, tzinfo=UTC),
+        until=datetime.combine(week_end, time.max, tzinfo=UTC),
+        kind="day",
+    )
+    return [
+        {
+            "date": str(record["observed_at"])[:10],
+            "avg_sentiment": float(record["value"]),
+            "zscore": float(record["zscore"]),
+        }
+        for record in sorted(records, key=lambda item: str(item["observed_at"]))
+    ]
@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import hashlib
+import secrets
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, cast
 
 import jwt
 from fastapi import Cookie, Depends, HTTPException, status
@@ -10,6 +15,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 
 from ..core import get_settings
+from ..core.cache import LRUCache
 
 
 bearer_scheme = HTTPBearer(auto_error=False)
@@ -22,6 +28,70 @@ class AuthenticatedUser(BaseModel):
     raw: Dict[str, Any]
 
 
+class VerifiedTokenCache:
+    """Users of already verified tokens, keyed by a SHA-256 of the token.
+
+    An entry lives until ``exp`` minus ``skew_seconds`` and is checked against
+    the wall clock on every hit, so a cached token is never accepted past its
+    expiry. Failed verifications are not cached.
+    """
+
+    def __init__(self, maxsize: int, skew_seconds: float) -> None:
+        self.skew_seconds = skew_seconds
+        self._entries = LRUCache(maxsize, ttl_seconds=0)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        if not self._entries.maxsize:
+            return None
+        key = self._key(token)
+        entry = self._entries.get(key, None)
+        if entry is not None and time.time() < entry[0]:
+            with self._lock:
+                self.hits += 1
+            return cast(AuthenticatedUser, entry[1])
+        if entry is not None:
+            self._entries.pop(key)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, token: str, user: AuthenticatedUser, expires_at: Any) -> None:
+        try:
+            valid_until = float(expires_at) - self.skew_seconds
+        except (TypeError, ValueError):
+            return
+        ttl = valid_until - time.time()
+        if self._entries.maxsize and ttl > 0:
+            self._entries.set(self._key(token), (valid_until, user), ttl_seconds=ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "avoided_verifications": self.hits,
+            "verifications": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+@lru_cache(maxsize=1)
+def get_token_cache() -> VerifiedTokenCache:
+    settings = get_settings()
+    return VerifiedTokenCache(settings.auth_token_cache_size, settings.auth_token_cache_skew_seconds)
+
+
 def _decode_token(token: str) -> Dict[str, Any]:
     settings = get_settings()
     audience = settings.supabase_jwt_audience
@@ -85,6 +155,11 @@ def get_current_user(
             detail="Authentication credentials missing.",
         )
 
+    cache = get_token_cache()
+    cached = cache.get(token)
+    if cached is not None:
+        return cached
+
     payload = _decode_token(token)
     user_id = payload.get("sub") or payload.get("user_id")
     if not user_id:
@@ -93,8 +168,29 @@ def get_current_user(
             detail="Supabase token missing subject.",
         )
 
-    return AuthenticatedUser(
+    user = AuthenticatedUser(
         id=user_id,
         email=payload.get("email"),
         raw=payload,
     )
+    cache.put(token, user, payload.get("exp"))
+    return user
+
+
+def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> None:
+    """Guard operator endpoints with the ``METRICS_TOKEN`` bearer token.
+
+    Without a configured token the endpoint is not served at all.
+    """
+    expected = get_settings().metrics_token
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    supplied = credentials.credentials if credentials and credentials.scheme.lower() == "bearer" else ""
+    if not secrets.compare_digest(supplied.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -2,30 +2,15 @@
 
 from __future__ import annotations
 
+import heapq
 from collections import Counter, defaultdict
-from datetime import datetime
-from typing import Any, Dict, Iterable, List, Sequence
+from operator import itemgetter
+from typing import Any, Dict, List, Sequence
 
-from .triggers import tokenize
+from .normalized import EntryLike, batch_vocabulary, normalize_entries
 
 
-def _parse_created_at(value: Any) -> datetime:
-    if isinstance(value, datetime):
-        return value
-    if isinstance(value, str):
-        try:
-            return datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except ValueError:
-            pass
-    raise ValueError("Unsupported created_at format.")
-
-
-def _top_emotion(emotions: Iterable[Dict[str, Any]]) -> str:
-    items = sorted(emotions, key=lambda item: item.get("score", 0), reverse=True)
-    return (items[0].get("label") if items else "neutral") or "neutral"
-
-
-def summarize_entries(entries: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+def summarize_entries(entries: Sequence[EntryLike]) -> Dict[str, Any]:
     if not entries:
         return {
             "top_emotions": [],
@@ -36,19 +21,22 @@ def summarize_entries(entries: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
 
     emotion_totals: Counter[str] = Counter()
     daily_emotions: Dict[str, Counter[str]] = defaultdict(Counter)
-    keyword_counter: Counter[str] = Counter()
-
-    for entry in entries:
-        created_at = _parse_created_at(entry.get("created_at"))
-        day_key = created_at.date().isoformat()
-        emotions = entry.get("emotion_json") or []
-        top_label = _top_emotion(emotions).lower()
+    keyword_counter: Dict[int, float] = defaultdict(float)
+
+    normalized = normalize_entries(entries)
+    vocabulary = batch_vocabulary(normalized)
+    for entry in normalized:
+        if entry.created_at is None:
+            continue
+        day_key = entry.created_at.date().isoformat()
+        top_label = entry.top_label or "neutral"
         emotion_totals[top_label] += 1
         daily_emotions[day_key][top_label] += 1
 
-        keyword_counter.update(tokenize(entry.get("text", "")))
-        for tag in entry.get("tags") or []:
-            keyword_counter[tag.lower()] += 0.5
+        for identifier in entry.token_ids:
+            keyword_counter[identifier] += 1
+        for tag in entry.tags:
+            keyword_counter[vocabulary.token_id(tag)] += 0.5
 
     total = sum(emotion_totals.values()) or 1
     top_emotions = [
@@ -58,7 +46,7 @@ def summarize_entries(entries: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
 
     trend: List[Dict[str, Any]] = []
     for day in sorted(daily_emotions.keys()):
-        data = {"date": day}
+        data: Dict[str, Any] = {"date": day}
         total_day = sum(daily_emotions[day].values()) or 1
         for label, count in daily_emotions[day].items():
             data[label] = round(count / total_day, 3)
@@ -73,8 +61,8 @@ def summarize_entries(entries: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
     ]
 
     keywords = [
-        {"word": word, "count": int(count)}
-        for word, count in keyword_counter.most_common(20)
+        {"word": vocabulary.token_text(identifier), "count": int(count)}
+        for identifier, count in heapq.nlargest(20, keyword_counter.items(), key=itemgetter(1))
     ]
 
     return {
@@ -0,0 +1,188 @@
+"""In-process background job runner for heavy analytics recomputes.
+
+Jobs are keyed by ``(user_id, kind, scope)``: submitting while an identical job is
+still queued or running joins that job instead of starting a second scan. Work
+runs on a bounded thread pool so request threads never block on bulk reads.
+Shutting the manager down cancels queued jobs; jobs still running when it
+returns are reported as cancelled, since nothing will observe their outcome.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..core import get_settings
+from ..db.loader import query_scope
+
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = frozenset({"queued", "running"})
+FINISHED_JOB_TTL_SECONDS = 3600
+MAX_FINISHED_JOBS = 1000
+
+
+class Job:
+    """Mutable status record for one background job."""
+
+    def __init__(self, *, user_id: str, kind: str, scope: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.kind = kind
+        self.scope = scope
+        self.status = "queued"
+        self.progress = 0.0
+        self.rows: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(UTC)
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._finished_monotonic: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.user_id, self.kind, self.scope)
+
+    def report(self, progress: float, rows: Optional[Dict[str, int]] = None) -> None:
+        """Progress callback handed to the job function."""
+        with self._lock:
+            self.progress = max(self.progress, min(1.0, float(progress)))
+            if rows:
+                self.rows.update(rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "scope": self.scope,
+                "status": self.status,
+                "progress": round(self.progress, 3),
+                "rows": dict(self.rows),
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            }
+
+
+JobFunction = Callable[[Job], Optional[Dict[str, int]]]
+
+
+class JobManager:
+    """Deduplicating job registry backed by a fixed-size worker pool."""
+
+    def __init__(self, max_workers: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="echo-job")
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Tuple[str, str, str], Job] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def submit(self, *, user_id: str, kind: str, scope: str, func: JobFunction) -> Tuple[Job, bool]:
+        """Enqueue ``func`` unless an identical job is active; return ``(job, created)``."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Job manager is shut down.")
+            self._prune()
+            existing = self._active.get((user_id, kind, scope))
+            if existing is not None and existing.status in ACTIVE_STATUSES:
+                return existing, False
+            job = Job(user_id=user_id, kind=kind, scope=scope)
+            self._jobs[job.id] = job
+            self._active[job.key] = job
+        self._executor.submit(self._run, job, func)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, func: JobFunction) -> None:
+        with job._lock:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started_at = datetime.now(UTC)
+        try:
+            # Executor threads start with an empty context: give each job its own memo.
+            with query_scope():
+                rows = func(job)
+        except Exception as exc:
+            logger.exception(
+                "job.failed",
+                extra={"job_id": job.id, "kind": job.kind, "scope": job.scope},
+            )
+            with job._lock:
+                if job.status == "running":
+                    job.status = "failed"
+                    job.error = exc.__class__.__name__
+        else:
+            with job._lock:
+                if rows:
+                    job.rows.update(rows)
+                if job.status == "running":
+                    job.progress = 1.0
+                    job.status = "succeeded"
+        finally:
+            with job._lock:
+                if job.finished_at is None:
+                    job.finished_at = datetime.now(UTC)
+                    job._finished_monotonic = time.monotonic()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        finished = [
+            job
+            for job in self._jobs.values()
+            if job._finished_monotonic is not None
+        ]
+        expired = {
+            job.id
+            for job in finished
+            if now - (job._finished_monotonic or now) > FINISHED_JOB_TTL_SECONDS
+        }
+        if len(finished) - len(expired) > MAX_FINISHED_JOBS:
+            remaining = sorted(
+                (job for job in finished if job.id not in expired),
+                key=lambda job: job._finished_monotonic or now,
+            )
+            expired.update(job.id for job in remaining[: len(remaining) - MAX_FINISHED_JOBS])
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs, drop queued ones and mark unfinished jobs cancelled.
+
+        With ``wait`` the jobs already running are allowed to finish first.
+        """
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            unfinished = list(self._active.values())
+            self._active.clear()
+        for job in unfinished:
+            with job._lock:
+                if job.status not in ACTIVE_STATUSES:
+                    continue
+                job.status = "cancelled"
+                job.error = "shutdown"
+                job.finished_at = datetime.now(UTC)
+                job._finished_monotonic = time.monotonic()
+
+
+@lru_cache(maxsize=1)
+def get_job_manager() -> JobManager:
+    return JobManager(max_workers=get_settings().recompute_workers)
@@ -0,0 +1,210 @@
+"""Parse-once, compact representation of journal entries for analytics services.
+
+Rows fetched from Supabase are dictionaries that carry the full text, embedding
+and raw ``emotion_json``. Every aggregation helper used to re-parse timestamps
+and re-scan the emotions of the same rows; :func:`normalize_entries` does that
+work once per fetched row so the results can be shared across services.
+"""
+
+from __future__ import annotations
+
+import copy
+from array import array
+from datetime import date, datetime
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from . import metrics
+from .tokens import TOKENIZER_VERSION, Vocabulary, current_vocabulary, tokenize
+
+
+class NormalizedEntry:
+    """Slot-based view of an entry with every derived field precomputed."""
+
+    __slots__ = (
+        "id",
+        "user_id",
+        "created_at",
+        "day_ordinal",
+        "top_label",
+        "top_score",
+        "sentiment",
+        "length",
+        "bucket",
+        "weekday",
+        "tags",
+        "token_ids",
+        "vocabulary",
+        "_token_set",
+    )
+
+    def __init__(
+        self,
+        *,
+        id: Optional[str],
+        user_id: Optional[str],
+        created_at: Optional[datetime],
+        top_label: Optional[str],
+        top_score: float,
+        sentiment: Optional[float],
+        length: int,
+        bucket: Optional[str],
+        weekday: Optional[int],
+        tags: Tuple[str, ...],
+        token_ids: array,
+        vocabulary: Vocabulary,
+    ) -> None:
+        self.id = id
+        self.user_id = user_id
+        self.created_at = created_at
+        self.day_ordinal = created_at.toordinal() if created_at is not None else None
+        self.top_label = top_label
+        self.top_score = top_score
+        self.sentiment = sentiment
+        self.length = length
+        self.bucket = bucket
+        self.weekday = weekday
+        self.tags = tags
+        self.token_ids = token_ids
+        self.vocabulary = vocabulary
+        self._token_set: Optional[frozenset[int]] = None
+
+    @property
+    def day(self) -> Optional[date]:
+        return date.fromordinal(self.day_ordinal) if self.day_ordinal is not None else None
+
+    @property
+    def token_set(self) -> frozenset[int]:
+        """Distinct token ids, built lazily for membership tests."""
+        if self._token_set is None:
+            self._token_set = frozenset(self.token_ids)
+        return self._token_set
+
+    @property
+    def tokens(self) -> List[str]:
+        return [self.vocabulary.token_text(identifier) for identifier in self.token_ids]
+
+    def encoded_with(self, vocabulary: Vocabulary) -> "NormalizedEntry":
+        """This entry with its token ids issued by ``vocabulary``."""
+        if vocabulary is self.vocabulary:
+            return self
+        entry = copy.copy(self)
+        entry.token_ids = vocabulary.encode(self.tokens)
+        entry.vocabulary = vocabulary
+        entry._token_set = None
+        return entry
+
+    def __repr__(self) -> str:  # pragma: no cover - debugging helper
+        return (
+            f"NormalizedEntry(id={self.id!r}, user_id={self.user_id!r}, "
+            f"created_at={self.created_at!r}, top_label={self.top_label!r})"
+        )
+
+
+EntryLike = Union[Mapping[str, Any], NormalizedEntry]
+
+
+def parse_created_at(value: Any) -> Optional[datetime]:
+    """Parse a Supabase timestamp into an aware UTC datetime (``None`` if unusable)."""
+    if isinstance(value, datetime):
+        return metrics.ensure_utc(value)
+    if isinstance(value, str) and value:
+        try:
+            return metrics.ensure_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            return None
+    return None
+
+
+def _top_emotion(emotions: Any) -> Tuple[Optional[str], float]:
+    best_label: Optional[str] = None
+    best_score = float("-inf")
+    if not isinstance(emotions, Iterable) or isinstance(emotions, (str, bytes)):
+        return None, 0.0
+    for emotion in emotions:
+        if not isinstance(emotion, Mapping):
+            continue
+        label = str(emotion.get("label") or "neutral").lower() or "neutral"
+        try:
+            score = float(emotion.get("score", 0.0))
+        except (TypeError, ValueError):
+            score = 0.0
+        if score > best_score:
+            best_label, best_score = label, score
+    if best_label is None:
+        return None, 0.0
+    return best_label, best_score
+
+
+def normalize_entry(row: EntryLike, vocabulary: Optional[Vocabulary] = None) -> NormalizedEntry:
+    """Build a :class:`NormalizedEntry` from a raw Supabase row.
+
+    Token ids come from ``vocabulary`` (the current shared one by default).
+    """
+    if isinstance(row, NormalizedEntry):
+        return row if vocabulary is None else row.encoded_with(vocabulary)
+    if vocabulary is None:
+        vocabulary = current_vocabulary()
+
+    created_at = parse_created_at(row.get("created_at"))
+    emotions = row.get("emotion_json") or []
+    top_label, top_score = _top_emotion(emotions)
+
+    sentiment = row.get("sentiment_score")
+    if sentiment is None and emotions:
+        sentiment = metrics.sentiment_from_emotions(emotions)
+
+    text = row.get("text") or ""
+    length = row.get("entry_length")
+    if length is None:
+        length = metrics.calculate_entry_length(text)
+
+    bucket = row.get("time_of_day")
+    weekday = row.get("weekday")
+    if created_at is not None:
+        bucket = bucket or metrics.bucket_time_of_day(created_at)
+        if weekday is None:
+            weekday = metrics.weekday_index(created_at)
+
+    tags = tuple(str(tag).lower() for tag in row.get("tags") or [] if isinstance(tag, str))
+
+    tokens = row.get("tokens")
+    if tokens is None or row.get("tokens_version") != TOKENIZER_VERSION:
+        tokens = tokenize(text)
+
+    return NormalizedEntry(
+        id=row.get("id"),
+        user_id=row.get("user_id"),
+        created_at=created_at,
+        top_label=top_label,
+        top_score=top_score,
+        sentiment=float(sentiment) if sentiment is not None else None,
+        length=int(length),
+        bucket=bucket,
+        weekday=int(weekday) if weekday is not None else None,
+        tags=tags,
+        token_ids=vocabulary.encode(tokens),
+        vocabulary=vocabulary,
+    )
+
+
+def normalize_entries(
+    rows: Iterable[EntryLike], vocabulary: Optional[Vocabulary] = None
+) -> List[NormalizedEntry]:
+    """Normalize every row once, with token ids from a single vocabulary.
+
+    Already-normalized entries are passed through. The batch reuses the
+    vocabulary of the first such entry unless one is given, so ids from every
+    returned entry can be compared and decoded with :func:`batch_vocabulary`.
+    """
+    items = [row for row in rows if row]
+    if vocabulary is None:
+        vocabulary = next(
+            (row.vocabulary for row in items if isinstance(row, NormalizedEntry)), None
+        ) or current_vocabulary()
+    return [normalize_entry(row, vocabulary) for row in items]
+
+
+def batch_vocabulary(entries: Sequence[NormalizedEntry]) -> Vocabulary:
+    """Vocabulary that issued the token ids of a :func:`normalize_entries` batch."""
+    return entries[0].vocabulary if entries else current_vocabulary()
+
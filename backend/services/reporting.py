@@ -4,51 +4,47 @@ from __future__ import annotations
 
 from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Sequence
+from typing import Any, Dict, List, Mapping, MutableMapping, Sequence
 
-from .triggers import tokenize
+from .normalized import EntryLike, NormalizedEntry, batch_vocabulary, normalize_entries
 
 
 def _filter_entries_by_user(
-    entries: Sequence[Mapping[str, Any]], user_id: str, week_start: date, week_end: date
-) -> List[Mapping[str, Any]]:
-    filtered: List[Mapping[str, Any]] = []
-    for entry in entries:
-        if entry.get("user_id") != user_id:
-            continue
-        created_at_raw = entry.get("created_at")
-        if not created_at_raw:
-            continue
-        created_at = (
-            created_at_raw
-            if isinstance(created_at_raw, datetime)
-            else datetime.fromisoformat(str(created_at_raw).replace("Z", "+00:00"))
-        )
-        entry_date = created_at.date()
-        if week_start <= entry_date <= week_end:
-            filtered.append(entry)
-    return filtered
+    entries: Sequence[EntryLike], user_id: str, week_start: date, week_end: date
+) -> List[NormalizedEntry]:
+    first_day, last_day = week_start.toordinal(), week_end.toordinal()
+    return [
+        entry
+        for entry in normalize_entries(entries)
+        if entry.user_id == user_id
+        and entry.day_ordinal is not None
+        and first_day <= entry.day_ordinal <= last_day
+    ]
 
 
 def _keyword_stats(
-    entries: Sequence[Mapping[str, Any]], max_terms: int = 30
+    entries: Sequence[NormalizedEntry], max_terms: int = 30
 ) -> List[Dict[str, Any]]:
-    counts: Counter[str] = Counter()
-    sentiment_totals: MutableMapping[str, float] = defaultdict(float)
+    # A term's avg_sentiment is the mean entry sentiment over its occurrences.
+    # Entry sentiment is the normalized one: the stored sentiment_score, else
+    # derived from emotion_json as the daily metrics do, and 0.0 only when an
+    # entry has neither.
+    counts: Counter[int] = Counter()
+    sentiment_totals: MutableMapping[int, float] = defaultdict(float)
     for entry in entries:
-        words = tokenize(entry.get("text", ""))
-        sentiment = float(entry.get("sentiment_score") or 0.0)
-        for word in words:
-            counts[word] += 1
-            sentiment_totals[word] += sentiment
+        sentiment = entry.sentiment or 0.0
+        for identifier in entry.token_ids:
+            counts[identifier] += 1
+            sentiment_totals[identifier] += sentiment
     top_terms = counts.most_common(max_terms)
+    vocabulary = batch_vocabulary(entries)
     return [
         {
-            "term": term,
+            "term": vocabulary.token_text(identifier),
             "count": int(count),
-            "avg_sentiment": sentiment_totals[term] / count if count else 0.0,
+            "avg_sentiment": sentiment_totals[identifier] / count if count else 0.0,
         }
-        for term, count in top_terms
+        for identifier, count in top_terms
     ]
 
 
@@ -104,8 +100,9 @@ def build_weekly_metrics_payload(
     week_end: date,
     weekly_record: Mapping[str, Any],
     previous_week_record: Mapping[str, Any] | None,
-    entries: Sequence[Mapping[str, Any]],
+    entries: Sequence[EntryLike],
     daily_records: Sequence[Mapping[str, Any]],
+    precomputed_spikes: Sequence[Mapping[str, Any]] | None = None,
 ) -> Dict[str, Any]:
     filtered_entries = _filter_entries_by_user(entries, user_id, week_start, week_end)
     emotion_counts = weekly_record.get("emotion_counts") or {}
@@ -125,7 +122,10 @@ def build_weekly_metrics_payload(
         top_emotion = max(emotion_counts.items(), key=lambda item: item[1])[0]
 
     keyword_stats = _keyword_stats(filtered_entries)
-    spikes = _notable_spikes(daily_records, week_start, week_end)
+    if precomputed_spikes is not None:
+        spikes = [dict(spike) for spike in precomputed_spikes]
+    else:
+        spikes = _notable_spikes(daily_records, week_start, week_end)
 
     return {
         "week_range": {"start": week_start.isoformat(), "end": week_end.isoformat()},
@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 from collections import Counter
-from datetime import datetime
 from functools import lru_cache
-from typing import Any, Dict, Iterable, List, Sequence
+from typing import Any, List, Sequence
+
+from .normalized import EntryLike, NormalizedEntry, normalize_entry
 
 
 class WeeklySummarizer:
@@ -55,12 +56,13 @@ class WeeklySummarizer:
         """Kept for compatibility; no heavy model loading required."""
         return None
 
-    def summarize(self, entries: Sequence[Dict[str, Any]], timeframe: str = "week") -> str:
+    def summarize(self, entries: Sequence[EntryLike | str], timeframe: str = "week") -> str:
         if not entries:
             return "No reflections logged yet. Capture a note so Echo can spot your patterns."
 
-        normalized = [self._normalize_entry(item) for item in entries if item]
-        normalized = [item for item in normalized if item]
+        normalized = [
+            entry for entry in (self._normalize_entry(item) for item in entries if item) if entry is not None
+        ]
         if not normalized:
             return "Echo needs a few more reflections with emotion insights to surface guidance."
 
@@ -68,26 +70,25 @@ class WeeklySummarizer:
 
         emotion_counts: Counter[str] = Counter()
         bucket_counts: Counter[str] = Counter()
-        days_active: set[str] = set()
+        days_active: set[int] = set()
         positive_tags: Counter[str] = Counter()
         challenging_tags: Counter[str] = Counter()
         positive_emotions: Counter[str] = Counter()
         challenging_emotions: Counter[str] = Counter()
 
         for entry in normalized:
-            created_at = entry.get("created_at")
-            self._track_day(created_at, days_active)
+            if entry.day_ordinal is not None:
+                days_active.add(entry.day_ordinal)
 
-            label = entry.get("top_emotion_label")
+            label = entry.top_label
             if not label:
                 continue
 
-            label = label.lower()
             emotion_counts[label] += 1
             bucket = self._bucket_for(label)
             bucket_counts[bucket] += 1
 
-            tags = entry.get("tags") or []
+            tags = entry.tags
             if bucket == "positive":
                 positive_emotions[label] += 1
                 positive_tags.update(tags)
@@ -156,49 +157,13 @@ class WeeklySummarizer:
         lines.append(f"Next step • {self._adapt_nudge(nudge, timeframe)}")
         return "\n".join(lines)
 
-    def _normalize_entry(self, item: Any) -> Dict[str, Any] | None:
+    def _normalize_entry(self, item: Any) -> NormalizedEntry | None:
         if isinstance(item, str):
-            text = item.strip()
-            if not text:
-                return None
-            return {
-                "text": text,
-                "top_emotion_label": None,
-                "created_at": None,
-                "tags": [],
-            }
-        if not isinstance(item, dict):
-            return None
-
-        text = str(item.get("text") or "").strip()
-        if not text:
+            return normalize_entry({"text": item}) if item.strip() else None
+        if not isinstance(item, (dict, NormalizedEntry)):
             return None
-
-        emotions = item.get("emotion_json") or []
-        top_label = None
-        top_score = -1.0
-        if isinstance(emotions, Iterable):
-            for emotion in emotions:
-                if not isinstance(emotion, dict):
-                    continue
-                label = str(emotion.get("label") or "").lower()
-                try:
-                    score = float(emotion.get("score", 0))
-                except (TypeError, ValueError):
-                    score = 0.0
-                if label and score > top_score:
-                    top_label = label
-                    top_score = score
-
-        tags_raw = item.get("tags") or []
-        tags = [str(tag).lower() for tag in tags_raw if isinstance(tag, str)]
-
-        return {
-            "text": text,
-            "top_emotion_label": top_label,
-            "created_at": item.get("created_at"),
-            "tags": tags,
-        }
+        entry = normalize_entry(item)
+        return entry if entry.length > 0 else None
 
     def _bucket_for(self, label: str) -> str:
         label_lower = label.lower()
@@ -208,21 +173,6 @@ class WeeklySummarizer:
             return "challenging"
         return "neutral"
 
-    def _track_day(self, created_at: Any, bucket: set[str]) -> None:
-        if not created_at:
-            return
-        if isinstance(created_at, datetime):
-            day = created_at.date().isoformat()
-        elif isinstance(created_at, str):
-            try:
-                parsed = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-            except ValueError:
-                return
-            day = parsed.date().isoformat()
-        else:
-            return
-        bucket.add(day)
-
     def _build_highlight(
         self,
         bucket: str,
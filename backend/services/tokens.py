@@ -0,0 +1,121 @@
+"""Tokenization shared by keyword, trigger and insight helpers."""
+
+from __future__ import annotations
+
+import re
+import threading
+from array import array
+from typing import Dict, Iterable, List
+
+STOPWORDS = {
+    "the",
+    "a",
+    "an",
+    "and",
+    "to",
+    "of",
+    "in",
+    "on",
+    "for",
+    "with",
+    "at",
+    "by",
+    "it",
+    "is",
+    "was",
+    "were",
+    "am",
+    "are",
+    "be",
+    "this",
+    "that",
+    "but",
+    "so",
+    "or",
+    "if",
+    "from",
+    "as",
+    "we",
+    "i",
+    "me",
+    "my",
+    "you",
+    "your",
+}
+
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z']+")
+
+# Bump whenever STOPWORDS, TOKEN_PATTERN or the filter in tokenize() changes so
+# rows tokenized at write time are picked up again by the backfill task.
+TOKENIZER_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = [match.group(0).lower() for match in TOKEN_PATTERN.finditer(text)]
+    return [token for token in tokens if token not in STOPWORDS and len(token) > 2]
+
+
+# Distinct tokens the shared vocabulary interns before new batches start a fresh one.
+MAX_VOCABULARY_SIZE = 200_000
+
+
+class Vocabulary:
+    """Interned token <-> integer id table.
+
+    Ids are only meaningful within the vocabulary that issued them. Holders of
+    ids (normalized entries, compiled trigger matchers) keep a reference to it.
+    """
+
+    __slots__ = ("_ids", "_terms", "_lock", "__weakref__")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._terms)
+
+    def token_id(self, token: str) -> int:
+        """Return the id for ``token``, interning it if new."""
+        existing = self._ids.get(token)
+        if existing is not None:
+            return existing
+        with self._lock:
+            existing = self._ids.get(token)
+            if existing is None:
+                existing = len(self._terms)
+                self._terms.append(token)
+                self._ids[token] = existing
+            return existing
+
+    def token_text(self, identifier: int) -> str:
+        """Return the token string for an id produced by :meth:`token_id`."""
+        return self._terms[identifier]
+
+    def encode(self, tokens: Iterable[str]) -> array:
+        """Encode tokens as a compact unsigned-int array of ids."""
+        return array("I", (self.token_id(token) for token in tokens))
+
+
+_current = Vocabulary()
+_current_lock = threading.Lock()
+
+
+def current_vocabulary() -> Vocabulary:
+    """Vocabulary to encode a new batch of entries with.
+
+    Once the shared vocabulary holds ``MAX_VOCABULARY_SIZE`` tokens it is
+    replaced by an empty one. Batches that already hold the old vocabulary keep
+    using it (and may grow it by their own tokens); it is freed with them. The
+    shared table is therefore bounded by the cap plus the tokens of batches
+    started before the swap, instead of by every word ever seen by the process.
+    """
+    global _current
+    if _current.size >= MAX_VOCABULARY_SIZE:
+        with _current_lock:
+            if _current.size >= MAX_VOCABULARY_SIZE:
+                _current = Vocabulary()
+    return _current
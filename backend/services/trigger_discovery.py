@@ -0,0 +1,186 @@
+"""Statistical discovery of candidate triggers.
+
+Entries become rows of a sparse binary document-term matrix (CSR: ``indptr`` and
+``indices`` numpy arrays) over unigrams and adjacent-token bigrams. Each entry is
+labelled "difficult" when its top emotion carries negative sentiment weight or
+its sentiment score is low. Every term is then scored for association with that
+label in a few vectorized passes:
+
+* smoothed log-odds ratio and its z-score (the ranking key), so rare terms need
+  proportionally stronger evidence than common ones;
+* lift, ``P(difficult | term) / P(difficult)``;
+* sentiment delta, the mean sentiment of entries with the term minus the mean of
+  those without it.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import EMOTION_SENTIMENT_WEIGHTS
+from .normalized import EntryLike, NormalizedEntry, batch_vocabulary, normalize_entries
+from .tokens import Vocabulary
+
+NEGATIVE_LABELS = frozenset(label for label, weight in EMOTION_SENTIMENT_WEIGHTS.items() if weight < 0)
+NEGATIVE_SENTIMENT_THRESHOLD = -0.25
+# Additive smoothing on each cell of the 2x2 contingency table.
+SMOOTHING = 0.5
+DEFAULT_MIN_DOCUMENTS = 3
+DEFAULT_LIMIT = 20
+
+
+class DocumentTermMatrix:
+    """Binary CSR matrix of which unigram/bigram features occur in each entry."""
+
+    __slots__ = ("indptr", "indices", "codes")
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, codes: np.ndarray) -> None:
+        self.indptr = indptr
+        self.indices = indices
+        self.codes = codes
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.indptr) - 1, len(self.codes)
+
+    def feature(self, column: int) -> Tuple[int, ...]:
+        """Token ids of the unigram or bigram stored in ``column``."""
+        code = int(self.codes[column])
+        if code >> 32:
+            return (code >> 32) - 1, code & 0xFFFFFFFF
+        return (code,)
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[NormalizedEntry], *, bigrams: bool = True) -> "DocumentTermMatrix":
+        """Build the matrix with array operations over all entries' token ids at once.
+
+        Unigrams are encoded as their token id and bigrams as
+        ``(first + 1) << 32 | second``, so both share one int64 code space.
+        """
+        stream = array("I")
+        lengths = np.empty(len(entries), dtype=np.int64)
+        for position, entry in enumerate(entries):
+            stream.extend(entry.token_ids)
+            lengths[position] = len(entry.token_ids)
+        tokens = np.frombuffer(stream, dtype=np.uint32).astype(np.int64)
+        rows = np.repeat(np.arange(len(entries)), lengths)
+
+        codes = [tokens]
+        code_rows = [rows]
+        if bigrams and len(tokens) > 1:
+            same_entry = rows[:-1] == rows[1:]
+            codes.append(((tokens[:-1][same_entry] + 1) << 32) | tokens[1:][same_entry])
+            code_rows.append(rows[:-1][same_entry])
+        all_codes = np.concatenate(codes)
+        all_rows = np.concatenate(code_rows)
+
+        # Sort by (row, code) and drop repeats: the matrix records presence only.
+        order = np.lexsort((all_codes, all_rows))
+        all_codes, all_rows = all_codes[order], all_rows[order]
+        keep = np.ones(len(all_codes), dtype=bool)
+        keep[1:] = (all_codes[1:] != all_codes[:-1]) | (all_rows[1:] != all_rows[:-1])
+        all_codes, all_rows = all_codes[keep], all_rows[keep]
+
+        vocabulary, indices = np.unique(all_codes, return_inverse=True)
+        indptr = np.zeros(len(entries) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_rows, minlength=len(entries)), out=indptr[1:])
+        return cls(indptr, indices.astype(np.int64), vocabulary)
+
+    def row_ids(self) -> np.ndarray:
+        """Row index of every stored value (the COO row vector)."""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def column_sums(self, row_weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """``X.T @ row_weights`` (document frequency when weights are omitted)."""
+        weights = None if row_weights is None else row_weights[self.row_ids()]
+        return np.bincount(self.indices, weights=weights, minlength=self.shape[1])
+
+
+def _is_difficult(entry: NormalizedEntry) -> bool:
+    if entry.top_label in NEGATIVE_LABELS:
+        return True
+    return entry.sentiment is not None and entry.sentiment <= NEGATIVE_SENTIMENT_THRESHOLD
+
+
+def _feature_text(vocabulary: Vocabulary, feature: Tuple[int, ...]) -> str:
+    return " ".join(vocabulary.token_text(token) for token in feature)
+
+
+def discover_triggers(
+    entries: Sequence[EntryLike],
+    *,
+    exclude: Iterable[str] = (),
+    min_documents: int = DEFAULT_MIN_DOCUMENTS,
+    limit: int = DEFAULT_LIMIT,
+) -> List[Dict[str, Any]]:
+    """Rank words and two-word phrases by association with difficult entries."""
+    normalized = normalize_entries(entries)
+    if not normalized:
+        return []
+
+    matrix = DocumentTermMatrix.from_entries(normalized)
+    documents, terms = matrix.shape
+    if terms == 0:
+        return []
+    difficult = np.fromiter((_is_difficult(entry) for entry in normalized), dtype=np.float64, count=documents)
+    sentiment = np.fromiter(
+        (entry.sentiment if entry.sentiment is not None else 0.0 for entry in normalized),
+        dtype=np.float64,
+        count=documents,
+    )
+    total_difficult = difficult.sum()
+    if total_difficult == 0 or total_difficult == documents:
+        return []
+
+    with_term = matrix.column_sums()
+    difficult_with = matrix.column_sums(difficult)
+    sentiment_with = matrix.column_sums(sentiment)
+
+    a = difficult_with + SMOOTHING
+    b = with_term - difficult_with + SMOOTHING
+    c = total_difficult - difficult_with + SMOOTHING
+    d = (documents - total_difficult) - (with_term - difficult_with) + SMOOTHING
+    log_odds = np.log(a) + np.log(d) - np.log(b) - np.log(c)
+    zscore = log_odds / np.sqrt(1 / a + 1 / b + 1 / c + 1 / d)
+    lift = (difficult_with / with_term) / (total_difficult / documents)
+
+    without_term = documents - with_term
+    mean_with = sentiment_with / with_term
+    mean_without = np.divide(
+        sentiment.sum() - sentiment_with,
+        without_term,
+        out=np.zeros_like(sentiment_with),
+        where=without_term > 0,
+    )
+    sentiment_delta = mean_with - mean_without
+
+    candidates = np.flatnonzero((with_term >= min_documents) & (log_odds > 0))
+    ranked = candidates[np.argsort(-zscore[candidates], kind="stable")]
+
+    vocabulary = batch_vocabulary(normalized)
+    excluded = {word.lower().rstrip("*") for word in exclude}
+    results: List[Dict[str, Any]] = []
+    for column in ranked:
+        feature = matrix.feature(column)
+        term = _feature_text(vocabulary, feature)
+        if term in excluded:
+            continue
+        results.append(
+            {
+                "term": term,
+                "kind": "phrase" if len(feature) > 1 else "word",
+                "entries": int(with_term[column]),
+                "difficult_entries": int(difficult_with[column]),
+                "difficult_rate": round(float(difficult_with[column] / with_term[column]), 3),
+                "lift": round(float(lift[column]), 2),
+                "log_odds": round(float(log_odds[column]), 3),
+                "zscore": round(float(zscore[column]), 2),
+                "sentiment_delta": round(float(sentiment_delta[column]), 3),
+            }
+        )
+        if len(results) >= limit:
+            break
+    return results
@@ -0,0 +1,247 @@
+"""Compiled multi-pattern matcher for trigger words, phrases and prefixes.
+
+Trigger words are compiled into a single Aho-Corasick automaton over the
+space-delimited token stream of an entry::
+
+    "deadline"     ->  " deadline "     exact token
+    "deadline*"    ->  " deadline"      any token starting with "deadline"
+    "group chat"   ->  " group chat "   consecutive tokens
+
+Patterns go through the same :func:`tokenize` as entry text, so stopwords and
+short tokens drop out of both sides alike. Scanning walks an entry once. The
+character-level transitions are memoized per ``(state, token id)``, so after
+warm-up each token costs one dict lookup however many triggers the user has.
+
+Every pattern needs its first token in the entry, so :meth:`TriggerMatcher.first_tokens`
+is an exact pre-filter. Whole-word and prefix patterns are decided by that
+token alone (:meth:`TriggerMatcher.token_matches`); only phrases need the walk.
+
+Token ids belong to a :class:`~.tokens.Vocabulary`; a matcher only scans ids
+issued by the vocabulary it was compiled against.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import weakref
+from collections import deque
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple, cast
+
+from ..core.cache import LRUCache
+from .tokens import Vocabulary, current_vocabulary, tokenize
+
+
+PREFIX_MARKER = "*"
+MIN_PREFIX_LENGTH = 3
+# Memoized (state, token) transitions kept before the table is reset.
+MAX_MEMO_TRANSITIONS = 200_000
+_END = -1
+
+Transition = Tuple[int, FrozenSet[int]]
+
+
+def compile_pattern(word: str) -> Optional[str]:
+    """Translate a trigger word into the automaton's delimited form."""
+    parts = word.lower().split()
+    tokens: List[str] = []
+    prefix = False
+    for position, part in enumerate(parts):
+        is_prefix = position == len(parts) - 1 and part.endswith(PREFIX_MARKER)
+        stem = part.rstrip(PREFIX_MARKER)
+        if is_prefix:
+            # tokenize() drops short tokens; a prefix only needs a minimum length.
+            if len(stem) < MIN_PREFIX_LENGTH:
+                return None
+            tokens.append(stem)
+            prefix = True
+        else:
+            tokens.extend(tokenize(stem))
+    if not tokens:
+        return None
+    return " " + " ".join(tokens) + ("" if prefix else " ")
+
+
+class TriggerMatcher:
+    """Aho-Corasick automaton mapping token streams to matched trigger positions."""
+
+    def __init__(
+        self, triggers: Sequence[Mapping[str, Any]], vocabulary: Optional[Vocabulary] = None
+    ) -> None:
+        vocabulary = vocabulary if vocabulary is not None else current_vocabulary()
+        # Weak, so a cached matcher never keeps a retired vocabulary alive.
+        self._vocabulary = weakref.ref(vocabulary)
+        self.size = len(triggers)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[int]] = [set()]
+        # Triggers matched by a single token: whole words up front, tokens
+        # starting a prefix pattern as entries reveal them.
+        self._word_triggers: Dict[int, Set[int]] = {}
+        self._prefix_triggers: Dict[str, Set[int]] = {}
+        self._phrase_starts: Set[int] = set()
+        for position, trigger in enumerate(triggers):
+            for word in trigger.get("words") or []:
+                pattern = compile_pattern(str(word))
+                if not pattern:
+                    continue
+                self._add(pattern, position)
+                parts = pattern.strip().split(" ")
+                if len(parts) > 1:
+                    self._phrase_starts.add(vocabulary.token_id(parts[0]))
+                elif pattern.endswith(" "):
+                    self._word_triggers.setdefault(vocabulary.token_id(parts[0]), set()).add(position)
+                else:
+                    self._prefix_triggers.setdefault(parts[0], set()).add(position)
+        self._prefixes = tuple(sorted(self._prefix_triggers))
+        self._first_tokens: Set[int] = set(self._word_triggers) | self._phrase_starts
+        self._classified: Set[int] = set()
+        self._link()
+        self._memo: List[Dict[int, Transition]] = [{} for _ in self._goto]
+        self._memo_size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def vocabulary(self) -> Optional[Vocabulary]:
+        """Vocabulary whose ids this matcher scans (``None`` once it is freed)."""
+        return self._vocabulary()
+
+    def _text(self, token: int) -> str:
+        vocabulary = self._vocabulary()
+        if vocabulary is None:
+            raise LookupError("token ids outlived the vocabulary that issued them")
+        return vocabulary.token_text(token)
+
+    def _add(self, pattern: str, position: int) -> None:
+        state = 0
+        for char in pattern:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            state = following
+        self._out[state].add(position)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._out[following] |= self._out[self._fail[following]]
+
+    def _feed(self, state: int, text: str) -> Transition:
+        matched: Set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                matched |= out[state]
+        return state, frozenset(matched)
+
+    def _step(self, state: int, token: int) -> Transition:
+        transition = self._memo[state].get(token)
+        if transition is None:
+            transition = self._feed(state, " " if token == _END else " " + self._text(token))
+            with self._lock:
+                if self._memo_size >= MAX_MEMO_TRANSITIONS:
+                    for table in self._memo:
+                        table.clear()
+                    self._memo_size = 0
+                self._memo[state][token] = transition
+                self._memo_size += 1
+        return transition
+
+    def first_tokens(self, token_set: FrozenSet[int]) -> FrozenSet[int]:
+        """Tokens of ``token_set`` that begin at least one pattern.
+
+        An entry whose token set shares none of them matches no trigger.
+        """
+        if self._prefixes:
+            unseen = token_set - self._classified
+            if unseen:
+                with self._lock:
+                    for token in unseen:
+                        text = self._text(token)
+                        if not text.startswith(self._prefixes):
+                            continue
+                        for prefix, positions in self._prefix_triggers.items():
+                            if text.startswith(prefix):
+                                self._word_triggers.setdefault(token, set()).update(positions)
+                        self._first_tokens.add(token)
+                    self._classified |= unseen
+        return token_set & self._first_tokens
+
+    def token_matches(self, token: int) -> Set[int]:
+        """Positions of the triggers that ``token`` matches on its own.
+
+        Covers whole-word patterns and, once :meth:`first_tokens` has seen the
+        token, prefix patterns. Phrases are only found by :meth:`scan`.
+        """
+        return self._word_triggers.get(token) or set()
+
+    def starts_phrase(self, token: int) -> bool:
+        """Whether ``token`` is the first token of a multi-token pattern."""
+        return token in self._phrase_starts
+
+    def scan(self, token_ids: Sequence[int], token_set: Optional[FrozenSet[int]] = None) -> Set[int]:
+        """Positions of every trigger with a pattern in ``token_ids``."""
+        matched: Set[int] = set()
+        if self.size == 0 or not self.first_tokens(token_set or frozenset(token_ids)):
+            return matched
+        memo = self._memo
+        state = 0
+        for token in token_ids:
+            transition = memo[state].get(token) or self._step(state, token)
+            state = transition[0]
+            if transition[1]:
+                matched |= transition[1]
+        matched |= self._step(state, _END)[1]
+        return matched
+
+
+def _signature(triggers: Sequence[Mapping[str, Any]]) -> str:
+    material = json.dumps([list(trigger.get("words") or []) for trigger in triggers])
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+
+_matchers = LRUCache(maxsize=512, ttl_seconds=3600)
+
+
+def get_trigger_matcher(
+    user_id: Optional[str],
+    triggers: Sequence[Mapping[str, Any]],
+    vocabulary: Optional[Vocabulary] = None,
+) -> TriggerMatcher:
+    """Return the user's compiled matcher, recompiling if their triggers changed.
+
+    The signature check also catches edits made by other processes. The explicit
+    invalidation in the upsert route only frees the stale automaton sooner. A
+    matcher compiled against another vocabulary than ``vocabulary`` (the current
+    shared one by default) is recompiled too.
+    """
+    vocabulary = vocabulary if vocabulary is not None else current_vocabulary()
+    if not user_id:
+        return TriggerMatcher(triggers, vocabulary)
+    signature = _signature(triggers)
+    cached = _matchers.get(user_id, None)
+    if cached is not None and cached[0] == signature and cached[1].vocabulary is vocabulary:
+        return cast(TriggerMatcher, cached[1])
+    matcher = TriggerMatcher(triggers, vocabulary)
+    _matchers.set(user_id, (signature, matcher))
+    return matcher
+
+
+def invalidate_trigger_matcher(user_id: str) -> None:
+    _matchers.pop(user_id)
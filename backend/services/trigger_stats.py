@@ -0,0 +1,212 @@
+"""Persisted, incrementally maintained trigger statistics.
+
+``GET /triggers`` used to rescan 180 days of entries per request. Counters now
+live in ``trigger_stats`` and ``trigger_baselines``, bucketed by calendar month:
+each new entry adds itself through one RPC, and a background job rebuilds a
+user's buckets from their entries whenever their trigger words change. The
+endpoint sums the months inside the window, so its look-back is rounded out to
+whole months.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter, defaultdict
+from datetime import UTC, date, datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from ..db import queries
+from .jobs import Job, get_job_manager
+from .normalized import batch_vocabulary, normalize_entries, normalize_entry
+from .trigger_matcher import get_trigger_matcher
+from .triggers import build_trigger_results
+
+
+logger = logging.getLogger(__name__)
+
+STATS_WINDOW_DAYS = 180
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def window_start(now: Optional[datetime] = None) -> date:
+    """First month bucket inside the look-back window."""
+    now = now or datetime.now(UTC)
+    return month_start((now - timedelta(days=STATS_WINDOW_DAYS)).date())
+
+
+def record_entry(entry: Mapping[str, Any]) -> None:
+    """Count a freshly written entry into its month's baseline and matched triggers."""
+    normalized = normalize_entry(entry)
+    if not normalized.user_id or normalized.created_at is None:
+        return
+    triggers = queries.list_triggers(normalized.user_id)
+    matched: List[str] = []
+    if triggers:
+        matcher = get_trigger_matcher(normalized.user_id, triggers, normalized.vocabulary)
+        positions = matcher.scan(normalized.token_ids, normalized.token_set)
+        matched = [str(triggers[position]["id"]) for position in sorted(positions)]
+    queries.record_trigger_observation(
+        normalized.user_id,
+        month_start(normalized.created_at.date()),
+        normalized.top_label,
+        matched,
+        entry_id=normalized.id,
+    )
+
+
+def record_entry_safely(entry: Mapping[str, Any]) -> None:
+    """Background-task wrapper: counters must never break the write path."""
+    try:
+        record_entry(entry)
+    except Exception:  # pragma: no cover - best effort side channel
+        logger.warning("trigger_stats.record_failed", exc_info=True)
+
+
+def _months(start: date, end: date) -> List[date]:
+    months = []
+    current = month_start(start)
+    while current <= end:
+        months.append(current)
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def build_stat_records(
+    user_id: str,
+    entries: Sequence[Mapping[str, Any]],
+    triggers: Sequence[Mapping[str, Any]],
+    *,
+    since_month: date,
+    until: date,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Monthly baseline and per-trigger counter rows for ``entries``.
+
+    Every month from ``since_month`` to ``until`` gets a baseline row, empty or
+    not; :func:`load_trigger_stats` treats the row for the window's first month
+    as proof that the user's counters cover the whole window.
+    """
+    normalized = normalize_entries(entries)
+    matcher = get_trigger_matcher(user_id, triggers, batch_vocabulary(normalized))
+    baseline_counts: Dict[date, Counter[str]] = defaultdict(Counter)
+    baseline_entries: Counter[date] = Counter({month: 0 for month in _months(since_month, until)})
+    stat_counts: Dict[Tuple[int, date], Counter[str]] = defaultdict(Counter)
+    stat_matches: Counter[Tuple[int, date]] = Counter()
+
+    for entry in normalized:
+        if entry.created_at is None:
+            continue
+        month = month_start(entry.created_at.date())
+        if month < since_month:
+            continue
+        label = entry.top_label
+        baseline_entries[month] += 1
+        if label:
+            baseline_counts[month][label] += 1
+        for position in matcher.scan(entry.token_ids, entry.token_set):
+            stat_matches[(position, month)] += 1
+            if label:
+                stat_counts[(position, month)][label] += 1
+
+    baselines = [
+        {
+            "user_id": user_id,
+            "month_start": month.isoformat(),
+            "entry_count": count,
+            "emotion_counts": dict(baseline_counts[month]),
+        }
+        for month, count in sorted(baseline_entries.items())
+    ]
+    stats = [
+        {
+            "user_id": user_id,
+            "trigger_id": triggers[position]["id"],
+            "month_start": month.isoformat(),
+            "match_count": count,
+            "emotion_counts": dict(stat_counts[(position, month)]),
+        }
+        for (position, month), count in sorted(stat_matches.items())
+    ]
+    return baselines, stats
+
+
+def rebuild_user_stats(user_id: str, *, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Recount a user's window from their entries and replace the stored buckets.
+
+    The rebuild generation is opened before the entry fetch. Entries recorded
+    while it runs are logged by the database and replayed into the swap
+    unless the fetch already counted them, so no increment is lost.
+    """
+    now = now or datetime.now(UTC)
+    since_month = window_start(now)
+    since = datetime.combine(since_month, datetime.min.time(), tzinfo=UTC)
+    generation = queries.begin_trigger_stats_rebuild(user_id)
+    entries = queries.fetch_entries_since(user_id, since, projection="tokens")
+    triggers = queries.list_triggers(user_id)
+    baselines, stats = build_stat_records(
+        user_id, entries, triggers, since_month=since_month, until=now.date()
+    )
+    entry_ids = [str(entry["id"]) for entry in entries if entry.get("id")]
+    replaced = queries.replace_trigger_stats(user_id, generation, entry_ids, baselines, stats)
+    if not replaced:
+        logger.info("trigger_stats.rebuild_superseded", extra={"user_id": user_id, "generation": generation})
+    return {"entries": len(entries), "baselines": len(baselines), "stats": len(stats), "replaced": int(replaced)}
+
+
+def schedule_rebuild(user_id: str) -> Job:
+    """Queue a rebuild on the shared job pool; concurrent requests join one job."""
+
+    def run(job: Job) -> Dict[str, int]:
+        return rebuild_user_stats(user_id)
+
+    job, _ = get_job_manager().submit(user_id=user_id, kind="trigger_stats", scope="all", func=run)
+    return job
+
+
+def covers_window(baselines: Sequence[Mapping[str, Any]], since: date) -> bool:
+    """Whether a rebuild has written the window's first month (see :func:`build_stat_records`)."""
+    return any(str(row.get("month_start"))[:10] == since.isoformat() for row in baselines)
+
+
+def results_from_rows(
+    triggers: Sequence[Dict[str, Any]],
+    baselines: Sequence[Mapping[str, Any]],
+    stats: Sequence[Mapping[str, Any]],
+    *,
+    since: date,
+) -> Optional[List[Dict[str, Any]]]:
+    """API payload from fetched counter rows, or ``None`` if they do not cover the window."""
+    if not covers_window(baselines, since):
+        return None
+
+    overall_counter: Counter[str] = Counter()
+    for row in baselines:
+        overall_counter.update(row.get("emotion_counts") or {})
+
+    positions = {str(trigger.get("id")): index for index, trigger in enumerate(triggers)}
+    match_counts = [0] * len(triggers)
+    trigger_counters: List[Counter[str]] = [Counter() for _ in triggers]
+    for row in stats:
+        position = positions.get(str(row.get("trigger_id")))
+        if position is None:
+            continue
+        match_counts[position] += int(row.get("match_count") or 0)
+        trigger_counters[position].update(row.get("emotion_counts") or {})
+
+    return build_trigger_results(triggers, match_counts, trigger_counters, overall_counter)
+
+
+def load_trigger_stats(
+    user_id: str,
+    triggers: Sequence[Dict[str, Any]],
+    *,
+    now: Optional[datetime] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Fetch the stored counters and build the payload; see :func:`results_from_rows`."""
+    since = window_start(now)
+    baselines = queries.get_trigger_baselines(user_id, since)
+    if not covers_window(baselines, since):
+        return None
+    return results_from_rows(triggers, baselines, queries.get_trigger_stats(user_id, since), since=since)
@@ -2,139 +2,124 @@
 
 from __future__ import annotations
 
-import math
-import re
-from collections import Counter
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
-
-STOPWORDS = {
-    "the",
-    "a",
-    "an",
-    "and",
-    "to",
-    "of",
-    "in",
-    "on",
-    "for",
-    "with",
-    "at",
-    "by",
-    "it",
-    "is",
-    "was",
-    "were",
-    "am",
-    "are",
-    "be",
-    "this",
-    "that",
-    "but",
-    "so",
-    "or",
-    "if",
-    "from",
-    "as",
-    "we",
-    "i",
-    "me",
-    "my",
-    "you",
-    "your",
-}
-
-
-TOKEN_PATTERN = re.compile(r"[A-Za-z']+")
-
-
-def tokenize(text: str) -> List[str]:
-    tokens = [match.group(0).lower() for match in TOKEN_PATTERN.finditer(text)]
-    return [token for token in tokens if token not in STOPWORDS and len(token) > 2]
-
-
-def suggest_triggers(entries: Sequence[Dict[str, Any]], *, limit: int = 5) -> List[Tuple[str, int]]:
-    """Return candidate trigger words sorted by frequency."""
-    counter: Counter[str] = Counter()
-    for entry in entries:
-        for token in set(tokenize(entry.get("text", ""))):
-            counter[token] += 1
-    return counter.most_common(limit)
-
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
-def match_trigger_name(text: str, triggers: Sequence[Dict[str, Any]]) -> Optional[str]:
-    tokens = set(tokenize(text))
-    for trigger in triggers:
-        words = trigger.get("words") or []
-        if any(word.lower() in tokens for word in words):
-            return trigger.get("name")
-    return None
+from .normalized import EntryLike, NormalizedEntry, batch_vocabulary, normalize_entries
+from .tokens import STOPWORDS, TOKEN_PATTERN, current_vocabulary, tokenize  # noqa: F401 - re-exported
+from .trigger_matcher import TriggerMatcher, get_trigger_matcher
 
 
-def _top_emotion(entry: Dict[str, Any]) -> Optional[str]:
-    emotions = entry.get("emotion_json") or []
-    if not emotions:
+def suggest_triggers(entries: Sequence[EntryLike], *, limit: int = 5) -> List[Tuple[str, int]]:
+    """Return candidate trigger words sorted by frequency."""
+    counter: Counter[int] = Counter()
+    normalized = normalize_entries(entries)
+    for entry in normalized:
+        counter.update(entry.token_set)
+    vocabulary = batch_vocabulary(normalized)
+    return [(vocabulary.token_text(identifier), count) for identifier, count in counter.most_common(limit)]
+
+
+def match_trigger_name(
+    text: str, triggers: Sequence[Dict[str, Any]], *, user_id: Optional[str] = None
+) -> Optional[str]:
+    """Name of the first trigger (in ``triggers`` order) matching ``text``."""
+    vocabulary = current_vocabulary()
+    matched = get_trigger_matcher(user_id, triggers, vocabulary).scan(vocabulary.encode(tokenize(text)))
+    if not matched:
         return None
-    sorted_emotions = sorted(emotions, key=lambda item: item.get("score", 0), reverse=True)
-    return sorted_emotions[0].get("label")
-
-
-def _entries_with_trigger(
-    entries: Sequence[Dict[str, Any]],
-    trigger_words: Iterable[str],
-) -> List[Dict[str, any]]:
-    normalized = {word.lower() for word in trigger_words}
-    if not normalized:
-        return []
-    result = []
-    for entry in entries:
-        tokens = set(tokenize(entry.get("text", "")))
-        if tokens & normalized:
-            result.append(entry)
-    return result
+    return triggers[min(matched)].get("name")
+
+
+class TriggerIndex:
+    """First-token postings over one batch of normalized entries.
+
+    Only tokens that begin some trigger pattern are indexed, so building costs
+    one small set intersection per entry. Whole-word and prefix triggers are
+    answered with a union of posting lists; the matcher's automaton only walks
+    the entries posted under the first token of a phrase.
+    """
+
+    __slots__ = ("entries", "labels", "matcher", "postings")
+
+    def __init__(self, entries: Sequence[NormalizedEntry], matcher: TriggerMatcher) -> None:
+        self.entries = entries
+        self.matcher = matcher
+        self.labels: List[Optional[str]] = [entry.top_label for entry in entries]
+        self.postings: Dict[int, List[int]] = defaultdict(list)
+        for position, entry in enumerate(entries):
+            for identifier in matcher.first_tokens(entry.token_set):
+                self.postings[identifier].append(position)
+
+    def match(self) -> List[Set[int]]:
+        """Entry positions matched by each trigger, in trigger order."""
+        matched: List[Set[int]] = [set() for _ in range(self.matcher.size)]
+        phrase_candidates: Set[int] = set()
+        for identifier, positions in self.postings.items():
+            for trigger in self.matcher.token_matches(identifier):
+                matched[trigger].update(positions)
+            if self.matcher.starts_phrase(identifier):
+                phrase_candidates.update(positions)
+        for position in phrase_candidates:
+            entry = self.entries[position]
+            for trigger in self.matcher.scan(entry.token_ids, entry.token_set):
+                matched[trigger].add(position)
+        return matched
 
 
 def compute_trigger_stats(
-    entries: Sequence[Dict[str, Any]],
+    entries: Sequence[EntryLike],
     triggers: Sequence[Dict[str, Any]],
-) -> List[Dict[str, any]]:
-    """Attach simple correlation stats for each trigger."""
+    *,
+    user_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Attach simple correlation stats for each trigger.
+
+    Entries are matched through a :class:`TriggerIndex` built with the user's
+    compiled matcher; emotions are then counted over the matched entries only.
+    """
     if not entries or not triggers:
         return []
 
-    overall_counter: Counter[str] = Counter()
-    for entry in entries:
-        emotion = _top_emotion(entry)
-        if emotion:
-            overall_counter[emotion.lower()] += 1
+    normalized = normalize_entries(entries)
+    matcher = get_trigger_matcher(user_id, triggers, batch_vocabulary(normalized))
+    index = TriggerIndex(normalized, matcher)
+    labels = index.labels
+    overall_counter: Counter[str] = Counter(label for label in labels if label)
+    match_counts: List[int] = []
+    trigger_counters: List[Counter[str]] = []
+    for positions in index.match():
+        match_counts.append(len(positions))
+        trigger_counters.append(Counter(label for position in positions if (label := labels[position])))
 
+    return build_trigger_results(triggers, match_counts, trigger_counters, overall_counter)
+
+
+def build_trigger_results(
+    triggers: Sequence[Dict[str, Any]],
+    match_counts: Sequence[int],
+    trigger_counters: Sequence[Mapping[str, int]],
+    overall_counter: Mapping[str, int],
+) -> List[Dict[str, Any]]:
+    """Shape per-trigger counts as the API payload with deltas against baseline."""
     total_entries = sum(overall_counter.values()) or 1
     baseline = {emotion: count / total_entries for emotion, count in overall_counter.items()}
 
-    results: List[Dict[str, any]] = []
-    for trigger in triggers:
-        words = trigger.get("words") or []
-        matched_entries = _entries_with_trigger(entries, words)
-        match_count = len(matched_entries)
+    results: List[Dict[str, Any]] = []
+    for position, trigger in enumerate(triggers):
+        match_count = match_counts[position]
         correlation: Dict[str, float] = {}
-
-        if match_count > 0:
-            trigger_counter: Counter[str] = Counter()
-            for entry in matched_entries:
-                emotion = _top_emotion(entry)
-                if emotion:
-                    trigger_counter[emotion.lower()] += 1
-
-            for emotion, count in trigger_counter.items():
-                baseline_rate = baseline.get(emotion, 0.0)
-                trigger_rate = count / match_count
-                delta = trigger_rate - baseline_rate
-                correlation[emotion] = round(delta * 100, 1)
+        for emotion, count in trigger_counters[position].items():
+            baseline_rate = baseline.get(emotion, 0.0)
+            trigger_rate = count / match_count
+            delta = trigger_rate - baseline_rate
+            correlation[emotion] = round(delta * 100, 1)
 
         results.append(
             {
                 "id": trigger.get("id"),
                 "name": trigger.get("name"),
-                "words": words,
+                "words": trigger.get("words") or [],
                 "stats": {
                     "count": match_count,
                     "correlation": correlation,
@@ -0,0 +1,63 @@
+"""Celery task that tokenizes entries written before the token index existed."""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional
+
+from celery import Celery
+
+from ..db import queries
+from ..services.tokens import TOKENIZER_VERSION, tokenize
+
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery("echo.tokens")
+celery_app.conf.update(
+    broker_url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    result_backend=None,
+    task_serializer="json",
+)
+
+
+def backfill_entry_tokens(batch_size: int = 500, max_batches: Optional[int] = None) -> int:
+    """Tokenize stale entries in id-ordered batches; return the number of rows written.
+
+    Pages by id rather than re-querying the same filter so a row that keeps
+    failing cannot stall the loop. Safe to rerun: finished rows no longer match.
+    """
+    written = 0
+    batches = 0
+    after_id: Optional[str] = None
+    while max_batches is None or batches < max_batches:
+        rows = queries.fetch_entries_needing_tokens(
+            tokens_version=TOKENIZER_VERSION, after_id=after_id, limit=batch_size
+        )
+        if not rows:
+            break
+        records = [
+            {
+                "id": row["id"],
+                "tokens": tokenize(row.get("text") or ""),
+                "tokens_version": TOKENIZER_VERSION,
+            }
+            for row in rows
+        ]
+        result = queries.save_entry_tokens(records)
+        written += result.rows
+        batches += 1
+        after_id = rows[-1]["id"]
+        logger.info("tokens.backfill_batch", extra={"rows": result.rows, "after_id": after_id})
+    return written
+
+
+@celery_app.task(name="echo.backfill_entry_tokens")
+def backfill_entry_tokens_task(batch_size: int = 500) -> int:
+    return backfill_entry_tokens(batch_size=batch_size)
+
+
+if __name__ == "__main__":  # pragma: no cover - manual backfill entry point
+    logging.basicConfig(level=logging.INFO)
+    print(backfill_entry_tokens())
@@ -11,6 +11,7 @@ from sendgrid.helpers.mail import Mail
 
 from ..db import queries
 from ..services.insights import summarize_entries
+from ..services.normalized import normalize_entries
 from ..services.summarizer import get_weekly_summarizer
 
 
@@ -48,7 +49,7 @@ def send_weekly_digest(user_id: str, user_email: str) -> bool:
         return False
 
     since = datetime.now(UTC) - timedelta(days=7)
-    entries = queries.fetch_entries_since(user_id, since)
+    entries = normalize_entries(queries.fetch_entries_since(user_id, since, projection="tokens"))
     insights = summarize_entries(entries)
 
     summarizer = get_weekly_summarizer()
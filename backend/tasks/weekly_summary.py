@@ -22,7 +22,7 @@ celery_app.conf.update(
 @celery_app.task(name="echo.generate_weekly_summary")
 def generate_weekly_summary(user_id: str) -> dict:
     since = datetime.now(UTC) - timedelta(days=7)
-    entries = queries.fetch_entries_since(user_id, since)
+    entries = queries.fetch_entries_since(user_id, since, projection="analytics")
     summarizer = get_weekly_summarizer()
     summary_text = summarizer.summarize(entries)
     week_start = (datetime.now(UTC) - timedelta(days=datetime.now(UTC).weekday())).date()
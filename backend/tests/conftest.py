@@ -4,7 +4,9 @@ import os
 
 import pytest
 
+from backend.core.cache import get_config_cache
 from backend.core.settings import get_settings
+from backend.services.auth import get_token_cache
 
 
 # Ensure deterministic environment for all tests.
@@ -27,5 +29,9 @@ get_settings.cache_clear()  # type: ignore[attr-defined]
 def _clear_settings_cache() -> None:
     """Force settings cache to be rebuilt per-test to incorporate overrides."""
     get_settings.cache_clear()  # type: ignore[attr-defined]
+    get_config_cache.cache_clear()  # type: ignore[attr-defined]
+    get_token_cache.cache_clear()  # type: ignore[attr-defined]
     yield
     get_settings.cache_clear()  # type: ignore[attr-defined]
+    get_config_cache.cache_clear()  # type: ignore[attr-defined]
+    get_token_cache.cache_clear()  # type: ignore[attr-defined]
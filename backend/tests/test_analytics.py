@@ -89,3 +89,102 @@ def test_compute_weekly_metrics_builds_correlations() -> None:
     assert record["emotion_counts"]["sadness"] == 1
     assert "Morning" in record["corr_summary"]["time_of_day_mean_sentiment"]
     assert "Mon" in record["corr_summary"]["weekday_mean_sentiment"]
+
+
+def _daily(user_id: str, day: str, avg: float, count: int = 1, emotion: str = "joy") -> dict:
+    return {
+        "user_id": user_id,
+        "date": day,
+        "avg_sentiment": avg,
+        "emotion_counts": {emotion: count},
+        "message_count": count,
+        "avg_entry_length": 40.0,
+        "time_buckets": {"Morning": {"message_count": count, "avg_sentiment": avg}},
+    }
+
+
+def test_monthly_and_yearly_rollups_match_daily_statistics() -> None:
+    from statistics import pstdev
+
+    daily = [
+        _daily("user-1", "2025-01-03", 0.5, count=2),
+        _daily("user-1", "2025-01-10", -0.1, count=1, emotion="sadness"),
+        _daily("user-1", "2025-02-01", 0.2, count=3),
+        _daily("user-1", "2025-02-14", 0.8, count=1),
+    ]
+
+    monthly = analytics.compute_monthly_metrics(daily)
+    assert [row["month_start"] for row in monthly] == ["2025-01-01", "2025-02-01"]
+    january = monthly[0]
+    assert january["month_end"] == "2025-01-31"
+    assert january["message_count"] == 3
+    assert january["active_days"] == 2
+    assert january["emotion_counts"] == {"joy": 2, "sadness": 1}
+    assert pytest.approx(january["avg_sentiment"], rel=1e-6) == (0.5 * 2 - 0.1) / 3
+    assert pytest.approx(january["volatility"], rel=1e-6) == pstdev([0.5, -0.1])
+
+    yearly = analytics.compute_yearly_metrics(monthly)
+    assert len(yearly) == 1
+    year = yearly[0]
+    assert year["year_start"] == "2025-01-01"
+    assert year["message_count"] == 7
+    assert year["sentiment_days"] == 4
+    assert pytest.approx(year["volatility"], rel=1e-6) == pstdev([0.5, -0.1, 0.2, 0.8])
+    assert year["time_buckets"]["Morning"]["message_count"] == 7
+
+
+def test_refresh_rollups_only_rebuilds_touched_periods(monkeypatch: pytest.MonkeyPatch) -> None:
+    stored_daily = [
+        _daily("user-1", "2025-03-02", 0.4),
+        _daily("user-1", "2025-03-20", 0.1),
+        _daily("user-1", "2025-04-05", 0.3),
+    ]
+    written: dict[str, list] = {}
+
+    def _get_daily(user_id, start, end):
+        return [row for row in stored_daily if start.isoformat() <= row["date"] <= end.isoformat()]
+
+    def _upsert_monthly(records):
+        written["monthly"] = list(records)
+        return records
+
+    monkeypatch.setattr(analytics.queries, "get_daily_metrics", _get_daily)
+    monkeypatch.setattr(analytics.queries, "upsert_monthly_metrics", _upsert_monthly)
+    monkeypatch.setattr(
+        analytics.queries, "get_monthly_metrics", lambda user_id, start, end: written["monthly"]
+    )
+    monkeypatch.setattr(
+        analytics.queries, "upsert_yearly_metrics", lambda records: written.setdefault("yearly", list(records))
+    )
+
+    counts = analytics.refresh_rollups([_daily("user-1", "2025-03-20", 0.1)])
+
+    assert counts == {"monthly": 1, "yearly": 1}
+    assert written["monthly"][0]["month_start"] == "2025-03-01"
+    assert written["monthly"][0]["message_count"] == 2
+    assert written["yearly"][0]["year_start"] == "2025-01-01"
+
+
+def test_rolling_metrics_match_naive_windows() -> None:
+    from datetime import date, timedelta
+    from statistics import mean, pstdev
+
+    origin = date(2025, 1, 1)
+    series = {origin + timedelta(days=i): ((i * 37) % 11 - 5) / 5 for i in range(60) if i % 4 != 3}
+    daily = [
+        {"date": day.isoformat(), "avg_sentiment": value, "message_count": 1}
+        for day, value in series.items()
+    ]
+    start, end = date(2025, 2, 1), date(2025, 3, 1)
+
+    rows = analytics.compute_rolling_metrics(daily, start, end, windows=(7, 30))
+
+    assert rows[0]["date"] == "2025-02-01"
+    assert rows[-1]["date"] == "2025-03-01"
+    for row in rows:
+        day = date.fromisoformat(row["date"])
+        for window in (7, 30):
+            values = [series[d] for d in (day - timedelta(days=k) for k in range(window)) if d in series]
+            assert row[f"mean_{window}d"] == pytest.approx(mean(values))
+            assert row[f"volatility_{window}d"] == pytest.approx(pstdev(values), abs=1e-9)
+    assert all(row["ewma"] is not None for row in rows)
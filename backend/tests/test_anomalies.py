@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from backend.services import anomalies
+
+
+def test_detector_flags_spike_only_after_warmup() -> None:
+    detector = anomalies.EwmaDetector()
+    flags = [detector.update(0.3 + (0.02 if i % 2 else -0.02), warmup=5) for i in range(20)]
+    assert all(flag is None for flag in flags)
+
+    zscore = detector.update(-0.9, warmup=5)
+    assert zscore is not None and zscore < -anomalies.THRESHOLD
+    assert detector.count == 21
+
+
+def test_observe_daily_is_idempotent(monkeypatch: pytest.MonkeyPatch) -> None:
+    state: dict[str, dict] = {}
+    stored: list[dict] = []
+    monkeypatch.setattr(anomalies.queries, "get_anomaly_state", lambda user_id, kind: state.get(kind))
+    monkeypatch.setattr(
+        anomalies.queries, "save_anomaly_state", lambda record: state.__setitem__(record["kind"], record)
+    )
+    monkeypatch.setattr(anomalies.queries, "insert_anomalies", lambda records: stored.extend(records))
+
+    start = date(2025, 5, 1)
+    daily = [
+        {"user_id": "u1", "date": (start + timedelta(days=i)).isoformat(), "avg_sentiment": 0.2}
+        for i in range(10)
+    ]
+    daily.append({"user_id": "u1", "date": "2025-05-11", "avg_sentiment": -0.8})
+    daily.append({"user_id": "u1", "date": "2025-05-12", "avg_sentiment": 0.9})  # "today": skipped
+
+    flagged = anomalies.observe_daily(daily, today=date(2025, 5, 12))
+    assert [item["observed_at"][:10] for item in flagged] == ["2025-05-11"]
+    assert state["day"]["count"] == 11
+
+    assert anomalies.observe_daily(daily, today=date(2025, 5, 12)) == []
+    assert state["day"]["count"] == 11
+    assert len(stored) == 1
+
+
+def test_observe_entry_retries_when_another_writer_saves_first(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.benchmarks.fake_postgrest import FakePostgREST, installed
+
+    fake = FakePostgREST()
+    read_state = anomalies.queries.get_anomaly_state
+    raced: list[bool] = []
+
+    def racing_read(user_id: str, kind: str):
+        state = read_state(user_id, kind)
+        if not raced:
+            # A concurrent request commits its observation after our read.
+            raced.append(True)
+            anomalies.observe_entry(
+                {"id": "e1", "user_id": "u1", "sentiment_score": 0.5, "created_at": "2025-05-01T08:00:00Z"}
+            )
+        return state
+
+    monkeypatch.setattr(anomalies.queries, "get_anomaly_state", racing_read)
+    with installed(fake):
+        anomalies.observe_entry(
+            {"id": "e2", "user_id": "u1", "sentiment_score": 0.1, "created_at": "2025-05-01T09:00:00Z"}
+        )
+
+    (state,) = fake.rows("anomaly_detector_state")
+    assert state["count"] == 2
+    assert state["mean"] == pytest.approx(0.5 + anomalies.ALPHA * (0.1 - 0.5))
+    assert str(state["last_observed"]).startswith("2025-05-01T09:00:00")
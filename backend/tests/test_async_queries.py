@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+import httpx
+import pytest
+
+from backend.db import async_queries
+from backend.db.queries import DatabaseError, entry_columns
+
+
+def _run_with(handler: Callable[[httpx.Request], httpx.Response], call):
+    async def main():
+        async_queries._client = httpx.AsyncClient(
+            base_url="https://supabase.test/rest/v1", transport=httpx.MockTransport(handler)
+        )
+        try:
+            return await call()
+        finally:
+            await async_queries.close_async_client()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(async_queries, "_backoff", lambda attempt: 0.0)
+
+
+def test_select_builds_postgrest_filters() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json=[{"id": "e1"}])
+
+    rows = _run_with(handler, lambda: async_queries.get_entries("u1", projection="list", limit=5, offset=10))
+
+    assert rows == [{"id": "e1"}]
+    assert seen[0].url.path == "/rest/v1/entries"
+    params = seen[0].url.params
+    assert params["select"] == entry_columns("list")
+    assert params["user_id"] == "eq.u1"
+    assert params["order"] == "created_at.desc,id.desc"
+    assert (params["limit"], params["offset"]) == ("5", "10")
+
+
+def test_keyset_page_sends_a_sargable_created_at_bound() -> None:
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json=[])
+
+    before = ("2025-03-01T00:01:00+00:00", "e5")
+    _run_with(handler, lambda: async_queries.get_entries("u1", projection="list", limit=3, offset=9, before=before))
+
+    params = seen[0].url.params
+    assert params["created_at"] == "lte.2025-03-01T00:01:00+00:00"
+    assert params["or"] == '(created_at.lt."2025-03-01T00:01:00+00:00",and(created_at.eq."2025-03-01T00:01:00+00:00",id.lt.e5))'
+    assert params["offset"] == "0"
+
+
+def test_transient_failures_are_retried() -> None:
+    attempts: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("reset", request=request)
+        if len(attempts) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json=[])
+
+    assert _run_with(handler, lambda: async_queries.list_triggers("u1")) == []
+    assert len(attempts) == 3
+
+
+def test_client_errors_fail_without_retry() -> None:
+    attempts: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(1)
+        return httpx.Response(400, json={"message": "bad filter"})
+
+    with pytest.raises(DatabaseError):
+        _run_with(handler, lambda: async_queries.list_triggers("u1"))
+    assert len(attempts) == 1
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from backend.core.settings import get_settings
+from backend.services import auth
+
+
+def _token(expires_in: int, subject: str = "user-1") -> str:
+    now = int(time.time())
+    claims = {"sub": subject, "iat": now, "exp": now + expires_in}
+    return jwt.encode(claims, get_settings().supabase_jwt_secret, algorithm="HS256")
+
+
+def _authenticate(token: str) -> auth.AuthenticatedUser:
+    return auth.get_current_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token), None)
+
+
+@pytest.fixture
+def decodes(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+    real = auth._decode_token
+
+    def counting(token: str):
+        calls.append(token)
+        return real(token)
+
+    monkeypatch.setattr(auth, "_decode_token", counting)
+    return calls
+
+
+def test_repeated_token_is_verified_once(decodes: list[str]) -> None:
+    token = _token(3600)
+
+    users = [_authenticate(token) for _ in range(3)]
+
+    assert [user.id for user in users] == ["user-1"] * 3
+    assert len(decodes) == 1
+    stats = auth.get_token_cache().stats()
+    assert (stats["avoided_verifications"], stats["verifications"]) == (2, 1)
+
+
+def test_cached_token_is_never_accepted_past_expiry(monkeypatch: pytest.MonkeyPatch, decodes: list[str]) -> None:
+    token = _token(100)
+    _authenticate(token)
+    _authenticate(token)
+    assert len(decodes) == 1
+
+    # Inside the 30 second skew before ``exp`` the cache must verify again.
+    monkeypatch.setattr(auth, "time", SimpleNamespace(time=lambda: time.time() + 75))
+    _authenticate(token)
+    assert len(decodes) == 2
+
+
+def test_short_lived_and_invalid_tokens_are_not_cached(decodes: list[str]) -> None:
+    short = _token(10)
+    _authenticate(short)
+    _authenticate(short)
+
+    forged = jwt.encode({"sub": "user-1", "iat": 0, "exp": 2**31}, "not-the-secret", algorithm="HS256")
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            _authenticate(forged)
+
+    assert len(decodes) == 4
+    assert auth.get_token_cache().stats()["size"] == 0
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.core.cache import LRUCache, ReadThroughCache, ResponseCache, SQLiteStore, get_config_cache
+
+
+def test_version_bump_makes_cached_response_unreachable() -> None:
+    cache = ResponseCache(maxsize=16, ttl_seconds=60)
+    calls: list[int] = []
+
+    def compute() -> dict:
+        calls.append(1)
+        return {"count": len(calls)}
+
+    first = cache.get_or_compute("u1", "insights.summary", {"days": 7}, compute)
+    again = cache.get_or_compute("u1", "insights.summary", {"days": 7}, compute)
+    other_params = cache.get_or_compute("u1", "insights.summary", {"days": 30}, compute)
+    other_user = cache.get_or_compute("u2", "insights.summary", {"days": 7}, compute)
+
+    assert first == again == {"count": 1}
+    assert other_params == {"count": 2}
+    assert other_user == {"count": 3}
+    assert cache.hits == 1
+
+    cache.bump("u1")
+    assert cache.get_or_compute("u1", "insights.summary", {"days": 7}, compute) == {"count": 4}
+    assert cache.get_or_compute("u2", "insights.summary", {"days": 7}, compute) == {"count": 3}
+
+
+def test_lru_evicts_oldest_and_honours_ttl() -> None:
+    cache = LRUCache(maxsize=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b", None) is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("d", 4, ttl_seconds=-1)
+    assert cache.get("d", None) is None
+
+
+def test_shared_store_is_visible_across_cache_instances(tmp_path) -> None:
+    path = str(tmp_path / "responses.sqlite3")
+    worker_a = ResponseCache(maxsize=16, ttl_seconds=60, store=SQLiteStore(path))
+    worker_b = ResponseCache(maxsize=16, ttl_seconds=60, store=SQLiteStore(path))
+
+    assert worker_a.get_or_compute("u1", "triggers.list", {}, lambda: [{"id": "t1"}]) == [{"id": "t1"}]
+    assert worker_b.get_or_compute("u1", "triggers.list", {}, lambda: []) == [{"id": "t1"}]
+
+    worker_a.bump("u1")
+    assert worker_b.version("u1") == 1
+    assert worker_b.get_or_compute("u1", "triggers.list", {}, lambda: []) == []
+
+
+def test_read_through_cache_negative_caching_and_invalidation() -> None:
+    cache = ReadThroughCache(maxsize=16, ttls={"digest_prefs": 60}, negative_ttl_seconds=60)
+    rows: dict[str, bool] = {}
+    loads: list[str] = []
+
+    def load(user_id: str):
+        def fetch():
+            loads.append(user_id)
+            return rows.get(user_id)
+
+        return fetch
+
+    assert cache.get_or_load("digest_prefs", "u1", load("u1")) is None
+    assert cache.get_or_load("digest_prefs", "u1", load("u1")) is None
+    assert loads == ["u1"]
+
+    rows["u1"] = False
+    cache.invalidate("digest_prefs", "u1")
+    assert cache.get_or_load("digest_prefs", "u1", load("u1")) is False
+    assert cache.get_or_load("digest_prefs", "u1", load("u1")) is False
+    assert loads == ["u1", "u1"]
+    assert cache.stats()["digest_prefs"] == {
+        "hits": 1,
+        "negative_hits": 1,
+        "misses": 2,
+        "hit_rate": 0.5,
+    }
+
+
+def test_read_through_cache_loads_once_under_concurrency() -> None:
+    cache = ReadThroughCache(maxsize=16, ttls={"triggers": 60}, negative_ttl_seconds=60)
+    started = threading.Event()
+    loads: list[int] = []
+
+    def slow_load() -> list:
+        loads.append(1)
+        started.wait(1)
+        return [{"name": "work"}]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(cache.get_or_load, "triggers", "u1", slow_load) for _ in range(8)]
+        time.sleep(0.05)
+        started.set()
+        results = [future.result() for future in futures]
+
+    assert loads == [1]
+    assert all(result == [{"name": "work"}] for result in results)
+
+
+def test_invalidation_during_load_is_not_overwritten() -> None:
+    cache = ReadThroughCache(maxsize=16, ttls={"coping_kits": 60}, negative_ttl_seconds=60)
+
+    def racing_load() -> list:
+        cache.invalidate("coping_kits", "u1")  # a save lands while we read
+        return ["stale"]
+
+    assert cache.get_or_load("coping_kits", "u1", racing_load) == ["stale"]
+    assert cache.get_or_load("coping_kits", "u1", lambda: ["fresh"]) == ["fresh"]
+
+
+def test_async_paths_wait_for_the_shared_store_off_the_event_loop(tmp_path) -> None:
+    store = SQLiteStore(str(tmp_path / "responses.sqlite3"))
+    responses = ResponseCache(maxsize=16, ttl_seconds=60, store=store)
+    config = ReadThroughCache(maxsize=16, ttls={"triggers": 60}, negative_ttl_seconds=60, store=store)
+    held, release = threading.Event(), threading.Event()
+
+    def hold_store() -> None:
+        # Stands in for a bump holding the store while another worker writes.
+        with store._lock:
+            held.set()
+            release.wait(2)
+
+    async def compute() -> list:
+        return [{"id": "t1"}]
+
+    async def load() -> list:
+        return [{"name": "work"}]
+
+    async def scenario() -> tuple:
+        pending = [
+            asyncio.ensure_future(responses.get_or_compute_async("u1", "triggers.list", {}, compute)),
+            asyncio.ensure_future(config.get_or_load_async("triggers", "u1", load)),
+        ]
+        await asyncio.sleep(0.1)
+        # Both lookups are parked in the threadpool; the loop is still free.
+        assert not any(task.done() for task in pending)
+        release.set()
+        return tuple(await asyncio.gather(*pending))
+
+    holder = threading.Thread(target=hold_store)
+    holder.start()
+    held.wait(1)
+    try:
+        assert asyncio.run(scenario()) == ([{"id": "t1"}], [{"name": "work"}])
+    finally:
+        release.set()
+        holder.join()
+    assert store.get(responses.key("u1", "triggers.list", {}, 0)) == [{"id": "t1"}]
+
+
+def test_metrics_endpoint_reports_config_cache_hit_rate(monkeypatch: pytest.MonkeyPatch) -> None:
+    from fastapi.testclient import TestClient
+
+    from backend.core import get_settings
+    from backend.main import app
+
+    monkeypatch.setattr(get_settings(), "metrics_token", "ops-secret")
+
+    cache = get_config_cache()
+    cache.get_or_load("user_profiles", "u-metrics", lambda: {"full_name": "Echo"})
+    cache.get_or_load("user_profiles", "u-metrics", lambda: {"full_name": "Echo"})
+
+    with TestClient(app, base_url="https://testserver") as client:
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        payload = client.get("/metrics", headers={"Authorization": "Bearer ops-secret"}).json()
+        monkeypatch.setattr(get_settings(), "metrics_token", None)
+        assert client.get("/metrics", headers={"Authorization": "Bearer ops-secret"}).status_code == 404
+
+    assert payload["config_cache"]["user_profiles"]["hit_rate"] == 0.5
+    assert set(payload["response_cache"]) == {"hits", "misses"}
@@ -0,0 +1,114 @@
+"""Parity between the ``compute_daily_metrics`` SQL function and the Python one.
+
+    ECHO_TEST_DATABASE_URL=postgresql://postgres@localhost/echo_test pytest backend/tests/test_daily_metrics_rpc.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+DATABASE_URL = os.getenv("ECHO_TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="ECHO_TEST_DATABASE_URL not set")
+
+from backend.db import postgres  # noqa: E402
+from backend.services import analytics  # noqa: E402
+from backend.services.metrics import EMOTION_SENTIMENT_WEIGHTS  # noqa: E402
+
+MIGRATION = Path(__file__).resolve().parents[1] / "db" / "migrations" / "009_daily_metrics_rpc.sql"
+USERS = ["00000000-0000-0000-0000-0000000000aa", "00000000-0000-0000-0000-0000000000bb"]
+START = datetime(2025, 3, 1, tzinfo=UTC)
+
+
+@pytest.fixture
+def conn():
+    with psycopg.connect(DATABASE_URL) as connection:
+        connection.execute(
+            "create temp table entries (id uuid primary key, user_id uuid, text text, "
+            "tags text[] default '{}', emotion_json jsonb, created_at timestamptz not null, "
+            "entry_length int, time_of_day text, weekday int, sentiment_score numeric, "
+            "tokens text[], tokens_version smallint)"
+        )
+        connection.execute(MIGRATION.read_text())
+        yield connection
+        connection.rollback()
+
+
+def _seed(conn, count: int) -> None:
+    rng = random.Random(11)
+    labels = list(EMOTION_SENTIMENT_WEIGHTS) + ["unlisted", "JOY", ""]
+    # Distinct timestamps keep the first-seen tie-break for top_emotion deterministic.
+    for minute in rng.sample(range(6 * 24 * 60), count):
+        emotions = [
+            {"label": rng.choice(labels), "score": round(rng.random(), 2)} for _ in range(rng.randint(0, 3))
+        ]
+        conn.execute(
+            "insert into entries (id, user_id, text, emotion_json, created_at, entry_length, "
+            "time_of_day, sentiment_score) values (gen_random_uuid(), %s, %s, %s, %s, %s, %s, %s)",
+            (
+                rng.choice(USERS),
+                "  " + "word " * rng.randint(0, 12),
+                json.dumps(emotions) if emotions or rng.random() < 0.5 else None,
+                START + timedelta(minutes=minute),
+                rng.choice([None, rng.randint(1, 400)]),
+                rng.choice([None, "", "Morning", "Evening"]),
+                rng.choice([None, round(rng.uniform(-1, 1), 3)]),
+            ),
+        )
+
+
+def _assert_same(sql_rows, python_rows) -> None:
+    assert [(row["user_id"], row["date"]) for row in sql_rows] == [
+        (row["user_id"], row["date"]) for row in python_rows
+    ]
+    for ours, theirs in zip(sql_rows, python_rows):
+        assert ours["message_count"] == theirs["message_count"]
+        assert ours["top_emotion"] == theirs["top_emotion"]
+        assert ours["emotion_counts"] == theirs["emotion_counts"]
+        assert ours["avg_sentiment"] == pytest.approx(theirs["avg_sentiment"])
+        assert ours["avg_entry_length"] == pytest.approx(theirs["avg_entry_length"])
+        assert ours["time_buckets"].keys() == theirs["time_buckets"].keys()
+        for bucket, stats in theirs["time_buckets"].items():
+            assert ours["time_buckets"][bucket]["message_count"] == stats["message_count"]
+            assert ours["time_buckets"][bucket]["avg_sentiment"] == pytest.approx(stats["avg_sentiment"])
+
+
+def _sql_rows(conn, user_id=None):
+    cursor = conn.execute(
+        "select * from compute_daily_metrics(%s, %s, %s)", (START, START + timedelta(days=7), user_id)
+    )
+    columns = [column.name for column in cursor.description]
+    return [{column: postgres._rest_value(value) for column, value in zip(columns, row)} for row in cursor]
+
+
+def test_sql_aggregation_matches_python(conn) -> None:
+    _seed(conn, 400)
+    entries = list(
+        postgres.iter_entries_for_range(
+            start=START, end=START + timedelta(days=7), projection="tokens", conn=conn
+        )
+    )
+
+    python_rows = analytics.compute_daily_metrics(entries)
+    python_rows.sort(key=lambda row: (row["date"], row["user_id"]))
+
+    _assert_same(_sql_rows(conn), python_rows)
+
+
+def test_sql_aggregation_filters_by_user(conn) -> None:
+    _seed(conn, 120)
+    entries = [
+        row
+        for row in postgres.iter_entries_for_range(
+            start=START, end=START + timedelta(days=7), projection="tokens", conn=conn
+        )
+        if row["user_id"] == USERS[0]
+    ]
+
+    _assert_same(_sql_rows(conn, USERS[0]), analytics.compute_daily_metrics(entries))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.routes import entries as entry_routes
+from backend.services.auth import AuthenticatedUser, get_current_user
+
+START = datetime(2025, 3, 1, tzinfo=UTC)
+# Pairs share a timestamp so the id tiebreak matters.
+ROWS = [
+    {
+        "id": f"00000000-0000-0000-0000-{index:012d}",
+        "user_id": "user-pages",
+        "text": f"entry {index}",
+        "created_at": (START + timedelta(minutes=index // 2)).isoformat(),
+        "emotion_json": [],
+    }
+    for index in range(7)
+]
+
+
+async def _fake_get_entries(user_id, *, projection, limit, offset, before):
+    ordered = sorted(ROWS, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+    if before is not None:
+        ordered = [row for row in ordered if (row["created_at"], row["id"]) < before]
+        offset = 0
+    return ordered[offset : offset + limit]
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> Generator[TestClient, None, None]:
+    from backend.main import app
+
+    monkeypatch.setattr(entry_routes.async_queries, "get_entries", _fake_get_entries)
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(
+        id="user-pages", email="user@example.com", raw={"role": "user"}
+    )
+    with TestClient(app, base_url="https://testserver") as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def test_cursor_pages_cover_every_entry_once(client: TestClient) -> None:
+    headers = {"x-forwarded-for": "192.0.2.41"}
+    seen: list[str] = []
+    url = "/entries?limit=3"
+    while True:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        seen += [entry["id"] for entry in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+        url = f"/entries?limit=3&cursor={cursor}"
+
+    assert seen == [row["id"] for row in sorted(ROWS, key=lambda row: (row["created_at"], row["id"]), reverse=True)]
+
+
+def test_bad_cursor_and_cursor_with_offset_are_rejected(client: TestClient) -> None:
+    headers = {"x-forwarded-for": "192.0.2.42"}
+    assert client.get("/entries?cursor=not-a-cursor", headers=headers).status_code == 400
+    cursor = entry_routes.encode_cursor(ROWS[0])
+    assert client.get(f"/entries?cursor={cursor}&offset=3", headers=headers).status_code == 400
@@ -0,0 +1,70 @@
+"""The ``update_entry_tokens`` SQL function (migration 010); needs a scratch database.
+
+    ECHO_TEST_DATABASE_URL=postgresql://postgres@localhost/echo_test pytest backend/tests/test_entry_tokens_rpc.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+DATABASE_URL = os.getenv("ECHO_TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="ECHO_TEST_DATABASE_URL not set")
+
+MIGRATION = Path(__file__).resolve().parents[1] / "db" / "migrations" / "010_update_entry_tokens.sql"
+USER = "00000000-0000-0000-0000-0000000000aa"
+STALE = "00000000-0000-0000-0000-000000000001"
+EDITED = "00000000-0000-0000-0000-000000000002"
+DELETED = "00000000-0000-0000-0000-000000000003"
+
+
+@pytest.fixture
+def conn():
+    # The function names public.entries, so the table is created for real and
+    # rolled back with everything else.
+    with psycopg.connect(DATABASE_URL) as connection:
+        connection.execute(
+            "create table public.entries (id uuid primary key, user_id uuid not null, text text not null, "
+            "tokens text[], tokens_version smallint)"
+        )
+        connection.execute(MIGRATION.read_text())
+        yield connection
+        connection.rollback()
+
+
+def _update(conn, rows) -> int:
+    (updated,) = conn.execute("select public.update_entry_tokens(%s::jsonb)", (json.dumps(rows),)).fetchone()
+    return int(updated)
+
+
+def test_updates_only_live_rows_at_another_version(conn) -> None:
+    conn.execute(
+        "insert into public.entries (id, user_id, text, tokens, tokens_version) values "
+        "(%s, %s, 'old words', null, null), (%s, %s, 'edited text', '{edited}', 2)",
+        (STALE, USER, EDITED, USER),
+    )
+    rows = [{"id": entry_id, "tokens": ["stale"], "tokens_version": 2} for entry_id in (STALE, EDITED, DELETED)]
+
+    updated = _update(conn, rows)
+
+    stored = conn.execute("select id::text, text, tokens, tokens_version from public.entries order by id").fetchall()
+    assert updated == 1
+    assert stored == [
+        (STALE, "old words", ["stale"], 2),
+        (EDITED, "edited text", ["edited"], 2),
+    ]
+
+
+def test_a_newer_version_replaces_older_tokens(conn) -> None:
+    conn.execute(
+        "insert into public.entries (id, user_id, text, tokens, tokens_version) values (%s, %s, 'text', '{old}', 1)",
+        (STALE, USER),
+    )
+
+    assert _update(conn, [{"id": STALE, "tokens": ["text"], "tokens_version": 2}]) == 1
+    assert _update(conn, [{"id": STALE, "tokens": ["again"], "tokens_version": 2}]) == 0
+    assert conn.execute("select tokens, tokens_version from public.entries").fetchone() == (["text"], 2)
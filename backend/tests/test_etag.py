@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.core import etag as etag_module
+from backend.core.cache import ResponseCache, SQLiteStore, bump_user_version
+from backend.core.etag import etag_matches, version_etag
+from backend.routes import entries as entry_routes
+from backend.services.auth import AuthenticatedUser, get_current_user
+
+
+@pytest.fixture
+def client() -> Generator[TestClient, None, None]:
+    from backend.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(
+        id="user-etag",
+        email="user@example.com",
+        raw={"role": "user"},
+    )
+    with TestClient(app, base_url="https://testserver") as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def test_unchanged_entries_poll_returns_304_without_querying(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[int] = []
+
+    async def fake_get_entries(user_id, *, projection, limit, offset, before):
+        calls.append(limit)
+        return []
+
+    monkeypatch.setattr(entry_routes.async_queries, "get_entries", fake_get_entries)
+    headers = {"x-forwarded-for": "192.0.2.40"}
+
+    first = client.get("/entries", headers=headers)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    assert etag.startswith('W/"')
+    assert first.headers["vary"] == "Authorization, Cookie"
+
+    cached = client.get("/entries", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+    assert len(calls) == 1
+
+    other_page = client.get("/entries?offset=100", headers={**headers, "If-None-Match": etag})
+    assert other_page.status_code == 200
+
+    bump_user_version("user-etag")
+    after_write = client.get("/entries", headers={**headers, "If-None-Match": etag})
+    assert after_write.status_code == 200
+    assert after_write.headers["etag"] != etag
+
+
+def test_if_none_match_uses_weak_comparison() -> None:
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_shared_version_is_read_off_the_event_loop(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SQLiteStore(str(tmp_path / "responses.sqlite3"))
+    cache = ResponseCache(maxsize=16, ttl_seconds=60, store=store)
+    monkeypatch.setattr(etag_module, "get_response_cache", lambda: cache)
+    readers: list[int] = []
+    get_version = store.get_version
+
+    def recording_get_version(user_id: str) -> int:
+        readers.append(threading.get_ident())
+        return get_version(user_id)
+
+    monkeypatch.setattr(store, "get_version", recording_get_version)
+
+    before = asyncio.run(version_etag("user-etag", "entries.list", {}))
+    cache.bump("user-etag")
+    after = asyncio.run(version_etag("user-etag", "entries.list", {}))
+
+    assert before != after
+    assert len(readers) == 2 and threading.get_ident() not in readers
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, date, datetime, timedelta
+
+from backend.benchmarks.fake_postgrest import FakePostgREST, installed
+from backend.db import async_queries, queries
+
+
+def _insert(user_id: str, created_at: datetime, text: str = "deadline at work") -> dict:
+    return queries.insert_entry(
+        user_id=user_id,
+        text=text,
+        source="web",
+        tags=["work"],
+        emotion_json=[{"label": "fear", "score": 0.8}],
+        sentiment_score=-0.5,
+        created_at=created_at,
+    )
+
+
+def test_sync_and_async_clients_share_one_store() -> None:
+    start = datetime(2025, 1, 6, 9, tzinfo=UTC)
+    with installed(FakePostgREST()):
+        for hours in range(5):
+            _insert("u1", start + timedelta(hours=hours))
+        _insert("u2", start)
+
+        newest = queries.get_entries("u1", projection="list", limit=2)
+        after = queries.get_entries(
+            "u1", projection="list", limit=10, before=(newest[-1]["created_at"], newest[-1]["id"])
+        )
+        async_rows = asyncio.run(
+            async_queries.fetch_entries_since("u1", start + timedelta(hours=2), projection="tokens")
+        )
+
+    assert [row["created_at"] for row in newest] == [
+        (start + timedelta(hours=4)).isoformat(),
+        (start + timedelta(hours=3)).isoformat(),
+    ]
+    assert len(after) == 3 and after[0]["created_at"] == (start + timedelta(hours=2)).isoformat()
+    assert "embedding" not in newest[0]
+    assert [row["created_at"] for row in async_rows] == [
+        (start + timedelta(hours=hours)).isoformat() for hours in (4, 3, 2)
+    ]
+
+
+def test_upserts_merge_on_conflict_and_rpcs_run() -> None:
+    fake = FakePostgREST()
+    with installed(fake):
+        record = {"user_id": "u1", "date": "2025-01-06", "message_count": 1, "emotion_counts": {"joy": 1}}
+        queries.upsert_daily_metrics([record])
+        queries.upsert_daily_metrics([{**record, "message_count": 3}])
+        queries.record_trigger_observation("u1", date(2025, 1, 1), "fear", ["t1"])
+        queries.record_trigger_observation("u1", date(2025, 1, 1), "fear", ["t1"])
+        _insert("u1", datetime(2025, 1, 6, 9, tzinfo=UTC))
+
+        stored = queries.get_daily_metrics("u1", date(2025, 1, 1), date(2025, 1, 31))
+        stats = queries.get_trigger_stats("u1", date(2025, 1, 1))
+        aggregated = queries.aggregate_daily_metrics(
+            "u1", start=datetime(2025, 1, 6, tzinfo=UTC), end=datetime(2025, 1, 7, tzinfo=UTC)
+        )
+
+    assert [row["message_count"] for row in stored] == [3]
+    assert stats == [{"trigger_id": "t1", "month_start": "2025-01-01", "match_count": 2, "emotion_counts": {"fear": 2}}]
+    assert aggregated[0]["top_emotion"] == "fear" and aggregated[0]["message_count"] == 1
+
+
+def test_load_harness_drives_every_route_without_errors() -> None:
+    from backend.benchmarks import load
+
+    report = load.run(users=2, entries=20, concurrency=4, requests=len(load.ROUTES) * 4)
+
+    assert report["errors"] == 0
+    assert set(report["routes"]) == set(load.ROUTES)
+    assert report["backend_requests"] > 0
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+
+import httpx
+import pytest
+
+from backend.core.logging import StructuredFormatter
+from backend.db import instrument
+from backend.db.instrument import get_query_metrics, instrumented
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    get_query_metrics.cache_clear()
+    yield
+    get_query_metrics.cache_clear()
+
+
+def _client(handler) -> httpx.Client:
+    session = httpx.Client(base_url="https://supabase.test/rest/v1", transport=httpx.MockTransport(handler))
+    instrument.install_hooks(session)
+    return session
+
+
+def _stats(function: str):
+    return next(item for item in get_query_metrics().snapshot() if item["function"] == function)
+
+
+def test_calls_record_latency_rows_and_response_bytes() -> None:
+    body = [{"id": "e1"}, {"id": "e2"}]
+    session = _client(lambda request: httpx.Response(200, json=body))
+
+    @instrumented("entries")
+    def list_entries():
+        return session.get("/entries", params={"user_id": "eq.u1"}).json()
+
+    list_entries()
+    list_entries()
+
+    stats = _stats("test_instrument.test_calls_record_latency_rows_and_response_bytes.<locals>.list_entries")
+    assert stats["table"] == "entries"
+    assert stats["latency_seconds"]["count"] == 2
+    assert stats["rows"]["sum"] == 4
+    assert stats["response_bytes"]["sum"] == 2 * len(json.dumps(body).encode())
+    assert stats["rows"]["buckets"]["1"] == 0 and stats["rows"]["buckets"]["10"] == 2
+    assert stats["errors"] == {}
+
+
+def test_errors_are_counted_by_class() -> None:
+    @instrumented("triggers")
+    def broken():
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        broken()
+
+    stats = _stats("test_instrument.test_errors_are_counted_by_class.<locals>.broken")
+    assert stats["errors"] == {"ConnectionError": 1}
+    assert stats["rows"]["sum"] == 0
+
+
+def test_slow_queries_log_the_filter_chain(monkeypatch: pytest.MonkeyPatch, caplog) -> None:
+    monkeypatch.setenv("SLOW_QUERY_THRESHOLD_MS", "1")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(0.005)
+        return httpx.Response(200, json=[])
+
+    session = _client(handler)
+
+    @instrumented("entries")
+    def slow():
+        return session.get("/entries", params={"select": "id,text", "user_id": "eq.u1"}).json()
+
+    with caplog.at_level(logging.WARNING, logger="backend.db.instrument"):
+        slow()
+
+    record = next(record for record in caplog.records if record.getMessage() == "db.slow_query")
+    assert record.filters == ["GET /rest/v1/entries?select=id,text&user_id=eq.u1"]
+    assert record.duration_ms >= 5
+    logged = json.loads(StructuredFormatter().format(record))
+    assert logged["table"] == "entries" and logged["requests"] == 1
+
+
+def test_nested_and_async_calls_share_responses() -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=[{"id": 1}])
+
+    @instrumented("entries")
+    async def inner(session: httpx.AsyncClient):
+        return (await session.get("/entries")).json()
+
+    @instrumented("entries")
+    async def outer():
+        async with httpx.AsyncClient(
+            base_url="https://supabase.test",
+            transport=httpx.MockTransport(handler),
+            event_hooks={"response": [instrument.on_response_async]},
+        ) as session:
+            return await inner(session) + await inner(session)
+
+    assert asyncio.run(outer()) == [{"id": 1}, {"id": 1}]
+
+    prefix = "test_instrument.test_nested_and_async_calls_share_responses.<locals>."
+    inner_bytes = _stats(prefix + "inner")["response_bytes"]["sum"]
+    assert inner_bytes > 0
+    assert _stats(prefix + "outer")["response_bytes"]["sum"] == inner_bytes
+    assert _stats(prefix + "inner")["latency_seconds"]["count"] == 2
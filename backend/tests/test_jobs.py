@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from backend.services.jobs import JobManager
+
+
+def test_identical_jobs_are_deduplicated_until_finished() -> None:
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+    calls: list[str] = []
+
+    def work(job):
+        calls.append(job.id)
+        job.report(0.5, {"entries": 12})
+        release.wait(timeout=5)
+        return {"daily": 3}
+
+    first, created_first = manager.submit(user_id="u1", kind="recompute", scope="daily", func=work)
+    second, created_second = manager.submit(user_id="u1", kind="recompute", scope="daily", func=work)
+    other, created_other = manager.submit(user_id="u1", kind="recompute", scope="weekly", func=work)
+
+    assert created_first and not created_second and created_other
+    assert second is first
+
+    release.set()
+    manager.shutdown(wait=True)
+
+    finished = manager.get(first.id)
+    assert finished is not None
+    status = finished.to_dict()
+    assert status["status"] == "succeeded"
+    assert status["progress"] == 1.0
+    assert status["rows"] == {"entries": 12, "daily": 3}
+    assert len(calls) == 2
+
+
+def test_failed_job_reports_error_class() -> None:
+    manager = JobManager(max_workers=1)
+
+    def boom(job):
+        raise RuntimeError("scan failed")
+
+    job, _ = manager.submit(user_id="u1", kind="recompute", scope="daily", func=boom)
+    manager.shutdown(wait=True)
+
+    status = job.to_dict()
+    assert status["status"] == "failed"
+    assert status["error"] == "RuntimeError"
+
+
+def test_shutdown_cancels_queued_jobs_and_refuses_new_ones() -> None:
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(job):
+        started.set()
+        release.wait(timeout=5)
+        return {"daily": 1}
+
+    running, _ = manager.submit(user_id="u1", kind="recompute", scope="daily", func=slow)
+    queued, _ = manager.submit(user_id="u2", kind="recompute", scope="daily", func=slow)
+    assert started.wait(timeout=5)
+
+    manager.shutdown(wait=False)
+    release.set()
+
+    assert queued.to_dict()["status"] == "cancelled"
+    assert running.to_dict()["status"] == "cancelled"
+    assert running.to_dict()["finished_at"] is not None
+    with pytest.raises(RuntimeError):
+        manager.submit(user_id="u3", kind="recompute", scope="daily", func=slow)
+
+
+def test_shutdown_with_wait_lets_running_jobs_finish() -> None:
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(job):
+        started.set()
+        release.wait(timeout=5)
+        return {"daily": 1}
+
+    running, _ = manager.submit(user_id="u1", kind="recompute", scope="daily", func=slow)
+    queued, _ = manager.submit(user_id="u2", kind="recompute", scope="daily", func=slow)
+    assert started.wait(timeout=5)
+    threading.Timer(0.05, release.set).start()
+
+    manager.shutdown(wait=True)
+
+    assert running.to_dict()["status"] == "succeeded"
+    assert queued.to_dict()["status"] == "cancelled"
+
+
+def test_app_shutdown_drains_the_job_manager() -> None:
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+    from backend.services.jobs import get_job_manager
+
+    manager = get_job_manager()
+    with TestClient(app, base_url="https://testserver"):
+        pass
+
+    assert manager._closed
+    assert get_job_manager() is not manager
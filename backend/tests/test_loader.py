@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from backend.db import loader, queries
+
+
+def test_identical_reads_run_once_per_scope() -> None:
+    calls: list[str] = []
+
+    def fetch() -> str:
+        calls.append("x")
+        return "value"
+
+    with loader.query_scope() as scope:
+        assert loader.load("digest_prefs", "u1", fetch) == "value"
+        assert loader.load("digest_prefs", "u1", fetch) == "value"
+        with loader.query_scope() as nested:
+            assert nested is scope
+            loader.load("digest_prefs", "u1", fetch)
+    assert calls == ["x"]
+    assert (scope.hits, scope.misses) == (2, 1)
+
+    loader.load("digest_prefs", "u1", fetch)
+    assert len(calls) == 2  # no scope, no memo
+    assert loader.current_scope() is None
+
+
+def test_batch_fetches_only_unseen_keys() -> None:
+    batches: list[list[str]] = []
+
+    def fetch_many(keys):
+        batches.append(list(keys))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    with loader.query_scope():
+        assert loader.load_many("t", ["a", "b", "a"], fetch_many) == {"a": "A", "b": "B"}
+        assert loader.load_many("t", ["b", "c", "missing"], fetch_many) == {"b": "B", "c": "C", "missing": None}
+        loader.load_many("t", ["missing"], fetch_many)
+    assert batches == [["a", "b"], ["c", "missing"]]
+
+
+class _Query:
+    def __init__(self, table: "_Table") -> None:
+        self._table = table
+        self.filters: dict[str, object] = {}
+
+    def select(self, _columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = [value]
+        return self
+
+    def in_(self, column, values):
+        self.filters[column] = list(values)
+        return self
+
+    def gte(self, *_):
+        return self
+
+    def lte(self, *_):
+        return self
+
+    def order(self, *_):
+        return self
+
+    def execute(self):
+        self._table.queries.append(self.filters["user_id"])
+        rows = [row for row in self._table.rows if row["user_id"] in self.filters["user_id"]]
+        return type("Response", (), {"data": rows})()
+
+
+class _Table:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+        self.queries: list[list[str]] = []
+
+
+def test_weekly_metrics_for_users_is_one_query(monkeypatch: pytest.MonkeyPatch) -> None:
+    week = date(2025, 3, 3)
+    table = _Table([{"user_id": "u1", "week_start": "2025-03-03"}, {"user_id": "u3", "week_start": "2025-03-03"}])
+    client = type("Client", (), {"table": lambda self, name: _Query(table)})()
+    monkeypatch.setattr(queries, "get_client", lambda: client)
+
+    with loader.query_scope():
+        found = queries.get_weekly_metrics_for_users(["u1", "u2", "u3"], week, week)
+        assert queries.get_weekly_metrics("u2", week, week) == []
+    assert [len(rows) for rows in found.values()] == [1, 0, 1]
+    assert table.queries == [["u1", "u2", "u3"]]
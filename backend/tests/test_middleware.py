@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncIterator, List
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.types import Message
+
+from backend.core.middleware import (
+    BodySizeLimitMiddleware,
+    RequestContextMiddleware,
+    SecurityHeadersMiddleware,
+)
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request) -> dict:
+        return {"size": len(await request.body())}
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks() -> AsyncIterator[bytes]:
+            for index in range(3):
+                yield f"chunk-{index}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(BodySizeLimitMiddleware, max_body_size=16)
+    app.add_middleware(SecurityHeadersMiddleware, referrer_policy="no-referrer")
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def _request(app, method: str, path: str, **kwargs) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="https://testserver") as client:
+        return await client.request(method, path, **kwargs)
+
+
+def test_headers_are_added_to_streamed_responses_without_buffering() -> None:
+    app = _app()
+    sent: List[Message] = []
+
+    async def run() -> None:
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        disconnected = asyncio.Event()
+
+        async def receive() -> Message:
+            if messages:
+                return messages.pop()
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "https",
+            "path": "/stream",
+            "raw_path": b"/stream",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver"), (b"x-request-id", b"req-1")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 443),
+        }
+        await app(scope, receive, send)
+
+    asyncio.run(run())
+
+    start, *bodies = sent
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    assert headers["x-request-id"] == "req-1"
+    assert headers["referrer-policy"] == "no-referrer"
+    assert headers["strict-transport-security"].startswith("max-age=")
+    assert "x-response-time" in headers
+    chunks = [message["body"] for message in bodies if message["body"]]
+    assert chunks == [b"chunk-0\n", b"chunk-1\n", b"chunk-2\n"]
+
+
+def test_body_limit_counts_streamed_chunks() -> None:
+    app = _app()
+
+    async def upload(size: int) -> AsyncIterator[bytes]:
+        for _ in range(size):
+            yield b"x"
+
+    small = asyncio.run(_request(app, "POST", "/echo", content=upload(8)))
+    chunked = asyncio.run(_request(app, "POST", "/echo", content=upload(64)))
+    declared = asyncio.run(_request(app, "POST", "/echo", content=b"x" * 64))
+    bogus = asyncio.run(_request(app, "POST", "/echo", content=b"x", headers={"content-length": "nope"}))
+
+    assert small.status_code == 200 and small.json() == {"size": 8}
+    assert "content-length" not in chunked.request.headers
+    assert chunked.status_code == 413 and chunked.json()["detail"] == "Request body too large."
+    assert declared.status_code == 413 and declared.json()["limit_bytes"] == 16
+    assert bogus.status_code == 400
+
+
+def test_body_limit_answers_when_a_plain_asgi_app_reads_the_body() -> None:
+    async def reader(scope, receive, send) -> None:
+        while (await receive()).get("more_body"):
+            pass
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for _ in range(4):
+            yield b"x" * 8
+
+    response = asyncio.run(
+        _request(BodySizeLimitMiddleware(reader, max_body_size=16), "POST", "/", content=chunks())
+    )
+
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body too large.", "limit_bytes": 16}
+
+
+def test_request_is_logged_when_the_response_body_is_sent(caplog) -> None:
+    logged_before_background_work: List[bool] = []
+
+    async def app(scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok", "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        # Stands in for a background task, which runs after the body is sent.
+        logged_before_background_work.append(
+            any(record.getMessage() == "request.completed" for record in caplog.records)
+        )
+        await asyncio.sleep(0.2)
+
+    with caplog.at_level(logging.INFO, logger="backend.request"):
+        response = asyncio.run(_request(RequestContextMiddleware(app), "GET", "/slow-background"))
+
+    completed = [record for record in caplog.records if record.getMessage() == "request.completed"]
+    assert response.status_code == 201
+    assert logged_before_background_work == [True]
+    assert len(completed) == 1
+    assert completed[0].status_code == 201
+    assert completed[0].duration_ms < 200
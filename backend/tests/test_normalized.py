@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from backend.services import insights, triggers
+from backend.services.reporting import _keyword_stats
+from backend.services.normalized import NormalizedEntry, normalize_entries, normalize_entry
+from backend.services.summarizer import WeeklySummarizer
+
+
+def _row(**overrides):
+    row = {
+        "id": "entry-1",
+        "user_id": "user-1",
+        "text": "Deadline stress at work again, work never stops",
+        "created_at": "2025-10-06T22:30:00Z",
+        "emotion_json": [
+            {"label": "Fear", "score": 0.2},
+            {"label": "Anger", "score": 0.7},
+        ],
+        "tags": ["Work"],
+    }
+    row.update(overrides)
+    return row
+
+
+def test_normalize_entry_derives_fields_once() -> None:
+    entry = normalize_entry(_row())
+
+    assert entry.created_at == datetime(2025, 10, 6, 22, 30, tzinfo=timezone.utc)
+    assert entry.day is not None and entry.day.isoformat() == "2025-10-06"
+    assert entry.top_label == "anger"
+    assert entry.top_score == 0.7
+    assert entry.bucket == "Night"
+    assert entry.weekday == 0
+    assert entry.tags == ("work",)
+    assert entry.tokens == ["deadline", "stress", "work", "again", "work", "never", "stops"]
+    assert entry.sentiment is not None and entry.sentiment < 0
+    assert not hasattr(entry, "__dict__")
+
+
+def test_normalize_entries_passes_through_normalized_items() -> None:
+    entry = normalize_entry(_row())
+    assert normalize_entries([entry])[0] is entry
+    assert isinstance(normalize_entries([_row()])[0], NormalizedEntry)
+
+
+def test_services_accept_normalized_entries() -> None:
+    rows = [_row(), _row(id="entry-2", text="Calm walk", emotion_json=[{"label": "joy", "score": 0.9}])]
+    entries = normalize_entries(rows)
+
+    assert insights.summarize_entries(entries) == insights.summarize_entries(rows)
+    stats = triggers.compute_trigger_stats(entries, [{"id": "t1", "name": "Work", "words": ["work"]}])
+    assert stats[0]["stats"]["count"] == 1
+    assert WeeklySummarizer().summarize(entries) == WeeklySummarizer().summarize(rows)
+
+
+def test_stored_tokens_are_used_only_for_the_current_tokenizer() -> None:
+    from backend.services.tokens import TOKENIZER_VERSION
+
+    stored = normalize_entry(_row(tokens=["precomputed", "work"], tokens_version=TOKENIZER_VERSION))
+    stale = normalize_entry(_row(tokens=["precomputed"], tokens_version=TOKENIZER_VERSION - 1))
+
+    assert stored.tokens == ["precomputed", "work"]
+    assert stale.tokens == ["deadline", "stress", "work", "again", "work", "never", "stops"]
+
+
+def test_shared_vocabulary_is_replaced_once_full(monkeypatch) -> None:
+    from backend.services import tokens
+
+    old = normalize_entry(_row())
+    monkeypatch.setattr(tokens, "MAX_VOCABULARY_SIZE", old.vocabulary.size)
+    fresh = tokens.current_vocabulary()
+    assert fresh is not old.vocabulary
+    assert fresh.size == 0
+    assert tokens.current_vocabulary() is fresh
+
+    # Entries keep decoding through the vocabulary that issued their ids, and a
+    # batch mixing both is re-encoded into one.
+    assert old.tokens[:2] == ["deadline", "stress"]
+    batch = normalize_entries([_row(id="entry-2"), old], fresh)
+    assert {entry.vocabulary for entry in batch} == {fresh}
+    assert batch[1].tokens == old.tokens
+    stats = triggers.compute_trigger_stats(
+        [old, _row(id="entry-3", text="calm")], [{"id": "t1", "name": "Work", "words": ["work"]}], user_id="u-vocab"
+    )
+    assert stats[0]["stats"]["count"] == 1
+    assert triggers.match_trigger_name("work again", [{"name": "Work", "words": ["work"]}], user_id="u-vocab") == "Work"
+
+
+def test_keyword_sentiment_falls_back_to_emotions_when_no_score_is_stored() -> None:
+    rows = [
+        _row(id="scored", text="work deadline", sentiment_score=0.5),
+        _row(id="derived", text="work calm", emotion_json=[{"label": "joy", "score": 1.0}]),
+        _row(id="neither", text="work", emotion_json=[]),
+    ]
+
+    stats = {item["term"]: item for item in _keyword_stats(normalize_entries(rows))}
+
+    assert stats["work"]["count"] == 3
+    assert stats["work"]["avg_sentiment"] == pytest.approx((0.5 + 0.9 + 0.0) / 3)
+    assert stats["calm"]["avg_sentiment"] == pytest.approx(0.9)
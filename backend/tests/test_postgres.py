@@ -0,0 +1,118 @@
+"""Direct Postgres backend tests; they need a scratch database.
+
+    ECHO_TEST_DATABASE_URL=postgresql://postgres@localhost/echo_test pytest backend/tests/test_postgres.py
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+DATABASE_URL = os.getenv("ECHO_TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="ECHO_TEST_DATABASE_URL not set")
+
+from backend.db import postgres  # noqa: E402
+
+
+@pytest.fixture
+def conn():
+    # Temp tables shadow any real ones for this connection only.
+    with psycopg.connect(DATABASE_URL) as connection:
+        connection.execute(
+            "create temp table entries (id uuid primary key, user_id uuid not null, text text, "
+            "tags text[] default '{}', emotion_json jsonb, created_at timestamptz not null, "
+            "entry_length int, time_of_day text, weekday int, sentiment_score numeric, "
+            "tokens text[], tokens_version smallint)"
+        )
+        connection.execute(
+            "create temp table daily_metrics (user_id uuid not null, date date not null, "
+            "entry_count int not null default 0, emotion_counts jsonb, avg_sentiment numeric, "
+            "primary key (user_id, date))"
+        )
+        connection.commit()
+        yield connection
+
+
+USER = "00000000-0000-0000-0000-0000000000aa"
+
+
+def test_stream_returns_rest_shaped_rows(conn) -> None:
+    start = datetime(2025, 1, 6, tzinfo=UTC)
+    for index in range(5):
+        conn.execute(
+            "insert into entries (id, user_id, text, emotion_json, created_at, sentiment_score) "
+            "values (gen_random_uuid(), %s, %s, %s, %s, 0.25)",
+            (USER, f"entry {index}", '[{"label": "joy", "score": 0.9}]', start + timedelta(hours=index)),
+        )
+    conn.commit()
+
+    rows = list(
+        postgres.iter_entries_for_range(
+            start=start, end=start + timedelta(days=1), projection="analytics", batch_size=2, conn=conn
+        )
+    )
+
+    assert len(rows) == 5
+    assert rows[0]["user_id"] == USER
+    assert rows[0]["created_at"].startswith("2025-01-06T00:00:00")
+    assert rows[0]["emotion_json"] == [{"label": "joy", "score": 0.9}]
+    assert rows[0]["sentiment_score"] == 0.25
+
+
+def test_copy_upsert_merges_on_conflict(conn) -> None:
+    record = {"user_id": USER, "date": "2025-01-06", "entry_count": 1, "emotion_counts": {"joy": 1}}
+    postgres.copy_upsert("daily_metrics", [record], on_conflict="user_id,date", conn=conn)
+    result = postgres.copy_upsert(
+        "daily_metrics",
+        [{**record, "entry_count": 3, "emotion_counts": {"joy": 2, "fear": 1}}],
+        on_conflict="user_id,date",
+        conn=conn,
+    )
+
+    stored = conn.execute("select entry_count, emotion_counts from daily_metrics").fetchall()
+    assert result.rows == 1
+    assert stored == [(3, {"joy": 2, "fear": 1})]
+
+
+def test_copy_upsert_rejects_records_with_different_keys(conn) -> None:
+    records = [
+        {"user_id": USER, "date": "2025-01-06", "entry_count": 1},
+        {"user_id": USER, "date": "2025-01-07", "avg_sentiment": 0.5},
+    ]
+
+    with pytest.raises(postgres.DatabaseError, match="Record 1"):
+        postgres.copy_upsert("daily_metrics", records, on_conflict="user_id,date", conn=conn)
+
+    assert conn.execute("select count(*) from daily_metrics").fetchone() == (0,)
+
+
+def test_copy_upsert_with_a_column_subset_updates_existing_rows(conn) -> None:
+    entry_id = "00000000-0000-0000-0000-0000000000e1"
+    conn.execute(
+        "insert into entries (id, user_id, text, created_at) values (%s, %s, 'first', now())",
+        (entry_id, USER),
+    )
+    conn.commit()
+
+    # A token rewrite sends neither user_id nor created_at, both not null.
+    result = postgres.copy_upsert(
+        "entries",
+        [{"id": entry_id, "tokens": ["first"], "tokens_version": 2}],
+        on_conflict="id",
+        conn=conn,
+    )
+
+    stored = conn.execute("select user_id::text, text, tokens, tokens_version from entries").fetchall()
+    assert result.rows == 1
+    assert stored == [(USER, "first", ["first"], 2)]
+
+    with pytest.raises(postgres.DatabaseError, match="omit required columns: user_id, created_at"):
+        postgres.copy_upsert(
+            "entries",
+            [{"id": "00000000-0000-0000-0000-0000000000e2", "tokens": [], "tokens_version": 2}],
+            on_conflict="id",
+            conn=conn,
+        )
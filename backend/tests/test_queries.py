@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from backend.db import queries
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _UpsertCall:
+    def __init__(self, table: "_Table", rows, returning) -> None:
+        self._table = table
+        self._rows = rows
+        self._returning = returning
+
+    def execute(self) -> _Response:
+        self._table.calls.append((len(self._rows), self._returning))
+        if self._table.failures_left.get(self._rows[0]["id"], 0) > 0:
+            self._table.failures_left[self._rows[0]["id"]] -= 1
+            raise ConnectionError("transient")
+        return _Response(list(self._rows) if self._returning == "representation" else [])
+
+
+class _Table:
+    def __init__(self, failures_left: dict[int, int] | None = None) -> None:
+        self.calls: list[tuple[int, str]] = []
+        self.failures_left = failures_left or {}
+
+    def upsert(self, rows, *, on_conflict: str, returning: str) -> _UpsertCall:
+        return _UpsertCall(self, rows, returning)
+
+
+class _Client:
+    def __init__(self, table: _Table) -> None:
+        self._table = table
+
+    def table(self, _: str) -> _Table:
+        return self._table
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(queries, "BULK_RETRY_BACKOFF_SECONDS", 0.0)
+
+
+def test_bulk_upsert_chunks_and_retries_only_failed_chunk(monkeypatch: pytest.MonkeyPatch) -> None:
+    table = _Table(failures_left={4: 1})
+    monkeypatch.setattr(queries, "get_client", lambda: _Client(table))
+    records = [{"id": index} for index in range(10)]
+
+    result = queries.bulk_upsert("daily_metrics", records, on_conflict="id", chunk_size=4)
+
+    assert result.rows == 10
+    assert result.chunks == 3
+    assert result.retries == 1
+    assert result.records == []
+    assert [size for size, _ in table.calls] == [4, 4, 4, 2]
+    assert all(returning == "minimal" for _, returning in table.calls)
+    assert result.bytes_sent > 0
+
+
+def test_bulk_upsert_raises_after_exhausting_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    table = _Table(failures_left={0: 10})
+    monkeypatch.setattr(queries, "get_client", lambda: _Client(table))
+    records = [{"id": index} for index in range(4)]
+
+    with pytest.raises(queries.DatabaseError):
+        queries.bulk_upsert(
+            "daily_metrics", records, on_conflict="id", chunk_size=2, max_workers=2, max_retries=1
+        )
+    assert len(table.calls) == 3
+
+
+def test_representation_mode_returns_rows(monkeypatch: pytest.MonkeyPatch) -> None:
+    table = _Table()
+    monkeypatch.setattr(queries, "get_client", lambda: _Client(table))
+
+    rows = queries.upsert_weekly_metrics([{"id": 1}, {"id": 2}], returning="representation")
+
+    assert rows == [{"id": 1}, {"id": 2}]
+
+
+def test_entry_projections_never_select_embeddings() -> None:
+    for projection in queries.ENTRY_PROJECTIONS:
+        columns = queries.entry_columns(projection).split(",")
+        assert "*" not in columns and "embedding" not in columns
+    assert "tokens" not in queries.entry_columns("analytics")
+    with pytest.raises(ValueError):
+        queries.entry_columns("everything")
+
+
+def test_aggregate_daily_metrics_calls_rpc(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    class _RpcClient:
+        def rpc(self, name, params):
+            calls.append((name, params))
+            return self
+
+        def execute(self) -> _Response:
+            return _Response([{"id": 0}])
+
+    monkeypatch.setattr(queries, "get_client", lambda: _RpcClient())
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+
+    rows = queries.aggregate_daily_metrics(None, start=start, end=start + timedelta(days=1))
+
+    assert rows == [{"id": 0}]
+    assert calls == [
+        (
+            "compute_daily_metrics",
+            {"p_start": start.isoformat(), "p_end": "2025-01-02T00:00:00+00:00", "p_user_id": None},
+        )
+    ]
+
+
+def test_save_entry_tokens_sends_only_token_columns_to_the_rpc(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    class _RpcClient:
+        def rpc(self, name, params):
+            calls.append((name, params))
+            return self
+
+        def execute(self) -> _Response:
+            # The SQL function returns how many rows it updated in the chunk.
+            return _Response(len(calls[-1][1]["p_rows"]) - 1)
+
+    monkeypatch.setattr(queries, "get_client", lambda: _RpcClient())
+    records = [
+        {"id": f"e{index}", "user_id": "u1", "text": "stale text", "tokens": ["word"], "tokens_version": 2}
+        for index in range(3)
+    ]
+
+    result = queries.save_entry_tokens(records, chunk_size=2)
+
+    assert [name for name, _ in calls] == ["update_entry_tokens", "update_entry_tokens"]
+    assert [params["p_rows"] for _, params in calls] == [
+        [{"id": "e0", "tokens": ["word"], "tokens_version": 2}, {"id": "e1", "tokens": ["word"], "tokens_version": 2}],
+        [{"id": "e2", "tokens": ["word"], "tokens_version": 2}],
+    ]
+    assert result.rows == 1 and result.chunks == 2
\ No newline at end of file
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from typing import List
+from uuid import UUID
+
+import numpy as np
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from backend.core import serialization
+from backend.core.serialization import FastJSONResponse, dumps, json_response
+from backend.routes.entries import EntryOut
+
+
+def test_dumps_matches_fastapi_encoding_for_row_types() -> None:
+    payload = {
+        "date": date(2025, 1, 6),
+        "created_at": datetime(2025, 1, 6, 9, 30, tzinfo=UTC),
+        "id": UUID("00000000-0000-0000-0000-000000000001"),
+        "ratio": Decimal("0.25"),
+        "tags": {"work"},
+        "emotion_counts": {"joy": 2, "fear": 1},
+        "text": "café ☕",
+        "nested": [{"score": 0.5, "missing": None}],
+    }
+
+    assert json.loads(dumps(payload)) == json.loads(json.dumps(jsonable_encoder(payload)))
+    assert "☕".encode() in dumps(payload)
+
+
+def test_dumps_handles_numpy_int_keys_and_wide_ints() -> None:
+    assert json.loads(dumps({1: np.float64(0.5), 2: np.int64(3)})) == {"1": 0.5, "2": 3}
+    assert json.loads(dumps({"big": 2**70})) == {"big": 2**70}
+
+
+def test_stdlib_fallback_produces_the_same_bytes(monkeypatch) -> None:
+    payload = {"rows": [{"date": date(2025, 1, 6), "avg_sentiment": -0.25}], "total": 1}
+    fast = dumps(payload)
+
+    monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+
+    assert dumps(payload) == fast
+    assert FastJSONResponse(payload).body == fast
+
+
+def test_non_finite_floats_encode_as_null_on_both_paths(monkeypatch) -> None:
+    payload = {
+        "avg_sentiment": float("nan"),
+        "bounds": (float("inf"), -float("inf"), 0.5),
+        "numpy": np.float64("nan"),
+        "days": {date(2025, 1, 6)},
+    }
+    expected = b'{"avg_sentiment":null,"bounds":[null,null,0.5],"numpy":null,"days":["2025-01-06"]}'
+
+    assert dumps(payload) == expected
+    assert dumps({"big": 2**70, "nan": float("nan")}) == b'{"big":1180591620717411303424,"nan":null}'
+
+    monkeypatch.setattr(serialization, "ORJSON_AVAILABLE", False)
+
+    assert dumps(payload) == expected
+    assert FastJSONResponse(payload).body == expected
+
+
+def test_json_response_keeps_route_headers_and_pydantic_encoding() -> None:
+    entry = EntryOut(
+        id="e1",
+        user_id="u1",
+        text="hello",
+        created_at=datetime(2025, 1, 6, 9, tzinfo=UTC),
+    )
+    adapter = TypeAdapter(List[EntryOut])
+    injected = Response()
+    del injected.headers["content-length"]
+    injected.headers["ETag"] = '"v1"'
+    injected.headers["X-Next-Cursor"] = "abc"
+
+    result = json_response([entry], injected, adapter=adapter)
+
+    assert result.headers["etag"] == '"v1"'
+    assert result.headers["x-next-cursor"] == "abc"
+    assert result.headers["content-length"] == str(len(result.body))
+    assert result.headers["content-type"] == "application/json"
+    assert json.loads(result.body) == json.loads(json.dumps(adapter.dump_python([entry], mode="json")))
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import numpy as np
+
+from backend.services.normalized import normalize_entries
+from backend.services.trigger_discovery import DocumentTermMatrix, discover_triggers
+
+
+def _entry(index: int, text: str, label: str, sentiment: float) -> dict:
+    return {
+        "id": f"e{index}",
+        "user_id": "u1",
+        "text": text,
+        "created_at": f"2025-09-{index % 28 + 1:02d}T09:00:00Z",
+        "emotion_json": [{"label": label, "score": 0.9}],
+        "sentiment_score": sentiment,
+    }
+
+
+def _corpus() -> list[dict]:
+    rows = []
+    for index in range(12):
+        rows.append(_entry(index, "group chat drama again today", "anxiety", -0.6))
+    for index in range(12, 30):
+        rows.append(_entry(index, "walked the dog today, lovely weather", "joy", 0.7))
+    for index in range(30, 36):
+        rows.append(_entry(index, "long meeting today", "neutral", 0.0))
+    return rows
+
+
+def test_matrix_column_sums_match_dense_counts() -> None:
+    entries = normalize_entries(_corpus()[:14])
+    matrix = DocumentTermMatrix.from_entries(entries)
+    dense = np.zeros(matrix.shape)
+    dense[matrix.row_ids(), matrix.indices] = 1
+    weights = np.arange(matrix.shape[0], dtype=float)
+
+    assert np.array_equal(matrix.column_sums(), dense.sum(axis=0))
+    assert np.allclose(matrix.column_sums(weights), weights @ dense)
+
+
+def test_discovery_ranks_terms_tied_to_difficult_entries() -> None:
+    results = discover_triggers(_corpus(), exclude=["drama"], limit=10)
+    terms = [item["term"] for item in results]
+
+    assert "group chat" in terms and "chat" in terms
+    assert "drama" not in terms
+    assert "today" not in terms  # appears everywhere, so no association
+    assert "dog" not in terms
+    top = results[0]
+    assert top["difficult_rate"] == 1.0
+    assert top["lift"] == 3.0
+    assert top["sentiment_delta"] < -1.0
+    assert [item["zscore"] for item in results] == sorted((item["zscore"] for item in results), reverse=True)
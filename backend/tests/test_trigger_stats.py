@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from datetime import UTC, date, datetime
+
+import pytest
+
+from backend.services import trigger_stats
+from backend.services.triggers import compute_trigger_stats
+
+
+NOW = datetime(2025, 10, 20, 12, 0, tzinfo=UTC)
+TRIGGERS = [
+    {"id": "t-work", "name": "Work", "words": ["work", "deadline*"]},
+    {"id": "t-family", "name": "Family", "words": ["family"]},
+]
+
+
+def _entry(index: int, created_at: str, text: str, label: str) -> dict:
+    return {
+        "id": f"e{index}",
+        "user_id": "u1",
+        "text": text,
+        "created_at": created_at,
+        "emotion_json": [{"label": label, "score": 0.8}],
+    }
+
+
+ENTRIES = [
+    _entry(0, "2025-05-03T09:00:00Z", "deadlines at work", "fear"),
+    _entry(1, "2025-07-14T09:00:00Z", "family picnic", "joy"),
+    _entry(2, "2025-10-01T09:00:00Z", "work then family dinner", "joy"),
+    _entry(3, "2025-10-02T09:00:00Z", "quiet walk", "neutral"),
+]
+
+
+def test_stored_counters_reproduce_live_stats(monkeypatch: pytest.MonkeyPatch) -> None:
+    since_month = trigger_stats.window_start(NOW)
+    baselines, stats = trigger_stats.build_stat_records(
+        "u1", ENTRIES, TRIGGERS, since_month=since_month, until=NOW.date()
+    )
+
+    assert since_month == date(2025, 4, 1)
+    assert [row["month_start"] for row in baselines] == [
+        "2025-04-01", "2025-05-01", "2025-06-01", "2025-07-01", "2025-08-01", "2025-09-01", "2025-10-01",
+    ]
+    assert {(row["trigger_id"], row["month_start"]): row["match_count"] for row in stats} == {
+        ("t-work", "2025-05-01"): 1,
+        ("t-work", "2025-10-01"): 1,
+        ("t-family", "2025-07-01"): 1,
+        ("t-family", "2025-10-01"): 1,
+    }
+
+    monkeypatch.setattr(trigger_stats.queries, "get_trigger_baselines", lambda user_id, since: baselines)
+    monkeypatch.setattr(trigger_stats.queries, "get_trigger_stats", lambda user_id, since: stats)
+
+    stored = trigger_stats.load_trigger_stats("u1", TRIGGERS, now=NOW)
+    assert stored == compute_trigger_stats(ENTRIES, TRIGGERS)
+
+
+def test_partial_counters_are_not_trusted(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Only increments since the current month exist: the window is not covered.
+    monkeypatch.setattr(
+        trigger_stats.queries,
+        "get_trigger_baselines",
+        lambda user_id, since: [{"month_start": "2025-10-01", "entry_count": 2, "emotion_counts": {"joy": 2}}],
+    )
+
+    assert trigger_stats.load_trigger_stats("u1", TRIGGERS, now=NOW) is None
+
+
+def test_record_entry_sends_matched_trigger_ids(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    monkeypatch.setattr(trigger_stats.queries, "list_triggers", lambda user_id: TRIGGERS)
+    monkeypatch.setattr(
+        trigger_stats.queries,
+        "record_trigger_observation",
+        lambda *args, **kwargs: calls.append((args, kwargs)),
+    )
+
+    trigger_stats.record_entry(ENTRIES[2])
+
+    assert calls == [(("u1", date(2025, 10, 1), "joy", ["t-work", "t-family"]), {"entry_id": "e2"})]
+
+
+def test_rebuild_opens_its_generation_before_fetching(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def begin_trigger_stats_rebuild(user_id):
+        calls.append(("begin",))
+        return 7
+
+    def fetch_entries_since(user_id, since, *, projection):
+        calls.append(("fetch", since.date()))
+        return ENTRIES
+
+    def replace_trigger_stats(user_id, generation, entry_ids, baselines, stats):
+        calls.append(("replace", generation, entry_ids))
+        return generation == 7
+
+    monkeypatch.setattr(trigger_stats.queries, "begin_trigger_stats_rebuild", begin_trigger_stats_rebuild)
+    monkeypatch.setattr(trigger_stats.queries, "fetch_entries_since", fetch_entries_since)
+    monkeypatch.setattr(trigger_stats.queries, "list_triggers", lambda user_id: TRIGGERS)
+    monkeypatch.setattr(trigger_stats.queries, "replace_trigger_stats", replace_trigger_stats)
+
+    result = trigger_stats.rebuild_user_stats("u1", now=NOW)
+
+    # The database replays observations for entries outside entry_ids
+    # (see test_trigger_stats_rpc.py), so every fetched id must be sent.
+    assert calls == [("begin",), ("fetch", date(2025, 4, 1)), ("replace", 7, ["e0", "e1", "e2", "e3"])]
+    assert result == {"entries": 4, "baselines": 7, "stats": 4, "replaced": 1}
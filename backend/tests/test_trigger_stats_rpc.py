@@ -0,0 +1,148 @@
+"""Trigger counter rebuilds against migration 011; they need a scratch database.
+
+    ECHO_TEST_DATABASE_URL=postgresql://postgres@localhost/echo_test pytest backend/tests/test_trigger_stats_rpc.py
+
+The functions name ``public.*`` tables and the race test needs a second
+session, so the tables are created for real and dropped afterwards.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+DATABASE_URL = os.getenv("ECHO_TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="ECHO_TEST_DATABASE_URL not set")
+
+MIGRATION = Path(__file__).resolve().parents[1] / "db" / "migrations" / "011_atomic_trigger_stats_rebuild.sql"
+USER = "00000000-0000-0000-0000-0000000000aa"
+WORK = "00000000-0000-0000-0000-0000000000f1"
+MONTH = date(2025, 10, 1)
+COUNTED = "00000000-0000-0000-0000-000000000001"
+DURING = "00000000-0000-0000-0000-000000000002"
+LATER = "00000000-0000-0000-0000-000000000003"
+
+_TABLES = ("trigger_stat_pending", "trigger_stat_rebuilds", "trigger_stats", "trigger_baselines", "triggers")
+_FUNCTIONS = (
+    "replace_trigger_stats(uuid, bigint, uuid[], jsonb, jsonb)",
+    "begin_trigger_stats_rebuild(uuid)",
+    "record_trigger_observation(uuid, date, text, uuid[], uuid)",
+    "apply_trigger_observation(uuid, date, text, uuid[])",
+    "lock_trigger_stats(uuid)",
+)
+
+
+def _drop(connection) -> None:
+    for function in _FUNCTIONS:
+        connection.execute(f"drop function if exists public.{function}")
+    for table in _TABLES:
+        connection.execute(f"drop table if exists public.{table}")
+
+
+@pytest.fixture
+def conn():
+    with psycopg.connect(DATABASE_URL, autocommit=True) as connection:
+        _drop(connection)
+        # The columns migration 008 and schema.sql give these tables.
+        connection.execute("create table public.triggers (id uuid primary key, user_id uuid, words text[])")
+        connection.execute(
+            "create table public.trigger_baselines (user_id uuid not null, month_start date not null, "
+            "entry_count integer not null default 0, emotion_counts jsonb not null default '{}'::jsonb, "
+            "updated_at timestamptz default now(), primary key (user_id, month_start))"
+        )
+        connection.execute(
+            "create table public.trigger_stats (user_id uuid not null, "
+            "trigger_id uuid not null references public.triggers (id) on delete cascade, "
+            "month_start date not null, match_count integer not null default 0, "
+            "emotion_counts jsonb not null default '{}'::jsonb, updated_at timestamptz default now(), "
+            "primary key (user_id, trigger_id, month_start))"
+        )
+        connection.execute(MIGRATION.read_text())
+        connection.execute("insert into public.triggers (id, user_id, words) values (%s, %s, '{work}')", (WORK, USER))
+        yield connection
+        _drop(connection)
+
+
+def _observe(conn, entry_id: str, label: str = "joy") -> None:
+    conn.execute(
+        "select public.record_trigger_observation(%s, %s, %s, %s::uuid[], %s)",
+        (USER, MONTH, label, [WORK], entry_id),
+    )
+
+
+def _begin(conn) -> int:
+    (generation,) = conn.execute("select public.begin_trigger_stats_rebuild(%s)", (USER,)).fetchone()
+    return int(generation)
+
+
+def _replace(conn, generation: int, entry_ids: list[str]) -> bool:
+    # What a rebuild that fetched only COUNTED (labelled fear) would write.
+    baselines = [{"month_start": MONTH.isoformat(), "entry_count": 1, "emotion_counts": {"fear": 1}}]
+    stats = [{"trigger_id": WORK, "month_start": MONTH.isoformat(), "match_count": 1, "emotion_counts": {"fear": 1}}]
+    (replaced,) = conn.execute(
+        "select public.replace_trigger_stats(%s, %s, %s::uuid[], %s::jsonb, %s::jsonb)",
+        (USER, generation, entry_ids, json.dumps(baselines), json.dumps(stats)),
+    ).fetchone()
+    return bool(replaced)
+
+
+def _counters(conn) -> tuple:
+    baseline = conn.execute("select entry_count, emotion_counts from public.trigger_baselines").fetchall()
+    stats = conn.execute("select match_count, emotion_counts from public.trigger_stats").fetchall()
+    return baseline, stats
+
+
+def test_observations_during_a_rebuild_are_replayed_once(conn) -> None:
+    generation = _begin(conn)
+    # COUNTED lands before the rebuild's fetch (so the fetch includes it),
+    # DURING after it.
+    _observe(conn, COUNTED, "fear")
+    _observe(conn, DURING)
+
+    assert _replace(conn, generation, [COUNTED])
+
+    assert _counters(conn) == ([(2, {"fear": 1, "joy": 1})], [(2, {"fear": 1, "joy": 1})])
+    assert conn.execute("select count(*) from public.trigger_stat_pending").fetchone() == (0,)
+    assert conn.execute("select in_progress from public.trigger_stat_rebuilds").fetchone() == (False,)
+
+
+def test_a_superseded_rebuild_writes_nothing(conn) -> None:
+    stale = _begin(conn)
+    current = _begin(conn)
+    _observe(conn, DURING)
+
+    assert not _replace(conn, stale, [COUNTED])
+    assert _counters(conn) == ([(1, {"joy": 1})], [(1, {"joy": 1})])
+    assert _replace(conn, current, [COUNTED])
+    assert _counters(conn) == ([(2, {"fear": 1, "joy": 1})], [(2, {"fear": 1, "joy": 1})])
+
+
+def test_an_increment_racing_the_swap_waits_for_it_and_is_kept(conn) -> None:
+    generation = _begin(conn)
+    errors: list[BaseException] = []
+
+    def observe_from_another_session() -> None:
+        try:
+            with psycopg.connect(DATABASE_URL, autocommit=True) as other:
+                _observe(other, LATER)
+        except BaseException as exc:  # surfaced by the assertion below
+            errors.append(exc)
+
+    with conn.transaction():
+        assert _replace(conn, generation, [COUNTED])
+        writer = threading.Thread(target=observe_from_another_session)
+        writer.start()
+        time.sleep(0.3)
+        # The swap's transaction is still open, so the increment waits for it.
+        assert writer.is_alive()
+    writer.join(timeout=10)
+
+    assert not writer.is_alive() and errors == []
+    assert _counters(conn) == ([(2, {"fear": 1, "joy": 1})], [(2, {"fear": 1, "joy": 1})])
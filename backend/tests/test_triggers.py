@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from backend.services.normalized import batch_vocabulary, normalize_entries
+from backend.services.tokens import tokenize
+from backend.services.trigger_matcher import TriggerMatcher, compile_pattern, get_trigger_matcher
+from backend.services.triggers import TriggerIndex, compute_trigger_stats, match_trigger_name
+
+
+def _entry(index: int, text: str, label: str) -> dict:
+    return {
+        "id": f"e{index}",
+        "user_id": "u1",
+        "text": text,
+        "created_at": f"2025-10-0{index + 1}T09:00:00Z",
+        "emotion_json": [{"label": label, "score": 0.9}],
+    }
+
+
+ENTRIES = [
+    _entry(0, "work deadline again", "fear"),
+    _entry(1, "lunch with family", "joy"),
+    _entry(2, "work was fine, family dinner", "joy"),
+    _entry(3, "quiet evening", "neutral"),
+]
+
+
+def _scan(matcher: TriggerMatcher, text: str) -> set[int]:
+    assert matcher.vocabulary is not None
+    return matcher.scan(matcher.vocabulary.encode(tokenize(text)))
+
+
+def test_patterns_match_whole_tokens_phrases_and_prefixes() -> None:
+    matcher = TriggerMatcher(
+        [
+            {"words": ["deadline"]},
+            {"words": ["deadline*"]},
+            {"words": ["group chat"]},
+            {"words": ["late night*", "boss"]},
+        ]
+    )
+
+    assert _scan(matcher, "Another deadline today") == {0, 1}
+    assert _scan(matcher, "Two deadlines today") == {1}
+    assert _scan(matcher, "the group chat exploded") == {2}
+    assert _scan(matcher, "group dinner, then chat") == set()
+    assert _scan(matcher, "Late nights with my boss") == {3}
+    assert _scan(matcher, "undeadline") == set()
+    # Memoized transitions give the same answers on a second pass.
+    assert _scan(matcher, "Two deadlines today") == {1}
+
+
+def test_compile_pattern_normalizes_like_entry_text() -> None:
+    assert compile_pattern("Meeting with Boss") == " meeting boss "
+    assert compile_pattern("dead*") == " dead"
+    assert compile_pattern("de*") is None
+    assert compile_pattern("the") is None
+
+
+def test_matcher_cache_recompiles_when_words_change() -> None:
+    first = get_trigger_matcher("u-cache", [{"words": ["work"]}])
+    assert get_trigger_matcher("u-cache", [{"words": ["work"]}]) is first
+    assert get_trigger_matcher("u-cache", [{"words": ["work*"]}]) is not first
+    assert match_trigger_name("working late", [{"name": "Work", "words": ["work*"]}]) == "Work"
+
+
+def test_trigger_stats_correlation_against_baseline() -> None:
+    stats = compute_trigger_stats(
+        ENTRIES,
+        [
+            {"id": "t1", "name": "Work", "words": ["work", "deadline"]},
+            {"id": "t2", "name": "Nothing", "words": ["absent"]},
+        ],
+    )
+
+    assert stats[0]["stats"] == {"count": 2, "correlation": {"fear": 25.0, "joy": 0.0}}
+    assert stats[1]["stats"] == {"count": 0, "correlation": {}}
+
+
+def test_trigger_index_agrees_with_scanning_every_entry() -> None:
+    triggers = [
+        {"words": ["deadline"]},
+        {"words": ["dead*"]},
+        {"words": ["group chat"]},
+        {"words": ["family", "late night*"]},
+    ]
+    texts = [
+        "Another deadline today",
+        "the group chat exploded",
+        "group dinner, then chat",
+        "late nights and deadlines",
+        "family lunch",
+        "quiet evening",
+    ]
+    entries = normalize_entries([_entry(index, text, "joy") for index, text in enumerate(texts)])
+    matcher = TriggerMatcher(triggers, batch_vocabulary(entries))
+
+    index = TriggerIndex(entries, matcher)
+
+    vocabulary = batch_vocabulary(entries)
+    indexed = {vocabulary.token_text(identifier) for identifier in index.postings}
+    assert indexed == {"deadline", "deadlines", "group", "family", "late"}
+    expected = [
+        {position for position, entry in enumerate(entries) if trigger in matcher.scan(entry.token_ids)}
+        for trigger in range(len(triggers))
+    ]
+    assert index.match() == expected == [{0}, {0, 3}, {1}, {3, 4}]
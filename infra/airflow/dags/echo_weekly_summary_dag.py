@@ -13,7 +13,8 @@ if REPO_ROOT not in sys.path:
     sys.path.append(REPO_ROOT)
 
 from backend.db import queries  # noqa: E402
-from backend.services import analytics, reporting, llm  # noqa: E402
+from backend.services import analytics, anomalies, reporting, llm  # noqa: E402
+from backend.services.normalized import normalize_entries  # noqa: E402
 
 
 def _week_bounds(now: datetime) -> tuple[datetime, datetime]:
@@ -39,10 +40,13 @@ with DAG(
     def compute_weekly_window() -> dict:
         now = datetime.now(timezone.utc)
         start_dt, end_dt = _week_bounds(now)
-        entries = queries.fetch_entries_for_range_all(start=start_dt, end=end_dt)
-        daily_records = analytics.compute_daily_metrics(entries)
+        entries = queries.fetch_entries_for_range_all(start=start_dt, end=end_dt, projection="tokens")
+        normalized_entries = normalize_entries(entries)
+        daily_records = analytics.compute_daily_metrics(normalized_entries)
         queries.upsert_daily_metrics(daily_records)
-        weekly_records = analytics.compute_weekly_metrics(entries, daily_records)
+        analytics.refresh_rollups(daily_records)
+        anomalies.observe_daily(daily_records)
+        weekly_records = analytics.compute_weekly_metrics(normalized_entries, daily_records)
         queries.upsert_weekly_metrics(weekly_records)
         return {
             "week_start": start_dt.date().isoformat(),
@@ -57,14 +61,18 @@ with DAG(
         week_start = datetime.fromisoformat(context["week_start"]).date()
         week_end = datetime.fromisoformat(context["week_end"]).date()
         payloads: List[dict] = []
+        # XCom hands us plain rows; parse them once and share across every user.
+        normalized_entries = normalize_entries(context["entries"])
+        prev_week_start = week_start - timedelta(days=7)
+        user_ids = [record["user_id"] for record in context["weekly"] if record.get("user_id")]
+        previous_metrics = queries.get_weekly_metrics_for_users(user_ids, prev_week_start, prev_week_start)
 
         for record in context["weekly"]:
             user_id = record.get("user_id")
             if not user_id:
                 continue
 
-            prev_week_start = week_start - timedelta(days=7)
-            prev_week_metrics = queries.get_weekly_metrics(user_id, prev_week_start, prev_week_start)
+            prev_week_metrics = previous_metrics.get(user_id) or []
             previous_record = prev_week_metrics[0] if prev_week_metrics else None
 
             user_daily = [item for item in context["daily"] if item.get("user_id") == user_id]
@@ -74,8 +82,9 @@ with DAG(
                 week_end=week_end,
                 weekly_record=record,
                 previous_week_record=previous_record,
-                entries=context["entries"],
+                entries=normalized_entries,
                 daily_records=user_daily,
+                precomputed_spikes=anomalies.weekly_spikes(user_id, week_start, week_end),
             )
             payloads.append(
                 {
@@ -90,10 +99,11 @@ with DAG(
     @task()
     def generate_and_store_summaries(payloads: List[dict]) -> List[dict]:
         summaries: List[dict] = []
+        records: List[dict] = []
         for payload in payloads:
             metrics_payload = payload["metrics"]
             summary_json, markdown = llm.generate_weekly_summary(metrics_payload)
-            record = queries.upsert_weekly_summary(
+            records.append(
                 {
                     "user_id": payload["user_id"],
                     "week_start": payload["week_start"],
@@ -105,17 +115,19 @@ with DAG(
             summaries.append(
                 {
                     "user_id": payload["user_id"],
+                    "week_start": payload["week_start"],
                     "summary_json": summary_json,
-                    "record_id": record["id"],
                 }
             )
+        result = queries.upsert_weekly_summaries(records)
+        print(f"[Echo DAG] Stored weekly summaries: {result.as_dict()}")
         return summaries
 
     @task()
     def log_completion(summaries: List[dict]) -> None:
         for item in summaries:
             print(
-                f"[Echo DAG] Generated weekly summary for user={item['user_id']} -> record={item['record_id']}"
+                f"[Echo DAG] Generated weekly summary for user={item['user_id']} week={item['week_start']}"
             )
 
     analytics_context = compute_weekly_window()